@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1  # Bump when the result format or engine semantics change
+CACHE_DIR = os.getenv("BACKTEST_CACHE_DIR", "backtest_cache")
+CACHE_MAX_MB = float(os.getenv("BACKTEST_CACHE_MAX_MB", "256"))
+CACHE_RESCAN_S = 30.0  # Re-read the directory this often before evicting, to count other processes' writes
+
+_source_hashes: Dict[type, str] = {}
+
+
+def source_fingerprint(cls: type) -> str:
+    """Hash of the strategy's source, including any project base classes it inherits from."""
+    if cls not in _source_hashes:
+        digest = hashlib.sha256()
+        for klass in cls.__mro__:
+            if klass.__module__.startswith("backend."):
+                digest.update(inspect.getsource(klass).encode())
+        _source_hashes[cls] = digest.hexdigest()
+    return _source_hashes[cls]
+
+
+def data_fingerprint(frame: pd.DataFrame) -> str:
+    digest = hashlib.sha256(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    digest.update(",".join(frame.columns).encode())
+    return digest.hexdigest()
+
+
+def result_key(strategy_source: str, params: dict, data_fp: str, broker, equity_points: int) -> str:
+    payload = json.dumps({
+        "version": CACHE_VERSION,
+        "strategy": strategy_source,
+        "params": params,
+        "data": data_fp,
+        "broker": asdict(broker),
+        "equity_points": equity_points,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk backtest results addressed by the hash of every input (gzip JSON, one file per key).
+    Least recently used entries are evicted once the directory exceeds `max_bytes`; a hit
+    refreshes the file's mtime, which is the LRU clock. Several processes may share a directory:
+    the index is re-read from disk before evicting, so the cap holds for their combined writes.
+    """
+    def __init__(self, path: str = CACHE_DIR, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+                 rescan_interval: float = CACHE_RESCAN_S):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+        # key -> (size, mtime); maintained on put/evict and rebuilt by refresh()
+        self.index: Dict[str, list] = {}
+        self.size = 0
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the index from the directory (entries added or evicted by other processes)."""
+        index = {}
+        for name in os.listdir(self.path):
+            if name.endswith(".json.gz"):
+                try:
+                    st = os.stat(os.path.join(self.path, name))
+                except FileNotFoundError:  # Evicted by another process mid-scan
+                    continue
+                index[name[:-8]] = [st.st_size, st.st_mtime]
+        with self.lock:
+            self.index = index
+            self.size = sum(entry[0] for entry in index.values())
+            self.scanned_at = time.monotonic()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json.gz")
+
+    def get(self, key: str) -> Optional[dict]:
+        if key not in self.index:
+            if not os.path.exists(self._file(key)):
+                self.misses += 1
+                return None
+            # Written by another process (e.g. a backtest job worker) since the index was built
+            with self.lock:
+                size = os.path.getsize(self._file(key))
+                self.index[key] = [size, 0.0]
+                self.size += size
+        try:
+            with gzip.open(self._file(key), "rt") as f:
+                result = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key[:12]}: {e}")
+            self._drop(key)
+            self.misses += 1
+            return None
+        now = time.time()
+        os.utime(self._file(key), (now, now))
+        with self.lock:
+            if key in self.index:
+                self.index[key][1] = now
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        tmp = self._file(key) + f".{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", compresslevel=6) as f:
+            json.dump(result, f, separators=(",", ":"))
+        os.replace(tmp, self._file(key))  # Atomic: readers never see a partial entry
+        size, now = os.path.getsize(self._file(key)), time.time()
+        os.utime(self._file(key), (now, now))
+        with self.lock:
+            previous = self.index.get(key)
+            self.size += size - (previous[0] if previous else 0)
+            self.index[key] = [size, now]
+        self._evict()
+
+    def _drop(self, key: str):
+        with self.lock:
+            entry = self.index.pop(key, None)
+            if entry:
+                self.size -= entry[0]
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        if self.size <= self.max_bytes and time.monotonic() - self.scanned_at < self.rescan_interval:
+            return
+        self.refresh()
+        if self.size <= self.max_bytes:
+            return
+        with self.lock:
+            oldest = sorted(self.index.items(), key=lambda item: item[1][1])
+        for key, (size, _) in oldest:
+            if self.size <= self.max_bytes:
+                break
+            self._drop(key)
+            self.evictions += 1
+
+    def clear(self):
+        for key in list(self.index):
+            self._drop(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.index),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,223 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from ..observability.equity import lttb
+from .cache import ResultCache, data_fingerprint, result_key, source_fingerprint
+from ..strategies.strategies import StrategyA_TrendFollowing, StrategyB_Breakout
+
+logger = logging.getLogger(__name__)
+
+EQUITY_POINTS = 500  # Equity curves are LTTB-downsampled to this many points per result
+
+
+@dataclass
+class BacktestConfig:
+    strategy: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        return f"{self.strategy}(" + ",".join(f"{k}={v}" for k, v in sorted(self.params.items())) + ")"
+
+
+@dataclass
+class BrokerModel:
+    cash: float = 10000.0
+    commission: float = 0.005     # Foxbit taker fee
+    slippage_pct: float = 0.001
+    size_pct: float = 95.0        # Percent of equity committed per entry
+
+
+class TradeList(bt.Analyzer):
+    """Every closed trade with entry/exit, size and PnL (TradeAnalyzer only keeps aggregates)."""
+    def start(self):
+        self.trades = []
+        self._sizes = {}
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self._sizes[trade.ref] = trade.size
+        if not trade.isclosed:
+            return
+        size = self._sizes.pop(trade.ref, 0.0)
+        exit_price = trade.price + trade.pnl / size if size else trade.price
+        self.trades.append({
+            "opened_at": bt.num2date(trade.dtopen).isoformat(),
+            "closed_at": bt.num2date(trade.dtclose).isoformat(),
+            "side": "long" if size > 0 else "short",
+            "size": size,
+            "entry_price": trade.price,
+            "exit_price": exit_price,
+            "pnl": trade.pnl,
+            "pnl_net": trade.pnlcomm,
+            "bars": trade.barlen,
+        })
+
+    def get_analysis(self):
+        return self.trades
+
+
+class EquityCurve(bt.Analyzer):
+    """Portfolio value per bar as (epoch seconds, value)."""
+    def start(self):
+        self.points = []
+
+    def next(self):
+        ts = bt.num2date(self.data.datetime[0]).replace(tzinfo=timezone.utc).timestamp()
+        self.points.append((ts, self.strategy.broker.getvalue()))
+
+    def get_analysis(self):
+        return self.points
+
+
+# Strategies runnable in a batch. Each gets a module-level subclass taking an `overrides` dict so an
+# arbitrary list of parameter sets fits one optstrategy call (and stays picklable for worker processes).
+STRATEGY_CLASSES = {
+    "StrategyA": StrategyA_TrendFollowing,
+    "StrategyB": StrategyB_Breakout,
+}
+
+
+def _batched(name: str, base: type) -> type:
+    def __init__(self):
+        for key, value in (self.p.overrides or {}).items():
+            setattr(self.p, key, value)
+        base.__init__(self)
+
+    cls = type(f"Batched{name}", (base,), {"params": (("overrides", None),), "__init__": __init__,
+                                           "__module__": __name__})
+    globals()[cls.__name__] = cls
+    return cls
+
+
+BATCHED = {name: _batched(name, base) for name, base in STRATEGY_CLASSES.items()}
+
+
+def synthetic_frame(start: datetime, end: datetime, freq: str = "1D", start_price: float = 150000.0,
+                    sigma: float = 0.03, seed: int = 42) -> pd.DataFrame:
+    """Deterministic OHLCV random walk, used when no market data file is given."""
+    index = pd.date_range(start, end, freq=freq)
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, sigma, len(index))))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, sigma / 2, len(index)))
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": rng.uniform(1, 10, len(index)),
+    }, index=index)
+
+
+def load_frame(source: Optional[str], start: datetime, end: datetime) -> pd.DataFrame:
+    """OHLCV frame from a CSV (datetime,open,high,low,close[,volume]) or, without one, synthetic bars."""
+    if not source:
+        return synthetic_frame(start, end)
+    frame = pd.read_csv(source)
+    frame.columns = [c.strip().lower() for c in frame.columns]
+    time_col = next(c for c in ("datetime", "date", "timestamp", "time") if c in frame.columns)
+    if pd.api.types.is_numeric_dtype(frame[time_col]):
+        unit = "ms" if frame[time_col].iloc[0] > 1e11 else "s"
+        frame.index = pd.to_datetime(frame.pop(time_col), unit=unit)
+    else:
+        frame.index = pd.to_datetime(frame.pop(time_col))
+    if "volume" not in frame.columns:
+        frame["volume"] = 0.0
+    frame = frame.sort_index()
+    return frame.loc[start:end, ["open", "high", "low", "close", "volume"]]
+
+
+def _timeframe(frame: pd.DataFrame):
+    """backtrader (timeframe, compression) from the bar spacing."""
+    if len(frame) < 2:
+        return bt.TimeFrame.Days, 1
+    step = pd.Series(frame.index).diff().median()
+    if step >= timedelta(days=1):
+        return bt.TimeFrame.Days, max(1, step.days)
+    return bt.TimeFrame.Minutes, max(1, int(step.total_seconds() // 60))
+
+
+def _result(config: BacktestConfig, strat, broker: BrokerModel, equity_points: int) -> dict:
+    analyzers = strat.analyzers
+    stats = analyzers.tradestats.get_analysis()
+    total = stats.get("total", {}).get("closed", 0)
+    won = stats.get("won", {}).get("total", 0) if total else 0
+    equity = analyzers.equity.get_analysis()
+    final_value = equity[-1][1] if equity else broker.cash
+    returns = analyzers.returns.get_analysis()
+    return {
+        "strategy": config.strategy,
+        "params": config.params,
+        "label": config.label,
+        "final_value": final_value,
+        "return_pct": (final_value / broker.cash - 1) * 100,
+        "max_drawdown_pct": analyzers.drawdown.get_analysis().max.drawdown,
+        "annual_return_pct": returns.get("rnorm100", 0.0),
+        "trade_stats": {
+            "closed": total,
+            "won": won,
+            "lost": total - won,
+            "win_rate": won / total if total else 0.0,
+            "pnl_net": stats.get("pnl", {}).get("net", {}).get("total", 0.0) if total else 0.0,
+        },
+        "trades": analyzers.trades.get_analysis(),
+        "equity": [[int(ts), round(value, 2)] for ts, value in lttb(equity, equity_points)],
+    }
+
+
+def run_batch(configs: List[BacktestConfig], frame: pd.DataFrame, broker: Optional[BrokerModel] = None,
+              maxcpus: Optional[int] = None, equity_points: int = EQUITY_POINTS,
+              cache: Optional[ResultCache] = None) -> List[dict]:
+    """
+    Run every config over one preloaded feed. Configs of the same strategy share a single
+    optstrategy pass (runonce, data preloaded once, fanned out over `maxcpus` processes).
+    With a `cache`, configs whose inputs were already run are served from it and only the
+    misses are backtested. Results come back in input order.
+    """
+    broker = broker or BrokerModel()
+    for config in configs:
+        if config.strategy not in BATCHED:
+            raise ValueError(f"Unknown strategy '{config.strategy}'. Available: {', '.join(BATCHED)}")
+    timeframe, compression = _timeframe(frame)
+    maxcpus = maxcpus or int(os.getenv("BACKTEST_MAXCPUS", "0")) or None  # None = all cores
+
+    results: List[Optional[dict]] = [None] * len(configs)
+    keys: List[Optional[str]] = [None] * len(configs)
+    if cache is not None:
+        data_fp = data_fingerprint(frame)
+        for i, config in enumerate(configs):
+            source = source_fingerprint(STRATEGY_CLASSES[config.strategy])
+            keys[i] = result_key(source, config.params, data_fp, broker, equity_points)
+            results[i] = cache.get(keys[i])
+
+    for name in dict.fromkeys(configs[i].strategy for i in range(len(configs)) if results[i] is None):
+        indexes = [i for i, c in enumerate(configs) if c.strategy == name and results[i] is None]
+        cerebro = bt.Cerebro(stdstats=False, optreturn=True, maxcpus=maxcpus if len(indexes) > 1 else 1)
+        cerebro.adddata(bt.feeds.PandasData(dataname=frame, timeframe=timeframe, compression=compression))
+        cerebro.optstrategy(BATCHED[name], overrides=[configs[i].params for i in indexes])
+        cerebro.broker.setcash(broker.cash)
+        cerebro.broker.setcommission(commission=broker.commission)
+        cerebro.broker.set_slippage_perc(broker.slippage_pct)
+        cerebro.addsizer(bt.sizers.PercentSizer, percents=broker.size_pct)
+        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="tradestats")
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+        cerebro.addanalyzer(bt.analyzers.Returns, _name="returns")
+        cerebro.addanalyzer(TradeList, _name="trades")
+        cerebro.addanalyzer(EquityCurve, _name="equity")
+
+        for run in cerebro.run():
+            strat = run[0]
+            overrides = strat.params.overrides
+            i = next(i for i in indexes if results[i] is None and configs[i].params == overrides)
+            results[i] = _result(configs[i], strat, broker, equity_points)
+            if cache is not None:
+                cache.put(keys[i], results[i])
+    return results
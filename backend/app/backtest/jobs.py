@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "1"))     # Concurrent jobs (one process each)
+BACKTEST_MAX_QUEUED = int(os.getenv("BACKTEST_MAX_QUEUED", "20"))
+BACKTEST_NICE = int(os.getenv("BACKTEST_NICE", "10"))          # Workers yield CPU to the trading loop
+BACKTEST_CHUNK = int(os.getenv("BACKTEST_CHUNK", "4"))         # Configs per worker task (progress granularity)
+MAX_JOBS_KEPT = 100
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+# --- Worker process side ---
+
+_frames: "OrderedDict[tuple, object]" = OrderedDict()
+_cache = None  # One ResultCache per worker process, shared by all of its chunks
+
+
+def _init_worker(nice: int):
+    global _cache
+    if nice:
+        try:
+            os.nice(nice)
+        except (AttributeError, OSError):  # Not available on this platform
+            pass
+    from .cache import ResultCache
+    _cache = ResultCache()
+
+
+def _frame(data: Optional[str], start: str, end: str):
+    """Per-worker cache of loaded frames: chunks of the same job reuse the parsed feed."""
+    from .engine import load_frame
+    key = (data, start, end, os.path.getmtime(data) if data else None)
+    if key not in _frames:
+        _frames[key] = load_frame(data, datetime.fromisoformat(start), datetime.fromisoformat(end))
+        while len(_frames) > 2:
+            _frames.popitem(last=False)
+    return _frames[key]
+
+
+def run_chunk(configs: List[dict], data: Optional[str], start: str, end: str, broker: dict) -> List[dict]:
+    global _cache
+    from .engine import BacktestConfig, BrokerModel, run_batch
+    if _cache is None:  # Called outside a pool worker
+        from .cache import ResultCache
+        _cache = ResultCache()
+    return run_batch([BacktestConfig(**c) for c in configs], _frame(data, start, end), BrokerModel(**broker),
+                     maxcpus=1, cache=_cache)
+
+
+# --- API process side ---
+
+@dataclass
+class Job:
+    id: str
+    configs: List[dict]
+    start: str
+    end: str
+    data: Optional[str]
+    broker: dict
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: int = 0
+    results: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    cancel_requested: bool = False
+
+    def summary(self) -> dict:
+        best = max(self.results, key=lambda r: r["return_pct"]) if self.results else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": {"done": self.done, "total": len(self.configs)},
+            "best": {"label": best["label"], "return_pct": best["return_pct"]} if best else None,
+            "error": self.error,
+        }
+
+    def detail(self) -> dict:
+        return {**self.summary(), "configs": self.configs, "start": self.start, "end": self.end,
+                "data": self.data, "broker": self.broker, "results": self.results}
+
+
+class JobQueue:
+    """
+    Backtest jobs on a bounded process pool. At most `workers` jobs run at once (niced, one
+    backtrader process each, so the trading loop keeps its core); the rest wait in FIFO order
+    up to `max_queued`. A job is split into chunks of configs so progress and the best equity
+    curve so far can be streamed, and so cancellation takes effect between chunks.
+    """
+    def __init__(self, workers: int = BACKTEST_WORKERS, max_queued: int = BACKTEST_MAX_QUEUED,
+                 nice: int = BACKTEST_NICE, chunk: int = BACKTEST_CHUNK):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.nice = nice
+        self.chunk = chunk
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+
+    def submit(self, configs: List[dict], start: str, end: str, data: Optional[str], broker: dict) -> Job:
+        queued = sum(1 for j in self.jobs.values() if j.status == "queued")
+        if queued >= self.max_queued:
+            raise QueueFull(f"{queued} backtests already queued")
+        if self.pool is None:
+            # spawn: the API process has threads (executors, log sink) that fork would copy mid-state
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker, initargs=(self.nice,))
+            self.slots = asyncio.Semaphore(self.workers)
+        job = Job(uuid.uuid4().hex[:12], configs, start, end, data, broker)
+        self.jobs[job.id] = job
+        self._trim()
+        self.tasks[job.id] = asyncio.create_task(self._run(job))
+        return job
+
+    def _trim(self):
+        finished = [jid for jid, j in self.jobs.items() if j.status not in ACTIVE]
+        for jid in finished[:max(0, len(self.jobs) - MAX_JOBS_KEPT)]:
+            del self.jobs[jid]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in ACTIVE:
+            return job
+        job.cancel_requested = True
+        if job.status == "queued":
+            # Not holding a worker yet: drop it right away
+            self.tasks[job_id].cancel()
+            self._finish(job, "cancelled")
+        return job
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self.subscribers.setdefault(job_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(job_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self.subscribers.pop(job_id, None)
+
+    def _publish(self, job: Job, event: dict):
+        for queue in self.subscribers.get(job.id, []):
+            if queue.full():  # Slow consumer: keep the newest state
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _progress(self, job: Job) -> dict:
+        best = max(job.results, key=lambda r: r["return_pct"]) if job.results else None
+        return {"type": "progress", **job.summary(), "equity": best["equity"] if best else []}
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status, job.error, job.finished_at = status, error, time.time()
+        self._publish(job, {"type": "status", **job.summary()})
+        self.tasks.pop(job.id, None)
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.slots:
+                if job.cancel_requested:
+                    return self._finish(job, "cancelled")
+                job.status, job.started_at = "running", time.time()
+                self._publish(job, {"type": "status", **job.summary()})
+                for i in range(0, len(job.configs), self.chunk):
+                    chunk = job.configs[i:i + self.chunk]
+                    results = await loop.run_in_executor(self.pool, run_chunk, chunk, job.data, job.start, job.end, job.broker)
+                    job.results.extend(results)
+                    job.done += len(chunk)
+                    self._publish(job, self._progress(job))
+                    if job.cancel_requested:
+                        return self._finish(job, "cancelled")
+            self._finish(job, "done")
+        except asyncio.CancelledError:
+            if job.status in ACTIVE:
+                self._finish(job, "cancelled")
+        except Exception as e:
+            logger.error(f"Backtest job {job.id} failed: {e}")
+            self._finish(job, "failed", str(e))
+
+    def shutdown(self):
+        for task in list(self.tasks.values()):
+            task.cancel()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "max_queued": self.max_queued, "nice": self.nice, "jobs": counts}
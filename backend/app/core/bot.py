@@ -1,49 +1,22 @@
-import backtrader as bt
 from datetime import datetime
-import pandas as pd
-from typing import List
-from .foxbit_client.client import FoxbitClient
-from .strategies.strategies import StrategyA_TrendFollowing, StrategyB_Breakout
+from typing import List, Optional
+from ..foxbit_client.client import FoxbitClient
 
 class BotEngine:
     def __init__(self):
-        self.cerebro = bt.Cerebro()
         self.client = FoxbitClient() # In real live mode, this would feed data
         
-    def run_backtest(self, strategy_name: str, symbol: str, start_date: datetime, end_date: datetime, initial_cash: float):
-        self.cerebro = bt.Cerebro()
-        
-        # Load Strategy
-        if strategy_name == "StrategyA":
-            self.cerebro.addstrategy(StrategyA_TrendFollowing)
-        elif strategy_name == "StrategyB":
-            self.cerebro.addstrategy(StrategyB_Breakout)
-            
-        # Get Data (Mocking fetching history for now or implement real fetch)
-        # candles = self.client.get_candles(symbol, ...) 
-        # For this deliverable, we assume we might need to load from CSV or simpler source if API is limited publicly.
-        # Im implementing a dummy data generator if no file exists to ensure "runnable" state.
-        
-        # Using a dummy feed for immediate runnability if file not found
-        data = bt.feeds.YahooFinanceData(
-            dataname='BTC-USD',
-            fromdate=start_date,
-            todate=end_date
-        )
-        self.cerebro.adddata(data)
-        
-        self.cerebro.broker.setcash(initial_cash)
-        self.cerebro.addsizer(bt.sizers.FixedSize, stake=10) # Simple sizer
-        
-        print('Starting Portfolio Value: %.2f' % self.cerebro.broker.getvalue())
-        strategies = self.cerebro.run()
-        final_val = self.cerebro.broker.getvalue()
-        print('Final Portfolio Value: %.2f' % final_val)
-        
-        return {
-            "final_value": final_val,
-            "trades": [] # would extract trades from strategy analyzer
-        }
+    def run_backtest(self, strategy_name: str, symbol: str, start_date: datetime, end_date: datetime,
+                     initial_cash: float, params: Optional[dict] = None, data: Optional[str] = None):
+        """Single backtest; see backtest.engine.run_batch for running many configurations at once."""
+        # Heavy imports (backtrader pulls in matplotlib/pandas) are deferred until a backtest is requested
+        from ..backtest.engine import BacktestConfig, BrokerModel, load_frame, run_batch
+
+        frame = load_frame(data, start_date, end_date)
+        print(f'{symbol}: {len(frame)} bars | Starting Portfolio Value: {initial_cash:.2f}')
+        result = run_batch([BacktestConfig(strategy_name, params or {})], frame, BrokerModel(cash=initial_cash))[0]
+        print('Final Portfolio Value: %.2f' % result["final_value"])
+        return result
 
     # For Live Paper Trading (simulated loop without Cerebro for easier control/UI feedback on this V1 app)
     # Using Cerebro for Live is possible but complex to integrate with a Web Dashboard for status updates in real-time
@@ -0,0 +1,116 @@
+import logging
+import os
+import struct
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Layout (little endian):
+#   header  : magic(4s) version(H) saved_at(d) n_prices(I)
+#   scalars : last_trade_time, last_price_tick (d x2)
+#             risk initial, current balance (d x2), cooldown_until (d)
+#             daily_trades, consecutive_losses (i x2), kill_switch (?)
+#   prices  : n_prices doubles
+#   trailer : crc32 of everything above (I)
+MAGIC = b"BVCK"
+VERSION = 3  # v2 dropped entry_price (the position ledger owns it), v3 the unused peak balance
+_HEADER = struct.Struct("<4sHdI")
+_SCALARS = struct.Struct("<5dii?")
+_TRAILER = struct.Struct("<I")
+
+
+@dataclass
+class StrategyCheckpoint:
+    """Everything the trading loop needs to resume without re-warming its indicators."""
+    saved_at: float
+    prices: List[float] = field(default_factory=list)
+    last_price_tick: float = 0.0  # When the newest price in `prices` was appended
+    last_trade_time: float = 0.0
+    risk: dict = field(default_factory=dict)  # RiskEngine.snapshot()
+
+
+def encode(ckpt: StrategyCheckpoint) -> bytes:
+    risk = ckpt.risk
+    body = b"".join((
+        _HEADER.pack(MAGIC, VERSION, ckpt.saved_at, len(ckpt.prices)),
+        _SCALARS.pack(
+            ckpt.last_trade_time, ckpt.last_price_tick,
+            risk.get("initial_balance", 0.0), risk.get("current_balance", 0.0),
+            risk.get("cooldown_until", 0.0),
+            risk.get("daily_trades", 0), risk.get("consecutive_losses", 0),
+            risk.get("kill_switch_active", False),
+        ),
+        array("d", ckpt.prices).tobytes(),
+    ))
+    return body + _TRAILER.pack(zlib.crc32(body))
+
+
+def decode(data: bytes) -> StrategyCheckpoint:
+    """Parse a checkpoint. Raises ValueError on truncation, corruption or version mismatch."""
+    if len(data) < _HEADER.size + _SCALARS.size + _TRAILER.size:
+        raise ValueError("Checkpoint truncated")
+    body, (crc,) = data[:-_TRAILER.size], _TRAILER.unpack(data[-_TRAILER.size:])
+    if zlib.crc32(body) != crc:
+        raise ValueError("Checkpoint CRC mismatch")
+
+    magic, version, saved_at, n_prices = _HEADER.unpack_from(body, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported checkpoint ({magic!r} v{version})")
+    (last_trade_time, last_price_tick, initial, current, cooldown_until,
+     daily_trades, consecutive_losses, kill_switch) = _SCALARS.unpack_from(body, _HEADER.size)
+
+    prices = array("d")
+    prices.frombytes(body[_HEADER.size + _SCALARS.size:])
+    if len(prices) != n_prices:
+        raise ValueError("Checkpoint price buffer length mismatch")
+
+    return StrategyCheckpoint(
+        saved_at=saved_at,
+        prices=prices.tolist(),
+        last_price_tick=last_price_tick,
+        last_trade_time=last_trade_time,
+        risk={
+            "initial_balance": initial,
+            "current_balance": current,
+            "cooldown_until": cooldown_until,
+            "daily_trades": daily_trades,
+            "consecutive_losses": consecutive_losses,
+            "kill_switch_active": kill_switch,
+        },
+    )
+
+
+def save_checkpoint(path: str, ckpt: StrategyCheckpoint):
+    """Atomically replace `path` (write temp file, fsync, rename). Blocking: run it in an executor."""
+    tmp_path = f"{path}.tmp"
+    try:
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(encode(ckpt))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Failed to write checkpoint: {e}")
+
+
+def load_checkpoint(path: str) -> Optional[StrategyCheckpoint]:
+    """Read and validate a checkpoint. Returns None when missing or invalid."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            ckpt = decode(f.read())
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring invalid checkpoint {path}: {e}")
+        return None
+    if ckpt.saved_at > time.time() + 60:
+        logger.warning("⚠️ Ignoring checkpoint saved in the future (clock skew?)")
+        return None
+    return ckpt
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: seq(Q) length(I) crc32(I) | JSON payload
+# seq is odd while the (single) writer is mid-update; readers retry until they see the same
+# even seq before and after copying the payload and the CRC matches.
+_HEADER = struct.Struct("<QII")
+_SEQ = struct.Struct("<Q")
+RESPONSE_LIMIT = 1 << 24  # Largest command response line (profiles, equity curves) read back by API workers
+STALE_AFTER = 10.0  # Seconds without a new publish before a reader re-attaches by name
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without letting this process's resource tracker unlink it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _segment_id(name: str) -> Optional[tuple]:
+    """(inode, size) of the segment currently bound to `name`, or None if unknown / unlinked."""
+    try:
+        st = os.stat(os.path.join("/dev/shm", name.lstrip("/")))
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size)
+
+
+class StateBusWriter:
+    """
+    Single-writer side of the shared-memory state bus (the trading process).
+    Publishes a JSON snapshot; never blocks on readers.
+    """
+    def __init__(self, name: str, size: int = 1 << 20):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a previous trader that died: reuse it if large enough
+            self.shm = _attach(name)
+            if self.shm.size < size:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # Continue the sequence so readers never mistake new data for their cached copy
+        (seq,) = _SEQ.unpack_from(self.shm.buf, 0)
+        self.seq = seq + (seq & 1)
+
+    def publish(self, snapshot: dict) -> bool:
+        payload = json.dumps(snapshot, separators=(",", ":"), default=str).encode("utf-8")
+        if _HEADER.size + len(payload) > self.shm.size:
+            logger.error(f"State snapshot ({len(payload)} bytes) exceeds the bus segment ({self.shm.size} bytes)")
+            return False
+        buf = self.shm.buf
+        _SEQ.pack_into(buf, 0, self.seq + 1)  # Odd: write in progress
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        _HEADER.pack_into(buf, 0, self.seq + 2, len(payload), zlib.crc32(payload))
+        self.seq += 2
+        return True
+
+    def close(self, unlink: bool = True):
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class StateBusReader:
+    """
+    Lock-free reader used by API workers. The decoded snapshot is cached per sequence number,
+    so polling between publishes costs one header read. A restarted trader unlinks and recreates
+    the segment, so the reader re-attaches when the name points at a different segment or the
+    snapshot stops advancing.
+    """
+    def __init__(self, name: str, retries: int = 100, recheck_interval: float = 1.0):
+        self.name = name
+        self.retries = retries
+        self.recheck_interval = recheck_interval
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self._segment: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._seq = 0
+        self._snapshot: Optional[dict] = None
+
+    def _attach(self) -> bool:
+        try:
+            self.shm = _attach(self.name)
+        except FileNotFoundError:
+            return False
+        self._segment = _segment_id(self.name)
+        self._checked_at = time.monotonic()
+        self._seq = 0  # New segment: its sequence restarts
+        return True
+
+    def _detach_if_replaced(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.recheck_interval:
+            return
+        self._checked_at = now
+        current = _segment_id(self.name)
+        if current is not None or self._segment is not None:
+            replaced = current != self._segment
+        else:
+            # No /dev/shm to compare against: fall back to snapshot staleness
+            published_at = (self._snapshot or {}).get("published_at")
+            replaced = isinstance(published_at, (int, float)) and time.time() - published_at > STALE_AFTER
+        if replaced:
+            logger.info(f"🔄 State bus segment {self.name} was replaced, re-attaching")
+            self.close()
+            self._snapshot = None
+
+    def read(self) -> Optional[dict]:
+        """Latest consistent snapshot, or None if the trader has not published yet."""
+        if self.shm is not None:
+            self._detach_if_replaced()
+        if self.shm is None and not self._attach():
+            return None
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            seq, length, crc = _HEADER.unpack_from(buf, 0)
+            if seq == self._seq:
+                return self._snapshot
+            if seq & 1:
+                time.sleep(0)  # Writer mid-update
+                continue
+            data = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if _SEQ.unpack_from(buf, 0)[0] != seq or zlib.crc32(data) != crc:
+                continue  # Torn read
+            self._snapshot = json.loads(data)
+            self._seq = seq
+            return self._snapshot
+        return self._snapshot  # Writer kept racing us: serve the previous snapshot
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+
+class CommandError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+async def serve_commands(path: str, handlers: Dict[str, Handler]):
+    """
+    Unix-socket command bus run by the trading process. One JSON request per line:
+    {"cmd": "...", "args": {...}} -> {"ok": true, "result": ...} | {"ok": false, "status": ..., "detail": ...}
+    Handler exceptions carrying `status_code` / `detail` (e.g. HTTPException) are passed through.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    handler = handlers.get(request.get("cmd"))
+                    if handler is None:
+                        raise CommandError(404, f"Unknown command: {request.get('cmd')}")
+                    response = {"ok": True, "result": await handler(request.get("args") or {})}
+                except Exception as e:
+                    response = {"ok": False, "status": getattr(e, "status_code", 500),
+                                "detail": str(getattr(e, "detail", e))}
+                writer.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)  # Stale socket from a previous run
+    return await asyncio.start_unix_server(handle, path=path)
+
+
+async def send_command(path: str, cmd: str, args: Optional[dict] = None, timeout: float = 5.0) -> Any:
+    """Forward a command to the trading process. Raises CommandError on failure."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(path, limit=RESPONSE_LIMIT), timeout)
+    except (OSError, asyncio.TimeoutError):
+        raise CommandError(503, "Trading process unavailable")
+    try:
+        writer.write(json.dumps({"cmd": cmd, "args": args or {}}).encode("utf-8") + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    except asyncio.TimeoutError:
+        raise CommandError(504, "Trading process did not answer")
+    finally:
+        writer.close()
+    if not line:
+        raise CommandError(503, "Trading process closed the connection")
+    response = json.loads(line)
+    if not response["ok"]:
+        raise CommandError(response["status"], response["detail"])
+    return response["result"]
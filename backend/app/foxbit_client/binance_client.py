@@ -1,5 +1,6 @@
 
 import logging
+import os
 import requests
 import time
 import hmac
@@ -7,6 +8,8 @@ import hashlib
 from typing import Dict, Any, Optional
 from urllib.parse import urljoin, urlencode
 
+from .governor import governor
+
 logger = logging.getLogger(__name__)
 
 class BinanceClient:
@@ -14,7 +17,8 @@ class BinanceClient:
     Client for interacting with the Binance API (Spot).
     Handles authentication (HMAC SHA256) and order execution.
     """
-    BASE_URL = "https://api.binance.com/api/v3/"
+    BASE_URL = os.getenv("BINANCE_BASE_URL", "https://api.binance.com/api/v3/")
+    TIMESTAMP_ERROR = -1021  # Timestamp outside recvWindow
 
     def __init__(self, api_key: str, api_secret: str):
         self.api_key = api_key
@@ -23,6 +27,22 @@ class BinanceClient:
         self.session.headers.update({
             "X-MBX-APIKEY": self.api_key
         })
+        # Keyed HMAC state is built once; each signature copies it instead of re-deriving the key
+        self._hmac = hmac.new(self.api_secret.encode('utf-8'), digestmod=hashlib.sha256)
+        self.time_offset_ms = 0  # serverTime - local clock, see sync_time()
+        self.recv_window = int(os.getenv("BINANCE_RECV_WINDOW", "5000"))
+
+    def sync_time(self) -> int:
+        """
+        Measure the server clock offset (midpoint of the round trip) used for signed timestamps.
+        Also opens the keep-alive connection, so the first order does not pay for TCP/TLS setup.
+        """
+        sent = time.time() * 1000
+        server_time = self._request("GET", "time")["serverTime"]
+        received = time.time() * 1000
+        self.time_offset_ms = int(server_time - (sent + received) / 2)
+        logger.info(f"⏱️ Binance clock offset: {self.time_offset_ms}ms (RTT {received - sent:.0f}ms)")
+        return self.time_offset_ms
 
     def _sign_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -31,50 +51,86 @@ class BinanceClient:
         if params is None:
             params = {}
         
-        # 1. Add Timestamp
-        params['timestamp'] = int(time.time() * 1000)
+        # 1. Add Timestamp (server clock)
+        params['timestamp'] = int(time.time() * 1000) + self.time_offset_ms
+        params.setdefault('recvWindow', self.recv_window)
         
         # 2. Generate Signature
         query_string = urlencode(params)
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        mac = self._hmac.copy()
+        mac.update(query_string.encode('utf-8'))
+        signature = mac.hexdigest()
         
         params['signature'] = signature
         return params
 
     def _request(self, method: str, endpoint: str, params: Optional[Dict] = None, signed: bool = False, max_retries: int = 3) -> Dict[str, Any]:
+        """
+        All calls go through the shared rate-limit governor (weight + priority per endpoint).
+        Unsigned GETs with identical parameters are coalesced into one in-flight request.
+        """
+        if method == "GET" and not signed:
+            key = (method, endpoint, tuple(sorted((params or {}).items())))
+            return governor.coalesce(key, lambda: self._send(method, endpoint, params, signed, max_retries))
+        return self._send(method, endpoint, params, signed, max_retries)
+
+    def _send(self, method: str, endpoint: str, params: Optional[Dict], signed: bool, max_retries: int) -> Dict[str, Any]:
         url = urljoin(self.BASE_URL, endpoint)
+        weight, priority = governor.cost(endpoint)
+        # Orders are only resent when the exchange provably rejected them (429 / stale timestamp):
+        # after a network error or 5xx they may have been accepted
+        attempts = max_retries if method == "GET" else 2
         retry_delay = 1
-        
-        if signed:
-            params = self._sign_request(params or {})
 
-        for attempt in range(max_retries):
+        for attempt in range(attempts):
+            governor.acquire(weight, priority)
             try:
-                response = self.session.request(method, url, params=params, timeout=10)
-                
-                # Handle Binance Errors
-                if response.status_code >= 400:
-                    logger.error(f"Binance API Error ({response.status_code}): {response.text}")
-                    response.raise_for_status()
-                
-                return response.json()
-            
+                request_params = self._sign_request(dict(params or {})) if signed else params
+                response = self.session.request(method, url, params=request_params, timeout=10)
             except requests.exceptions.RequestException as e:
                 logger.error(f"Error calling {endpoint}: {e}")
-                if attempt == max_retries - 1:
+                if attempt == attempts - 1 or method != "GET":
                     raise
                 time.sleep(retry_delay)
                 retry_delay *= 2
+                continue
+
+            retry_after = governor.observe(response.status_code, response.headers)
+            if retry_after is not None:
+                # The governor now blocks every caller until the ban window passes
+                if attempt == attempts - 1:
+                    response.raise_for_status()
+                continue
+
+            # Clock drifted past recvWindow: the request was rejected, so resync and resend is safe
+            if signed and response.status_code == 400 and self._error_code(response) == self.TIMESTAMP_ERROR and attempt < attempts - 1:
+                logger.warning("⏱️ Timestamp rejected by Binance. Resyncing clock offset.")
+                self.sync_time()
+                continue
+
+            # Handle Binance Errors (4xx are our fault: retrying will not help)
+            if response.status_code >= 400:
+                logger.error(f"Binance API Error ({response.status_code}): {response.text}")
+                if response.status_code < 500 or attempt == attempts - 1 or method != "GET":
+                    response.raise_for_status()
+                time.sleep(retry_delay)
+                retry_delay *= 2
+                continue
+
+            return response.json()
         return {}
 
+    @staticmethod
+    def _error_code(response) -> Optional[int]:
+        try:
+            return response.json().get("code")
+        except ValueError:
+            return None
+
     def get_account_info(self) -> Dict[str, Any]:
         """
         Fetch account balances and status.
-        Weight: 10
+        Weight: 20
         """
         return self._request("GET", "account", signed=True)
 
@@ -82,12 +138,17 @@ class BinanceClient:
         """
         Helper to get free balance of a specific asset.
         """
-        info = self.get_account_info()
-        balances = info.get("balances", [])
-        for b in balances:
-            if b["asset"] == asset.upper():
-                return float(b["free"])
-        return 0.0
+        return self.get_balances(asset)[asset.upper()]
+
+    def get_balances(self, *assets: str) -> Dict[str, float]:
+        """
+        Free balances of several assets from a single account call.
+        """
+        wanted = {a.upper(): 0.0 for a in assets}
+        for b in self.get_account_info().get("balances", []):
+            if b["asset"] in wanted:
+                wanted[b["asset"]] = float(b["free"])
+        return wanted
 
     def get_symbol_price(self, symbol: str = "BTCBRL") -> float:
         """
@@ -106,14 +167,17 @@ class BinanceClient:
             return symbols[0]
         return {}
 
-    def get_my_trades(self, symbol: str, limit: int = 50) -> list:
+    def get_my_trades(self, symbol: str, limit: int = 50, from_id: Optional[int] = None) -> list:
         """
         Get trade history (myTrades).
+        With from_id, returns fills with id >= from_id in ascending order (max limit 1000).
         """
         params = {
             "symbol": symbol.upper(),
             "limit": limit
         }
+        if from_id is not None:
+            params["fromId"] = from_id
         return self._request("GET", "myTrades", params=params, signed=True)
 
     def create_order(self, symbol: str, side: str, quantity: float, type: str = "MARKET") -> Dict[str, Any]:
@@ -129,7 +193,8 @@ class BinanceClient:
             "symbol": symbol.upper(),
             "side": side.upper(),
             "type": type.upper(),
-            "quantity": qty_str
+            "quantity": qty_str,
+            "newOrderRespType": "FULL"  # Fills + commissions in the ack: no follow-up queries needed
         }
         
         logger.info(f"🚀 BINANCE EXECUTION: Placing {side} {qty_str} {symbol} @ {type}")
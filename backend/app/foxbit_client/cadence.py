@@ -0,0 +1,106 @@
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .governor import governor
+
+MARKET_POLL_MIN = float(os.getenv("MARKET_POLL_MIN", "2"))  # Fastest ticker poll (seconds)
+MARKET_POLL_MAX = float(os.getenv("MARKET_POLL_MAX", "15"))  # Slowest poll; keep under the trading loop's 20s staleness cutoff
+MARKET_POLL_BUDGET = float(os.getenv("MARKET_POLL_BUDGET", "30"))  # Max ticker polls per minute
+MOVE_PER_POLL = float(os.getenv("MOVE_PER_POLL", "0.0005"))  # Expected price move (0.05%) between polls in normal markets
+VOL_HALFLIFE = 300.0  # Seconds for realized volatility to decay halfway
+WARMUP_SAMPLES = 5
+LOW_HEADROOM = 0.5  # Below this share of the exchange budget left, polls are stretched proportionally
+
+
+class PollScheduler:
+    """
+    Ticker poll cadence. Realized volatility (time-decayed EWMA of squared log returns per
+    second) sets the interval at which the expected move between polls is `move_per_poll`;
+    near a decision level (distance from `next_interval`) polls come fast enough that the
+    expected move is half the remaining distance. The result is floored by the poll budget,
+    stretched when the shared rate-limit governor runs low, and clamped to [min, max].
+    """
+    def __init__(self, base: float = 10.0, min_interval: float = MARKET_POLL_MIN, max_interval: float = MARKET_POLL_MAX,
+                 budget_per_min: float = MARKET_POLL_BUDGET, move_per_poll: float = MOVE_PER_POLL,
+                 headroom: Callable[[], float] = governor.headroom):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.budget_per_min = budget_per_min
+        self.move_per_poll = move_per_poll
+        self.headroom = headroom
+        self.variance = 0.0  # Per second
+        self.samples = 0
+        self.last_price = 0.0
+        self.last_at = 0.0
+        self.polls: deque = deque()  # Poll timestamps of the last minute
+        self.interval = base
+        self.reason = "warmup"
+        self.distance: Optional[float] = None
+
+    def record_poll(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.polls.append(now)
+        while self.polls and self.polls[0] <= now - 60:
+            self.polls.popleft()
+
+    def observe(self, price: float, now: Optional[float] = None):
+        """Feed a polled price into the volatility estimate."""
+        now = time.time() if now is None else now
+        if self.last_price > 0 and price > 0 and now > self.last_at:
+            dt = now - self.last_at
+            weight = 1 - math.exp(-dt * math.log(2) / VOL_HALFLIFE)
+            self.variance += weight * (math.log(price / self.last_price) ** 2 / dt - self.variance)
+            self.samples += 1
+        self.last_price, self.last_at = price, now
+
+    @property
+    def volatility(self) -> float:
+        """Realized volatility per sqrt(second)."""
+        return math.sqrt(self.variance)
+
+    def next_interval(self, distance: Optional[float] = None) -> float:
+        """Seconds until the next poll; `distance` is the relative gap to the nearest decision level."""
+        self.distance = distance
+        sigma = self.volatility
+        if self.samples < WARMUP_SAMPLES:
+            interval, reason = self.base, "warmup"
+        elif sigma <= 0:
+            interval, reason = self.max_interval, "quiet"
+        else:
+            interval, reason = (self.move_per_poll / sigma) ** 2, "volatility"
+            if distance is not None:
+                near = (abs(distance) / (2 * sigma)) ** 2
+                if near < interval:
+                    interval, reason = near, "threshold"
+            if interval >= self.max_interval:
+                reason = "quiet"
+
+        floor = 60.0 / self.budget_per_min if self.budget_per_min > 0 else 0.0
+        headroom = self.headroom()
+        if headroom < LOW_HEADROOM:
+            floor = self.max_interval if headroom <= 0 else floor * LOW_HEADROOM / headroom
+        if interval < floor:
+            interval, reason = floor, "budget"
+
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+        self.reason = reason
+        return self.interval
+
+    @property
+    def polls_per_min(self) -> int:
+        """Effective tick rate: polls started in the last minute."""
+        return len(self.polls)
+
+    def stats(self) -> dict:
+        return {
+            "interval_s": round(self.interval, 2),
+            "reason": self.reason,
+            "polls_per_min": self.polls_per_min,
+            "budget_per_min": self.budget_per_min,
+            "volatility_per_min": round(self.volatility * math.sqrt(60), 6),
+            "threshold_distance": round(self.distance, 6) if self.distance is not None else None,
+        }
@@ -1,11 +1,18 @@
 import logging
+import os
 import requests
 import time
 from typing import Dict, Any, Optional
 from urllib.parse import urljoin
 
+from .governor import governor
+
 logger = logging.getLogger(__name__)
 
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL", "https://api.binance.com/api/v3/")
+BINANCE_TICKER_URL = urljoin(BINANCE_BASE_URL, "ticker/price")
+MERCADO_BITCOIN_URL = os.getenv("MERCADO_BITCOIN_URL", "https://www.mercadobitcoin.net/api/")
+
 class FoxbitClient:
     """
     Client for interacting with the Foxbit API.
@@ -51,10 +58,9 @@ class FoxbitClient:
         # 1. Try Binance (Reference Global / BTCBRL)
         try:
             symbol_upper = market_symbol.upper() # btcbrl -> BTCBRL
-            url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol_upper}"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
+            # Shares the Binance weight budget with the authenticated client; concurrent pollers share one call
+            data = governor.coalesce(("GET", "ticker/price", symbol_upper), lambda: self._binance_price(symbol_upper))
+            if data is not None:
                 return {
                     "last": float(data['price']),
                     "market_symbol": market_symbol,
@@ -67,6 +73,15 @@ class FoxbitClient:
         # 2. Try Mercado Bitcoin (Fallback)
         return self._get_fallback_ticker(market_symbol)
 
+    def _binance_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        weight, priority = governor.cost("ticker/price")
+        governor.acquire(weight, priority, timeout=5)
+        response = requests.get(BINANCE_TICKER_URL, params={"symbol": symbol}, timeout=5)
+        governor.observe(response.status_code, response.headers)
+        if response.status_code == 200:
+            return response.json()
+        return None
+
     def _get_fallback_ticker(self, market_symbol: str) -> Optional[Dict[str, Any]]:
         """
         Fallback to Mercado Bitcoin public API for BTC/BRL price.
@@ -75,7 +90,7 @@ class FoxbitClient:
         try:
             # Pair symbol mapping (btcbrl -> BTC)
             coin = market_symbol[:3].upper()
-            url = f"https://www.mercadobitcoin.net/api/{coin}/ticker/"
+            url = urljoin(MERCADO_BITCOIN_URL, f"{coin}/ticker/")
             response = requests.get(url, timeout=5)
             response.raise_for_status()
             data = response.json()
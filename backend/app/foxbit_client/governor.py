@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower = more important)
+PRIORITY_ORDER = 0
+PRIORITY_MARKET_DATA = 1
+PRIORITY_ACCOUNT = 2
+PRIORITY_HISTORY = 3
+
+# Binance spot REQUEST_WEIGHT per endpoint and the priority class it belongs to
+ENDPOINTS: Dict[str, Tuple[int, int]] = {
+    "order": (1, PRIORITY_ORDER),
+    "time": (1, PRIORITY_MARKET_DATA),
+    "ticker/price": (2, PRIORITY_MARKET_DATA),
+    "account": (20, PRIORITY_ACCOUNT),
+    "exchangeInfo": (20, PRIORITY_ACCOUNT),
+    "myTrades": (20, PRIORITY_HISTORY),
+}
+DEFAULT_COST = (5, PRIORITY_ACCOUNT)
+
+# Share of the bucket each priority must leave untouched for more important requests
+RESERVE = {PRIORITY_ORDER: 0.0, PRIORITY_MARKET_DATA: 0.10, PRIORITY_ACCOUNT: 0.25, PRIORITY_HISTORY: 0.40}
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class _InFlight:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class RateLimitGovernor:
+    """
+    Process-wide request-weight governor shared by every exchange client.
+    - Token bucket of `limit` weight per minute, refilled continuously and re-synced from
+      X-MBX-USED-WEIGHT-1M response headers.
+    - Priorities: lower classes must leave a reserve, so orders are never starved by syncs.
+    - 429/418 responses (Retry-After) block all callers until the ban window passes.
+    - Identical in-flight GETs are coalesced into a single request.
+    Clients are synchronous (run in executor threads), so waiting is done with a Condition.
+    """
+    def __init__(self, limit: int = 6000, window: float = 60.0):
+        self.limit = limit
+        self.rate = limit / window  # Weight refilled per second
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.used_weight_header: Optional[int] = None
+        self._cond = threading.Condition()
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self.counters = {"requests": 0, "coalesced": 0, "waits": 0, "throttled": 0}
+
+    @staticmethod
+    def cost(endpoint: str) -> Tuple[int, int]:
+        return ENDPOINTS.get(endpoint, DEFAULT_COST)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight: int, priority: int = PRIORITY_ACCOUNT, timeout: float = 30.0):
+        """Block until `weight` can be spent at `priority`. Raises RateLimitExceeded on timeout."""
+        deadline = time.monotonic() + timeout
+        reserve = self.limit * RESERVE.get(priority, RESERVE[PRIORITY_HISTORY])
+        with self._cond:
+            waited = False
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens - weight >= reserve:
+                    self.tokens -= weight
+                    self.counters["requests"] += 1
+                    if waited:
+                        self.counters["waits"] += 1
+                    return
+                if now >= deadline:
+                    raise RateLimitExceeded(f"No request budget for weight {weight} (priority {priority})")
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    delay = (weight + reserve - self.tokens) / self.rate
+                waited = True
+                self._cond.wait(min(delay, deadline - now))
+
+    def observe(self, status_code: int, headers) -> Optional[float]:
+        """
+        Sync the bucket from response headers. Returns the Retry-After delay (seconds)
+        when the exchange throttled us (429) or banned the IP (418), else None.
+        """
+        with self._cond:
+            used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+            if used is not None:
+                self.used_weight_header = int(used)
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, float(self.limit - self.used_weight_header))
+
+            if status_code in (418, 429):
+                retry_after = float(headers.get("Retry-After") or (120 if status_code == 418 else 60))
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                self.tokens = 0.0
+                self.counters["throttled"] += 1
+                logger.warning(f"⛔ Exchange rate limit hit ({status_code}). Pausing requests for {retry_after:.0f}s")
+                self._cond.notify_all()
+                return retry_after
+        return None
+
+    def coalesce(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn` once for concurrent callers with the same key; everyone gets the same result."""
+        with self._cond:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                flight.waiters += 1
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def headroom(self) -> float:
+        """Fraction of the per-minute budget currently available (0..1)."""
+        with self._cond:
+            self._refill(time.monotonic())
+            if time.monotonic() < self.blocked_until:
+                return 0.0
+            return max(0.0, self.tokens / self.limit)
+
+    def stats(self) -> dict:
+        headroom = self.headroom()
+        return {
+            "limit_per_min": self.limit,
+            "headroom": round(headroom, 3),
+            "used_weight_1m": self.used_weight_header,
+            "blocked_for_s": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            **self.counters,
+        }
+
+
+governor = RateLimitGovernor()
@@ -1,17 +1,34 @@
 import time
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+_import_started = time.perf_counter()
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Query, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import logging
 import asyncio
+import hmac
+from datetime import timezone
 
-from .storage import models, database
+from .storage import models, database, analytics, repository, export
+from .storage.ticks import TickRecorder
 from .foxbit_client.client import FoxbitClient
+from .foxbit_client.governor import governor
+from .foxbit_client.cadence import PollScheduler
 from .paper_broker.broker import PaperBroker, Order
 from .paper_broker.real_broker import RealBroker
+from .paper_broker.accounts import AccountBook
 from .risk_engine.engine import RiskEngine, TradeRisk
+from .strategies import live as strategies
+from .backtest.jobs import JobQueue, QueueFull
+from .observability.equity import EquitySeries
+from .observability.logs import LogStore, LEVELS, StoreHandler, normalize_level, start_file_sink
+from .observability.latency import LatencyStats
+from .observability.profiler import SamplingProfiler, PhaseTimer, collapse
+from .core.checkpoint import StrategyCheckpoint, save_checkpoint, load_checkpoint
+from .core.state_bus import StateBusWriter, StateBusReader, CommandError, serve_commands, send_command
 import os
 
 # Setup Logging
@@ -35,22 +52,51 @@ get_db = database.get_db
 # Global State (In-memory for V1 simplicity of the simulation loop)
 class GlobalSystemState:
     is_running = False
-    broker = None # Initialized in __init__
+    broker = None # Initialized in init_broker (background warmup)
     risk_engine = RiskEngine(TradeRisk())
     client = FoxbitClient()
-    active_strategy = "StrategyA"
-    logs: List[str] = [] # Last 50 logs
+    active_strategy = os.getenv("ACTIVE_STRATEGY", "StrategyA")
     last_price: float = 0.0
     last_update: float = 0.0
     health_metrics: dict = {}
     fatal_error: Optional[str] = None
-    entry_price: float = 0.0 # Track average entry price
 
     def __init__(self):
         self.health_metrics = {}
         self.fatal_error = None
-        
-        # Initialize Broker based on Mode
+        self.ready = False # Set once broker init + DB restore have finished (see warmup)
+        self.equity = EquitySeries() # Equity curve (raw ring + 1m/1h rollups)
+        self.ticks = TickRecorder() # Polled prices, bulk-written with the equity flush
+        self.accounts = AccountBook() # Per-user paper accounts, ticked in vectorized batches
+        self.poll_scheduler = PollScheduler(base=float(os.getenv("MARKET_POLL_INTERVAL", "10"))) # Ticker poll cadence
+        self.log_store = LogStore(capacity=int(os.getenv("LOG_RETENTION", "100000")))
+        self.log_sink = None # Rotating file sink listener, started on startup
+        self.log_handler = None # Feeds module loggers into log_store, attached on startup
+        self.price_history: List[float] = [] # Indicator buffer (survives stop/start, checkpointed)
+        self.last_price_tick = 0.0 # When price_history last received a price
+        self.last_trade_time = 0.0 # Strategy cooldown reference
+        self.trading_task = None
+        self.strategy_book = None # Primary + shadow strategies (built when trading starts)
+        self.protective_orders: List[Order] = [] # Resting OCO exit (take profit / stop) of the open paper position
+        self.order_latency = LatencyStats() # Signal -> exchange/broker ack
+        self.profiler = SamplingProfiler()
+        self.loop_timer = PhaseTimer() # Per-phase trading_loop timing (opt-in, see /api/admin/loop-timing)
+        self.loop_timer.enable(os.getenv("LOOP_TIMING", "0") == "1")
+        self.bus_writer = None # APP_ROLE=trader: publishes snapshots for API workers
+        self.bus_reader = None # APP_ROLE=api: reads them
+        self.command_server = None
+        self.backtests = JobQueue() # Research jobs on a capped, niced process pool
+
+    @property
+    def entry_price(self) -> float:
+        """Average entry of the open position, from the broker's lot ledger (0 when flat)."""
+        ledger = getattr(self.broker, "ledger", None)
+        if ledger is None or self.broker.holdings <= strategies.MIN_HOLDINGS:
+            return 0.0
+        return ledger.avg_price
+
+    def init_broker(self):
+        """Build the broker for TRADING_MODE. Blocking (DB / Binance calls): run it in an executor."""
         mode = os.getenv("TRADING_MODE", "PAPER").upper()
         if mode == "LIVE":
              logger.warning("🚨 SYSTEM STARTING IN LIVE TRADING MODE (BINANCE) 🚨")
@@ -64,71 +110,224 @@ class GlobalSystemState:
              logger.info("ℹ️ System starting in PAPER TRADING mode.")
              self.broker = PaperBroker(initial_balance=120.0)
 
-    def log(self, message: str, level: str = "INFO"):
-        """Add log message to in-memory list"""
-        timestamp = time.strftime("%H:%M:%S")
-        entry = f"[{timestamp}] [{level}] {message}"
-        self.logs.insert(0, entry) # Prepend
-        if len(self.logs) > 50:
-            self.logs.pop() # Keep size fixed
-        # Also print to stdout
-        if level == "ERROR" or level == "CRITICAL":
-            logger.error(message)
-        else:
-            logger.info(message)
+    def log(self, message: str, level: str = "INFO", component: str = "bot", **fields):
+        """Add a structured record to the log store (and stdout / file sink)"""
+        self.log_store.append(level, message, component, fields)
+        logger.log(LEVELS.get(normalize_level(level), logging.INFO), message, extra={"in_store": True})
 
 state = GlobalSystemState()
+IMPORT_MS = (time.perf_counter() - _import_started) * 1000
+STARTUP_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "1500"))
 
-@app.on_event("startup")
-def startup_event():
+MARKET_POLL_INTERVAL = float(os.getenv("MARKET_POLL_INTERVAL", "10")) # Seconds between ticker polls (fixed mode / warmup)
+MARKET_POLL_ADAPTIVE = os.getenv("MARKET_POLL_ADAPTIVE", "1") == "1" # Volatility / threshold driven cadence (see PollScheduler)
+FEED_LOG_INTERVAL = 120 # Seconds between price feed status logs
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "checkpoint.bin")
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", "15")) # Seconds between checkpoints
+CHECKPOINT_MAX_AGE = float(os.getenv("CHECKPOINT_MAX_AGE", "300")) # Older indicator buffers are discarded
+
+# Process roles: "all" (single process), "trader" (trading loops + state bus publisher + command socket)
+# or "api" (stateless worker, any number of them: reads the state bus, forwards commands to the trader)
+APP_ROLE = os.getenv("APP_ROLE", "all").lower()
+STATE_BUS_NAME = os.getenv("STATE_BUS_NAME", "bitcompra_state")
+STATE_BUS_SIZE = int(os.getenv("STATE_BUS_SIZE", str(1 << 20)))
+STATE_BUS_INTERVAL = float(os.getenv("STATE_BUS_INTERVAL", "0.5")) # Seconds between snapshots
+COMMAND_SOCKET = os.getenv("COMMAND_SOCKET", "/tmp/bitcompra_trader.sock")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") # Admin endpoints are disabled unless set
+BACKTEST_DATA_DIR = os.getenv("BACKTEST_DATA_DIR", "data") # OHLCV CSVs backtest jobs may read
+SHADOW_STRATEGIES = os.getenv("SHADOW_STRATEGIES", "default") # "default" (50 SMA variants), "none" or JSON list
+PROTECTIVE_STOP = os.getenv("PROTECTIVE_STOP", "stop").lower() # Resting exit after paper buys: "stop", "trailing" or "none"
+ACCOUNTS_FLUSH_INTERVAL = float(os.getenv("ACCOUNTS_FLUSH_INTERVAL", "30")) # Seconds between bulk account writes
+
+def build_checkpoint() -> StrategyCheckpoint:
+    return StrategyCheckpoint(
+        saved_at=time.time(),
+        prices=list(state.price_history),
+        last_price_tick=state.last_price_tick,
+        last_trade_time=state.last_trade_time,
+        risk=state.risk_engine.snapshot(),
+    )
+
+CONFIG_KEYS = ("max_position_size_pct", "stop_loss_pct", "max_drawdown_limit", "active_strategy")
+
+def config_values() -> dict:
+    risk = state.risk_engine.config
+    return {"max_position_size_pct": risk.max_position_size_pct, "stop_loss_pct": risk.stop_loss_pct,
+            "max_drawdown_limit": risk.max_drawdown_limit, "active_strategy": state.active_strategy}
+
+def parse_config(saved: dict) -> dict:
+    """Stored strings -> typed values, dropping keys that were never saved."""
+    return {key: value if key == "active_strategy" else float(value)
+            for key, value in saved.items() if value is not None}
+
+def restore_config(saved: dict, last_trade: Optional[dict]):
+    """Settings from the last /api/config update; cooldown reference from the last trade when no checkpoint set it."""
+    values = parse_config(saved)
+    strategy = values.pop("active_strategy", None)
+    for key, value in values.items():
+        setattr(state.risk_engine.config, key, value)
+    if strategy:
+        state.active_strategy = strategy
+    if not state.last_trade_time and last_trade and last_trade["entered_at"]:
+        state.last_trade_time = last_trade["entered_at"].replace(tzinfo=timezone.utc).timestamp()
+
+def apply_checkpoint(ckpt: Optional[StrategyCheckpoint]):
+    """Resume strategy state. Indicator buffers are only trusted if recent enough."""
+    if ckpt is None:
+        return
+    age = time.time() - ckpt.last_price_tick
+    if age <= CHECKPOINT_MAX_AGE:
+        state.price_history = ckpt.prices
+        state.last_price_tick = ckpt.last_price_tick
+    else:
+        logger.warning(f"⚠️ Checkpoint indicator buffer is stale ({age:.0f}s old). Warming up from scratch.")
+
+    # Absolute timestamps / counters stay valid regardless of age
+    state.last_trade_time = ckpt.last_trade_time
+    state.risk_engine.restore(ckpt.risk)
+    if state.risk_engine.kill_switch_active:
+        logger.warning("⚠️ Kill switch was active at checkpoint time and remains engaged.")
+
+    state.health_metrics["checkpoint"] = {"restored_prices": len(state.price_history), "age_s": round(age, 1)}
+    logger.info(f"🔄 Checkpoint restored: {len(state.price_history)} prices, cooldown ref {ckpt.last_trade_time:.0f}")
+
+def prepare_schema():
+    """Create tables / missing indexes and backfill PnL aggregates for pre-existing trades (blocking)."""
     models.Base.metadata.create_all(bind=database.engine)
-    
-    # Restore State from DB
+    analytics.ensure_indexes(database.engine)
+    db = database.SessionLocal()
     try:
-        db = database.SessionLocal()
-        last_trade = db.query(models.Trade).order_by(models.Trade.entered_at.desc()).first()
-        if last_trade and last_trade.side == "buy" and last_trade.status == "filled":
-             # Restore Holdings and Entry Price
-             qty = float(last_trade.quantity)
-             entry = float(last_trade.entry_price)
-             cost = qty * entry
-             
-             state.entry_price = entry
-
-             # Handling Logic based on Mode
-             if isinstance(state.broker, RealBroker):
-                 # LIVE MODE: Trust the Broker (Binance) for Balance/Holdings.
-                 # Only restore Entry Price if we actually hold BTC.
-                 if state.broker.holdings > 0:
-                      logger.info(f"🔄 LIVE State Restored: Resuming Real Long Position. Entry: {entry} | Holdings: {state.broker.holdings} (Binance)")
-                 else:
-                      logger.warning(f"⚠️ State Mismatch: DB says bought at {entry}, but Binance Holdings are 0. Assuming FLAT.")
-                      state.entry_price = 0.0 # Reset entry price as we have no position
-             else:
-                 # PAPER MODE: Restore Virtual State
-                 state.broker.holdings = qty
-                 # Fix Balance Mismatch: If balance is "Full" (e.g. 126) but we should be invested, deduct cost.
-                 if state.broker.balance > (cost * 0.5):
-                     state.broker.balance -= cost
-                     logger.warning(f"⚠️ Adjusted Balance: Deducted {cost:.2f} BRL to match Open Position.")
-                 logger.info(f"🔄 PAPER State Restored: Resuming Virtual Position. Entry: {entry} | Qty: {qty} | Bal: {state.broker.balance:.2f}")
-        else:
-             if last_trade:
-                 logger.info(f"ℹ️ State Restoration Skipped: Last trade {last_trade.side} ({last_trade.status})")
-             else:
-                 logger.info("ℹ️ State Restoration Skipped: No trades found in DB.")
+        if db.query(models.PnlSummary).first() is None and db.query(models.Trade).first() is not None:
+            analytics.rebuild(db, fee_pct=0.005) # PaperBroker default fee
+    except Exception as e:
+        logger.error(f"Failed to backfill PnL analytics: {e}")
+        db.rollback()
+    finally:
         db.close()
+
+def log_position():
+    """The broker rebuilt its ledger (snapshot + fills since) while initializing."""
+    ledger = getattr(state.broker, "ledger", None)
+    if ledger is None:
+        return
+    if state.broker.holdings > strategies.MIN_HOLDINGS:
+        logger.info(f"🔄 Position restored: {state.broker.holdings} BTC | avg entry {ledger.avg_price:.2f} over {len(ledger.lots)} lot(s) | realized PnL {ledger.realized_pnl:.2f}")
+    else:
+        logger.info(f"ℹ️ No open position | realized PnL {ledger.realized_pnl:.2f} over {ledger.fills} fills")
+
+async def warmup():
+    """
+    Background initialization: schema, broker and DB restore.
+    Broker init (Binance sync in LIVE mode) and DB reads run concurrently in the executor
+    while the API is already serving.
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    state.health_metrics["startup"] = {"ready": False, "phase": "warming", "import_ms": round(IMPORT_MS, 1)}
+    try:
+        await loop.run_in_executor(None, prepare_schema)
+        _, equity_rows, ckpt, _, saved_config, last_trade = await asyncio.gather(
+            loop.run_in_executor(None, state.init_broker),
+            loop.run_in_executor(None, state.equity.read),
+            loop.run_in_executor(None, load_checkpoint, CHECKPOINT_PATH),
+            loop.run_in_executor(None, state.accounts.load),
+            repository.get_configs(*CONFIG_KEYS),
+            repository.last_trade(),
+        )
+        state.equity.restore(equity_rows) # On the loop: market_data_loop records into the same columns
+        log_position()
+        apply_checkpoint(ckpt)
+        restore_config(saved_config, last_trade)
     except Exception as e:
         logger.error(f"Failed to restore state: {e}")
+        if state.broker is None:
+            state.fatal_error = f"STARTUP: {e}"
+            state.health_metrics["startup"]["phase"] = "failed"
+            return
 
-    # Start Market Data Loop
+    warmup_ms = (time.perf_counter() - started) * 1000
+    state.ready = True
+    state.health_metrics["startup"].update({"ready": True, "phase": "ready", "warmup_ms": round(warmup_ms, 1)})
+    logger.info(f"✅ Warmup complete in {warmup_ms:.0f}ms (import {IMPORT_MS:.0f}ms)")
+
+@app.on_event("startup")
+async def startup_event():
+    if APP_ROLE == "api":
+        # Stateless worker: no broker, loops or file sink; state comes from the trading process
+        state.bus_reader = StateBusReader(STATE_BUS_NAME)
+        logger.info(f"ℹ️ API worker reading state bus '{STATE_BUS_NAME}'")
+        return
+
+    log_file = os.getenv("LOG_FILE", "logs/backend.log")
+    if log_file and state.log_sink is None:
+        state.log_sink = start_file_sink(log_file)
+    if state.log_handler is None:
+        state.log_handler = StoreHandler(state.log_store, LEVELS.get(normalize_level(os.getenv("LOG_STORE_LEVEL", "INFO")), logging.INFO))
+        logging.getLogger().addHandler(state.log_handler)
+
+    if IMPORT_MS > STARTUP_TARGET_MS:
+        logger.warning(f"⚠️ Cold import took {IMPORT_MS:.0f}ms (target {STARTUP_TARGET_MS:.0f}ms)")
+
+    # Serve immediately; broker / DB restore and the price feed start in the background
+    asyncio.create_task(warmup())
     asyncio.create_task(market_data_loop())
+    asyncio.create_task(accounts_loop())
+
+    if APP_ROLE == "trader":
+        state.bus_writer = StateBusWriter(STATE_BUS_NAME, STATE_BUS_SIZE)
+        state.command_server = await serve_commands(COMMAND_SOCKET, COMMANDS)
+        asyncio.create_task(state_bus_loop())
+        logger.info(f"📡 Publishing state on '{STATE_BUS_NAME}', commands on {COMMAND_SOCKET}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if state.command_server:
+        state.command_server.close()
+    if state.bus_writer:
+        state.bus_writer.close()
+    if state.bus_reader:
+        state.bus_reader.close()
+    state.backtests.shutdown()
+    if APP_ROLE != "api":
+        await asyncio.get_running_loop().run_in_executor(None, state.ticks.flush)
+        await asyncio.get_running_loop().run_in_executor(None, state.equity.flush) # Closed rollups not yet written
+        await asyncio.get_running_loop().run_in_executor(None, state.accounts.write, *state.accounts.pending_rows())
+    await database.dispose_async_engine()
+    if state.log_sink:
+        state.log_sink.stop() # Drain queued records to disk
 
 # --- API Models ---
 class ConfigUpdate(BaseModel):
     max_position_size_pct: float
     stop_loss_pct: float
     max_drawdown_limit: float
+    active_strategy: Optional[str] = None
+
+class BacktestConfigIn(BaseModel):
+    strategy: str
+    params: dict = {}
+
+class BacktestRequest(BaseModel):
+    configs: List[BacktestConfigIn] = Field(..., min_length=1, max_length=500)
+    start: str = "2023-01-01"
+    end: str = "2023-12-01"
+    data: Optional[str] = None # CSV file name inside BACKTEST_DATA_DIR (synthetic bars when omitted)
+    cash: float = 10000.0
+    commission: float = 0.005
+
+class AccountCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=64)
+    balance: float = Field(10000.0, gt=0)
+    max_position_size_pct: float = Field(0.80, gt=0, le=1)
+    stop_loss_pct: float = Field(0.05, gt=0, lt=1)
+    max_drawdown_limit: float = Field(0.30, gt=0, le=1)
+
+class AccountOrder(BaseModel):
+    side: str = Field(..., pattern="^(buy|sell)$")
+    type: str = Field("market", pattern="^(market|limit|stop)$")
+    quantity: float = Field(..., gt=0)
+    price: float = Field(0.0, ge=0) # Limit / stop price
 
 class OrderRequest(BaseModel):
     symbol: str
@@ -142,25 +341,111 @@ class OrderRequest(BaseModel):
 async def read_root():
     return {"status": "ok", "service": "Crypto Paper Trader"}
 
-@app.get("/api/status")
-async def get_status():
+def build_status() -> dict:
+    broker = state.broker # None while warming up
+    balance = broker.balance if broker else 0.0
+    holdings = broker.holdings if broker else 0.0
     return {
         "running": state.is_running,
-        "balance": state.broker.balance,
-        "holdings": state.broker.holdings,
-        "orders": len(state.broker.orders),
+        "ready": state.ready,
+        "balance": balance,
+        "holdings": holdings,
+        "orders": len(broker.orders) if broker else 0,
         "kill_switch": state.risk_engine.kill_switch_active,
-        "logs": state.logs[:5],
+        "logs": state.log_store.tail(5),
         "current_price": state.last_price,
-        "total_equity": state.broker.balance + (state.broker.holdings * state.last_price),
+        "total_equity": balance + (holdings * state.last_price),
+        "position": broker.ledger.summary(state.last_price) if hasattr(broker, "ledger") else None,
         "last_update": state.last_update,
-        "health": state.health_metrics,
+        "health": {**state.health_metrics, "rate_limit": governor.stats()},
         "fatal_error": state.fatal_error,
         "db_type": "PostgreSQL (Supabase)" if "postgresql" in database.SQLALCHEMY_DATABASE_URL else "SQLite (Local)"
     }
 
-@app.post("/api/start")
-async def start_trading(background_tasks: BackgroundTasks):
+def bus_snapshot() -> dict:
+    snapshot = state.bus_reader.read()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Trading process has not published state yet.")
+    return snapshot
+
+async def forward(cmd: str, timeout: float = 5.0, **args):
+    """API role: run a stateful command in the trading process."""
+    try:
+        return await send_command(COMMAND_SOCKET, cmd, args, timeout)
+    except CommandError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.get("/api/status")
+async def get_status():
+    if APP_ROLE == "api":
+        snapshot = bus_snapshot()
+        return {**snapshot["status"], "bus_age_s": round(time.time() - snapshot["published_at"], 3)}
+    return build_status()
+
+@app.get("/api/pnl")
+async def get_pnl(days: int = Query(30, ge=1, le=365)):
+    """Realized PnL, win rate, fees and volume from the incrementally maintained summary table."""
+    return await repository.pnl_summary(days)
+
+@app.get("/api/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "csv",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    symbol: Optional[str] = None,
+):
+    """Stream `trades` or `ticks` between epoch seconds `from` and `to` as CSV or Parquet (pyarrow)."""
+    try:
+        stream = export.open_export(dataset, format, start, end, symbol)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}. Available: {', '.join(export.DATASETS)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = export.FORMATS[format][0]
+    headers = {"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    return StreamingResponse(stream, media_type=media_type, headers=headers) # Sync generator: iterated in the threadpool
+
+@app.get("/api/db/pool")
+async def get_db_pool():
+    """Connection pool occupancy and connect / checkout / invalidation counters."""
+    return database.pool_status()
+
+async def query_logs(level: Optional[str] = None, since_seq: Optional[int] = None,
+                     component: Optional[str] = None, limit: int = 200):
+    if level and normalize_level(level) not in LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown level: {level}")
+    return state.log_store.query(level, since_seq, component, limit)
+
+@app.get("/api/logs")
+async def get_logs(
+    level: Optional[str] = None,
+    since_seq: Optional[int] = None,
+    component: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=5000),
+):
+    """Structured logs at or above `level`. Pass the returned `cursor` as `since_seq` to follow."""
+    if APP_ROLE == "api":
+        return await forward("logs", level=level, since_seq=since_seq, component=component, limit=limit)
+    return await query_logs(level, since_seq, component, limit)
+
+async def query_equity(start: Optional[float] = None, end: Optional[float] = None, points: int = 500):
+    return state.equity.query(start, end, points)
+
+@app.get("/api/equity")
+async def get_equity(
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    points: int = Query(500, ge=3, le=5000),
+):
+    """Equity curve between `from` and `to` (epoch seconds), LTTB-downsampled to `points`."""
+    if APP_ROLE == "api":
+        return await forward("equity", start=start, end=end, points=points)
+    return await query_equity(start, end, points)
+
+async def start_now():
+    if not state.ready:
+        raise HTTPException(status_code=503, detail="System warming up. Try again shortly.")
     if state.risk_engine.kill_switch_active:
         raise HTTPException(status_code=400, detail="Kill switch active. Reset required.")
     
@@ -168,36 +453,370 @@ async def start_trading(background_tasks: BackgroundTasks):
         state.is_running = True
         state.fatal_error = None # Reset error on manual start
         # state.risk_engine.set_balance(state.broker.balance) # Don't reset balance
-        background_tasks.add_task(trading_loop)
+        state.trading_task = asyncio.create_task(trading_loop())
     return {"message": "Paper trading started"}
 
-@app.post("/api/stop")
-async def stop_trading():
+@app.post("/api/start")
+async def start_trading():
+    if APP_ROLE == "api":
+        return await forward("start")
+    return await start_now()
+
+async def stop_now():
     state.is_running = False
     return {"message": "Paper trading stopped"}
 
+@app.post("/api/stop")
+async def stop_trading():
+    if APP_ROLE == "api":
+        return await forward("stop")
+    return await stop_now()
+
 @app.get("/api/history")
 async def get_history():
-    return state.broker.trade_history
+    if APP_ROLE == "api":
+        return bus_snapshot()["history"]
+    return await load_history()
 
-@app.post("/api/config")
-async def update_config(config: ConfigUpdate):
+async def load_history() -> list:
+    broker = state.broker
+    if broker is None:
+        return []
+    if isinstance(broker, RealBroker):
+        # Live history lives in the DB: read it through the async layer instead of the sync property
+        return [repository.trade_to_order(t) for t in await repository.recent_trades(50)]
+    return [o.to_dict() for o in broker.trade_history]
+
+async def apply_config(config: ConfigUpdate):
+    if config.active_strategy and config.active_strategy != state.active_strategy:
+        try:
+            primary = strategies.create(config.active_strategy)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        state.active_strategy = config.active_strategy
+        if state.strategy_book:
+            state.strategy_book.set_primary(primary)
     state.risk_engine.config.max_position_size_pct = config.max_position_size_pct
     state.risk_engine.config.stop_loss_pct = config.stop_loss_pct
     state.risk_engine.config.max_drawdown_limit = config.max_drawdown_limit
+    try:
+        await repository.set_configs(config_values())
+    except Exception as e:
+        logger.error(f"Failed to persist config: {e}")
     return {"message": "Config updated"}
 
+@app.get("/api/config")
+async def get_config():
+    """Current risk settings and active strategy; API workers read the copy saved by the last update."""
+    if APP_ROLE != "api":
+        return config_values()
+    return parse_config(await repository.get_configs(*CONFIG_KEYS))
+
+@app.post("/api/config")
+async def update_config(config: ConfigUpdate):
+    if APP_ROLE == "api":
+        return await forward("config", **config.model_dump())
+    return await apply_config(config)
+
+# --- Backtests (research jobs) ---
+
+async def submit_backtest(**args):
+    request = BacktestRequest(**args)
+    from .backtest.engine import STRATEGY_CLASSES # Deferred: pulls in backtrader
+    unknown = sorted({c.strategy for c in request.configs} - set(STRATEGY_CLASSES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown strategy: {', '.join(unknown)}")
+    data = None
+    if request.data:
+        data = os.path.join(BACKTEST_DATA_DIR, os.path.basename(request.data))
+        if not os.path.isfile(data):
+            raise HTTPException(status_code=400, detail=f"Data file not found: {request.data}")
+    try:
+        job = state.backtests.submit([c.model_dump() for c in request.configs], request.start, request.end, data,
+                                     {"cash": request.cash, "commission": request.commission})
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.summary()
+
+async def list_backtests():
+    return {"queue": state.backtests.stats(), "jobs": [j.summary() for j in reversed(state.backtests.jobs.values())]}
+
+async def get_backtest_job(job_id: str):
+    job = state.backtests.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return job.detail()
+
+async def cancel_backtest_job(job_id: str):
+    job = state.backtests.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return job.summary()
+
+# --- Paper accounts (many users, one vectorized book) ---
+
+def require_accounts():
+    """The book is replaced by warmup's load: nothing may create accounts or orders before it lands."""
+    if not state.ready:
+        raise HTTPException(status_code=503, detail="System warming up. Try again shortly.")
+    if not state.accounts.loaded:
+        raise HTTPException(status_code=503, detail="Paper accounts could not be restored.")
+
+async def create_account_cmd(**args):
+    require_accounts()
+    request = AccountCreate(**args)
+    risk = TradeRisk(request.max_position_size_pct, request.stop_loss_pct, request.max_drawdown_limit)
+    return state.accounts.account(state.accounts.create_account(request.name, request.balance, risk))
+
+async def account_stats_cmd():
+    require_accounts()
+    return state.accounts.stats()
+
+async def get_account_cmd(account_id: int):
+    require_accounts()
+    try:
+        return state.accounts.account(account_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+async def submit_account_order_cmd(account_id: int, **args):
+    require_accounts()
+    request = AccountOrder(**args)
+    try:
+        return state.accounts.submit(account_id, request.side, request.type, request.quantity, request.price)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Account not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def cancel_account_order_cmd(account_id: int, order_id: int):
+    require_accounts()
+    try:
+        order = state.accounts.cancel(account_id, order_id)
+    except KeyError:
+        order = None
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+@app.post("/api/accounts", status_code=201)
+async def create_account(request: AccountCreate):
+    if APP_ROLE == "api":
+        return await forward("account_create", **request.model_dump())
+    return await create_account_cmd(**request.model_dump())
+
+@app.get("/api/accounts")
+async def get_accounts():
+    """Totals over all paper accounts and the cost of the last vectorized tick."""
+    if APP_ROLE == "api":
+        return await forward("account_stats")
+    return await account_stats_cmd()
+
+@app.get("/api/accounts/{account_id}")
+async def get_account(account_id: int):
+    if APP_ROLE == "api":
+        return await forward("account_get", account_id=account_id)
+    return await get_account_cmd(account_id)
+
+@app.post("/api/accounts/{account_id}/orders", status_code=201)
+async def submit_account_order(account_id: int, request: AccountOrder):
+    """Orders fill on the next account tick; risk-limit breaches come back as status "rejected"."""
+    if APP_ROLE == "api":
+        return await forward("account_order", account_id=account_id, **request.model_dump())
+    return await submit_account_order_cmd(account_id, **request.model_dump())
+
+@app.delete("/api/accounts/{account_id}/orders/{order_id}")
+async def cancel_account_order(account_id: int, order_id: int):
+    if APP_ROLE == "api":
+        return await forward("account_cancel", account_id=account_id, order_id=order_id)
+    return await cancel_account_order_cmd(account_id, order_id)
+
+@app.post("/api/backtests", status_code=202)
+async def create_backtest(request: BacktestRequest):
+    """Queue a batch of strategy/parameter configs; follow it on /api/backtests/{id}/stream."""
+    if APP_ROLE == "api":
+        return await forward("backtest_submit", **request.model_dump())
+    return await submit_backtest(**request.model_dump())
+
+@app.get("/api/backtests")
+async def get_backtests():
+    if APP_ROLE == "api":
+        return await forward("backtest_list")
+    return await list_backtests()
+
+@app.get("/api/backtests/{job_id}")
+async def get_backtest(job_id: str):
+    if APP_ROLE == "api":
+        return await forward("backtest_get", job_id=job_id)
+    return await get_backtest_job(job_id)
+
+@app.delete("/api/backtests/{job_id}")
+async def cancel_backtest(job_id: str):
+    if APP_ROLE == "api":
+        return await forward("backtest_cancel", job_id=job_id)
+    return await cancel_backtest_job(job_id)
+
+@app.websocket("/api/backtests/{job_id}/stream")
+async def stream_backtest(websocket: WebSocket, job_id: str):
+    """Progress events (done/total, best config so far and its equity curve) until the job finishes."""
+    await websocket.accept()
+    try:
+        if APP_ROLE == "api":
+            await _poll_backtest(websocket, job_id) # Jobs live in the trading process
+            return
+        job = state.backtests.get(job_id)
+        if job is None:
+            await websocket.close(code=4404)
+            return
+        queue = state.backtests.subscribe(job_id)
+        try:
+            event = {"type": "status", **job.summary()}
+            await websocket.send_json(event)
+            while event["status"] in ("queued", "running"):
+                event = await queue.get()
+                await websocket.send_json(event)
+        finally:
+            state.backtests.unsubscribe(job_id, queue)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+async def _poll_backtest(websocket: WebSocket, job_id: str):
+    last = None
+    while True:
+        try:
+            job = await send_command(COMMAND_SOCKET, "backtest_get", {"job_id": job_id})
+        except CommandError:
+            await websocket.close(code=4404)
+            return
+        summary = {k: job[k] for k in ("id", "status", "progress", "best", "error")}
+        if summary != last:
+            best = max(job["results"], key=lambda r: r["return_pct"]) if job["results"] else None
+            await websocket.send_json({"type": "progress", **summary, "equity": best["equity"] if best else []})
+            last = summary
+        if job["status"] not in ("queued", "running"):
+            await websocket.close()
+            return
+        await asyncio.sleep(0.5)
+
+# --- Admin (diagnostics) ---
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+async def profile(seconds: float, interval_ms: float) -> str:
+    if state.profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    loop = asyncio.get_running_loop()
+    try:
+        stacks = await loop.run_in_executor(None, state.profiler.run, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return collapse(stacks)
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def run_profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=1000),
+):
+    """
+    Sample every thread of the trading process for `seconds` and return collapsed stacks
+    (feed to flamegraph.pl or speedscope). The event loop keeps serving meanwhile.
+    """
+    if APP_ROLE == "api":
+        return await forward("profile", timeout=seconds + 10, seconds=seconds, interval_ms=interval_ms)
+    return await profile(seconds, interval_ms)
+
+async def loop_timing(enabled: Optional[bool] = None):
+    if enabled is not None:
+        state.loop_timer.enable(enabled)
+    return state.loop_timer.summary()
+
+@app.get("/api/admin/loop-timing", dependencies=[Depends(require_admin)])
+async def get_loop_timing():
+    """Per-phase trading_loop percentiles (ms) since timing was enabled."""
+    if APP_ROLE == "api":
+        return await forward("loop_timing")
+    return await loop_timing()
+
+@app.post("/api/admin/loop-timing", dependencies=[Depends(require_admin)])
+async def set_loop_timing(enabled: bool = True):
+    if APP_ROLE == "api":
+        return await forward("loop_timing", enabled=enabled)
+    return await loop_timing(enabled)
+
+async def strategies_report():
+    report = {
+        "active": state.active_strategy,
+        "available": {name: cls.defaults for name, cls in strategies.STRATEGIES.items()},
+    }
+    if state.strategy_book:
+        report.update(state.strategy_book.report())
+    return report
+
+@app.get("/api/strategies")
+async def get_strategies():
+    """Active strategy, its indicators and the shadow strategies ranked by paper return."""
+    if APP_ROLE == "api":
+        return await forward("strategies")
+    return await strategies_report()
+
+# Commands the trading process accepts from API workers over the Unix socket
+COMMANDS = {
+    "start": lambda args: start_now(),
+    "stop": lambda args: stop_now(),
+    "config": lambda args: apply_config(ConfigUpdate(**args)),
+    "logs": lambda args: query_logs(**args),
+    "equity": lambda args: query_equity(**args),
+    "loop_timing": lambda args: loop_timing(**args),
+    "profile": lambda args: profile(**args),
+    "strategies": lambda args: strategies_report(),
+    "backtest_submit": lambda args: submit_backtest(**args),
+    "backtest_list": lambda args: list_backtests(),
+    "backtest_get": lambda args: get_backtest_job(**args),
+    "backtest_cancel": lambda args: cancel_backtest_job(**args),
+    "account_create": lambda args: create_account_cmd(**args),
+    "account_stats": lambda args: account_stats_cmd(),
+    "account_get": lambda args: get_account_cmd(**args),
+    "account_order": lambda args: submit_account_order_cmd(**args),
+    "account_cancel": lambda args: cancel_account_order_cmd(**args),
+}
+
 # --- Background Tasks ---
 
+def signal_distance(price: float) -> Optional[float]:
+    """Relative gap between `price` and the nearest level that would make the bot act."""
+    gaps = []
+    book = state.strategy_book
+    if book is not None and state.broker is not None:
+        position = strategies.Position(state.broker.holdings, state.entry_price, state.last_trade_time)
+        gap = book.primary.distance(price, position)
+        if gap is not None:
+            gaps.append(gap)
+    for order in state.protective_orders:
+        if order.status != "open":
+            continue
+        level = order.price if order.type == "limit" else state.broker.stop_level(order)
+        if level > 0:
+            gaps.append(abs(level / price - 1))
+    return min(gaps) if gaps else None
+
 async def market_data_loop():
     """Fetch market data continuously, regardless of trading status"""
     logger.info("Starting market data loop...")
     symbol = "btcbrl"
+    last_equity_flush = time.time()
+    scheduler = state.poll_scheduler
+    last_feed_log, last_source = 0.0, None
     
     while True:
         try:
             # Run blocking call in thread
             loop = asyncio.get_running_loop()
+            scheduler.record_poll()
             # Reduce timeout to fail fast
             ticker = await loop.run_in_executor(None, lambda: state.client.get_ticker(symbol))
             
@@ -205,14 +824,26 @@ async def market_data_loop():
                  current_price = float(ticker['last'])
                  state.last_price = current_price
                  state.last_update = time.time()
+                 scheduler.observe(current_price, state.last_update)
+                 tick_accounts(current_price)
+
+                 # Sample Equity Curve
+                 if state.broker:
+                     state.equity.record(state.last_update, state.broker.balance + (state.broker.holdings * current_price))
+                 state.ticks.record(symbol, state.last_update, current_price, ticker.get("source"))
+                 if state.last_update - last_equity_flush > 60:
+                     last_equity_flush = state.last_update
+                     await loop.run_in_executor(None, state.equity.flush)
+                     await loop.run_in_executor(None, state.ticks.flush)
                  
                  # Set health metric
                  if not hasattr(state, "health_metrics"): state.health_metrics = {}
                  state.health_metrics["market_api"] = "connected"
                  source = ticker.get("source", "Unknown")
-                 if source in ["Binance", "MercadoBitcoin"]:
-                      if int(time.time()) % 120 == 0:
-                         logger.info(f"Price Feed active via {source} (Price: {current_price})")
+                 if source != last_source or state.last_update - last_feed_log > FEED_LOG_INTERVAL:
+                     last_feed_log, last_source = state.last_update, source
+                     logger.info(f"Price Feed active via {source} (Price: {current_price}, "
+                                 f"{scheduler.polls_per_min} polls/min, next in {scheduler.interval:.1f}s: {scheduler.reason})")
                  
             else:
                  # Data fetch failed or returned invalid format
@@ -223,25 +854,174 @@ async def market_data_loop():
             logger.error(f"Market loop error: {e}")
             if not hasattr(state, "health_metrics"): state.health_metrics = {}
             state.health_metrics["market_api"] = "disconnected"
-        
-        await asyncio.sleep(10) # Update price every 10s to stay under rate limits
+
+        interval = MARKET_POLL_INTERVAL
+        if MARKET_POLL_ADAPTIVE:
+            try:
+                interval = scheduler.next_interval(signal_distance(state.last_price) if state.last_price > 0 else None)
+            except Exception as e:
+                logger.error(f"Poll scheduler error: {e}")
+        state.health_metrics["market_feed"] = scheduler.stats() if MARKET_POLL_ADAPTIVE else {
+            "interval_s": interval, "reason": "fixed", "polls_per_min": scheduler.polls_per_min}
+        await asyncio.sleep(interval)
+
+def tick_accounts(price: float):
+    """Match every paper account against a freshly polled price (called by market_data_loop)."""
+    book = state.accounts
+    if not state.ready or not book.size:
+        return # Before warmup the book is about to be replaced by the persisted one
+    try:
+        result = book.tick(price) # Vectorized: a few ms for 10k accounts, so inline
+        state.health_metrics["accounts"] = {**book.stats(), "last_tick": result}
+    except Exception as e:
+        logger.error(f"Accounts tick error: {e}")
+
+async def accounts_loop():
+    """Bulk-persist changed paper accounts periodically (ticks follow the price feed)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(ACCOUNTS_FLUSH_INTERVAL)
+        try:
+            if state.ready:
+                book = state.accounts
+                await loop.run_in_executor(None, book.write, *book.pending_rows())
+        except Exception as e:
+            logger.error(f"Accounts loop error: {e}")
+
+async def state_bus_loop():
+    """Trader role: publish status and history snapshots for the API workers."""
+    history, history_key, history_at = [], None, 0.0
+    while True:
+        try:
+            now = time.time()
+            broker = state.broker
+            # History only changes with orders (RealBroker reads it from the DB): refresh on change
+            key = (id(broker), broker.revision) if broker else None
+            if key != history_key or now - history_at > 30:
+                history = jsonable_encoder(await load_history())
+                history_key, history_at = key, now
+            state.bus_writer.publish({"published_at": now, "status": build_status(), "history": history})
+        except Exception as e:
+            logger.error(f"State bus publish error: {e}")
+        await asyncio.sleep(STATE_BUS_INTERVAL)
+
+async def submit_order(order: Order) -> Order:
+    """Place an order off the event loop; records signal-to-ack latency in health."""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, state.broker.place_order, order)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    state.order_latency.record(elapsed_ms)
+    state.loop_timer.current.nested("order", elapsed_ms)
+    latency = {"signal_to_ack": state.order_latency.summary()}
+    if hasattr(state.broker, "exchange_rtt"):
+        latency["exchange_rtt"] = state.broker.exchange_rtt.summary()
+    state.health_metrics["order_latency"] = latency
+    return result
+
+async def place_protection(symbol: str, quantity: float, entry: float):
+    """Rest the position's exits in the paper broker as one OCO group: take profit limit + stop (or trailing stop)."""
+    if PROTECTIVE_STOP == "none" or not hasattr(state.broker, "place_oco"):
+        return # RealBroker only places market orders
+    stop_pct = state.risk_engine.config.stop_loss_pct
+    order_id = int(time.time() * 1000)
+    if PROTECTIVE_STOP == "trailing":
+        stop = Order(id=f"{order_id}-ts", symbol=symbol, side="sell", type="trailing_stop", quantity=quantity, price=0.0, trail_pct=stop_pct)
+    else:
+        stop = Order(id=f"{order_id}-sl", symbol=symbol, side="sell", type="stop", quantity=quantity, price=0.0, stop_price=entry * (1 - stop_pct))
+    orders = [stop]
+    take_profit = state.strategy_book.primary.params.get("take_profit") if state.strategy_book else None
+    if take_profit:
+        orders.append(Order(id=f"{order_id}-tp", symbol=symbol, side="sell", type="limit", quantity=quantity, price=entry * (1 + take_profit)))
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, state.broker.place_oco, orders)
+    state.protective_orders = orders
+
+def cancel_protection():
+    if state.protective_orders:
+        state.broker.cancel_group(state.protective_orders[0].oco_group)
+    state.protective_orders = []
+
+def check_protection():
+    """After a broker tick: if a resting exit filled, the position is closed."""
+    filled = next((o for o in state.protective_orders if o.status == "filled"), None)
+    if filled is None:
+        return
+    kind = {"limit": "TAKE PROFIT", "stop": "STOP LOSS", "trailing_stop": "TRAILING STOP"}[filled.type]
+    state.log(f"🛡️ {kind} FILLED @ {filled.filled_price:.2f}", component="strategy", side="sell", price=filled.filled_price, quantity=filled.quantity)
+    state.protective_orders = []
+    state.last_trade_time = time.time()
+
+def build_strategy_book() -> strategies.StrategyBook:
+    try:
+        shadows = strategies.parse_shadows(SHADOW_STRATEGIES)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Invalid SHADOW_STRATEGIES, running without shadows: {e}")
+        shadows = []
+    return strategies.StrategyBook(strategies.create(state.active_strategy), shadows)
+
+async def execute_signal(symbol: str, signal: strategies.Signal, current_price: float, total_equity: float):
+    """Turn the primary strategy's signal into a sized, risk-checked order."""
+    if signal.side == "buy":
+        balance = state.broker.balance
+        if balance <= 10: # Min balance
+            return
+        # Use 98% of balance to maximize compounding (leaving 2% buffer for price fluctuation/fees)
+        quantity_to_buy = (balance * 0.98) / current_price
+        risk_check = state.risk_engine.validate_trade(symbol, "buy", quantity_to_buy, current_price, total_equity)
+        if not risk_check["allowed"]:
+            return
+        order = Order(
+            id=str(int(time.time()*1000)),
+            symbol=symbol, side="buy", quantity=quantity_to_buy,
+            price=current_price, type="market"
+        )
+        await submit_order(order)
+        state.last_trade_time = time.time()
+        await place_protection(symbol, quantity_to_buy, current_price)
+        state.log(f"SIGNAL BUY @ {current_price} (Strength: {signal.strength*100:.3f}%)", component="strategy", side="buy", price=current_price, quantity=quantity_to_buy)
+        return
+
+    holdings = state.broker.holdings
+    if holdings <= strategies.MIN_HOLDINGS:
+        return
+    if signal.reason == "take_profit":
+        state.log(f"💰 TAKE PROFIT TRIGGERED! Profit: {signal.strength*100:.2f}%", component="strategy", side="sell", price=current_price, profit_pct=signal.strength)
+    cancel_protection() # Strategy exit replaces the resting one
+    order = Order(
+        id=str(int(time.time()*1000)),
+        symbol=symbol, side="sell", quantity=holdings,
+        price=current_price, type="market"
+    )
+    await submit_order(order)
+    state.last_trade_time = time.time()
+    if signal.reason == "protection":
+        state.log(f"PROTECTION SELL @ {current_price} (Profit Lock - Price crossed ShortMA)", component="strategy", side="sell", price=current_price, quantity=holdings)
+    elif signal.reason != "take_profit":
+        state.log(f"SIGNAL SELL @ {current_price} (Strength: {signal.strength*100:.3f}%)", component="strategy", side="sell", price=current_price, quantity=holdings)
 
 async def trading_loop():
     logger.info("Starting trading loop...")
     symbol = "btcbrl"
-    price_history: List[float] = []
+    loop = asyncio.get_running_loop()
     
-    # --- STRATEGY PARAMS (Professional Day Trade Setup) ---
-    # Ticks are every 10 seconds. 
-    ma_short_period = 30    # 5 minutes (30 * 10s)
-    ma_long_period = 120    # 20 minutes (120 * 10s)
-    signal_threshold = 0.003 # 0.3% buffer to overcome Foxbit fees (0.5% + 0.1% slippage)
-    cooldown_seconds = 1800 # 30 minutes wait after a trade to avoid churn
+    # Indicator buffer lives on state so it survives stop/start and checkpoints; drop it if stale
+    if state.price_history and time.time() - state.last_price_tick > CHECKPOINT_MAX_AGE:
+        state.price_history = []
+    price_history = state.price_history
+
+    # Primary strategy trades, shadows are paper-evaluated on the same ticks (see /api/strategies)
+    book = build_strategy_book()
+    book.warm(price_history)
+    state.strategy_book = book
+    logger.info(f"🧠 Strategy {book.primary.label} active, {len(book.shadows)} shadow(s), {len(book.graph.nodes)} unique indicators")
     
-    last_trade_time = 0
     error_counter = 0
+    last_checkpoint = time.time()
+    pending_checkpoint = None
 
     while state.is_running:
+        timing = state.loop_timer.begin()
         try:
             # Update heartbeat
             if not hasattr(state, "health_metrics"):
@@ -258,104 +1038,42 @@ async def trading_loop():
                 
             current_price = state.last_price
             price_history.append(current_price)
+            state.last_price_tick = time.time()
             
-            if len(price_history) > ma_long_period + 5:
+            # Keep enough for the longest indicator so a checkpoint can re-warm the graph
+            if len(price_history) > book.graph.capacity + 5:
                 price_history.pop(0)
-            
-            # Periodic Heartbeat Log
-            if not hasattr(state, "last_heartbeat"): state.last_heartbeat = 0
-            if time.time() - state.last_heartbeat > 30:
-                state.last_heartbeat = time.time()
-                short_ma_val = sum(price_history[-ma_short_period:]) / len(price_history[-ma_short_period:]) if len(price_history) >= ma_short_period else 0
-                state.log(f"Robot watching market... Price: R$ {current_price:.2f} | SMA({ma_short_period}): {short_ma_val:.2f}", level="DEBUG")
+
+            timing.mark("fetch_state")
 
             # 2. Update Broker
-            state.broker.process_data_tick(current_price)
+            # Fills persist through the sync session: keep them (and live balance syncs) off the loop
+            await loop.run_in_executor(None, state.broker.process_data_tick, current_price)
+            check_protection()
+            timing.mark("broker_tick")
             
             # Update Risk Engine with Equity
             total_equity = state.broker.balance + (state.broker.holdings * current_price)
             state.risk_engine.update_equity(total_equity)
+            timing.mark("risk_update")
 
-            # 3. Strategy Logic (Smoothed SMA Crossover)
-            if len(price_history) >= ma_long_period:
-                short_ma = sum(price_history[-ma_short_period:]) / ma_short_period
-                long_ma = sum(price_history[-ma_long_period:]) / ma_long_period
-                
-                # Cooldown check
-                in_cooldown = (time.time() - last_trade_time) < cooldown_seconds
-
-                # --- BUY SIGNAL ---
-                # Check if short_ma is at least 0.1% above long_ma
-                if short_ma > (long_ma * (1 + signal_threshold)) and not in_cooldown:
-                    balance = state.broker.balance
-                    if balance > 10: # Min balance
-                        # Use 98% of balance to maximize compounding (leaving 2% buffer for price fluctuation/fees)
-                        quantity_to_buy = (balance * 0.98) / current_price
-                        risk_check = state.risk_engine.validate_trade(symbol, "buy", quantity_to_buy, current_price, total_equity)
-                        
-                        if risk_check["allowed"]:
-                            order = Order(
-                                id=str(int(time.time()*1000)),
-                                symbol=symbol, side="buy", quantity=quantity_to_buy,
-                                price=current_price, type="market"
-                            )
-                            state.broker.place_order(order)
-                            last_trade_time = time.time()
-                            state.entry_price = current_price # Track entry for TP
-                            logger.info(f"SIGNAL BUY @ {current_price} (Strength: {((short_ma/long_ma)-1)*100:.3f}%)")
-
-                # --- PROFIT PROTECTION (TRAILING STOP) ---
-                # Calculate approximate entry price (weighted average not stored, assuming last buy price or calculating from Equity)
-                # Simplified: Equity = Balance + (Holdings * Price). 
-                # Invested = Total Initial - Balance. (Not reliable across sessions)
-                # Better: Use Moving Average as dynamic support.
-                
-                # Logic: If Price is > 2% above Long MA (Overextended) AND drops below Short MA -> SELL
-                if current_price > (long_ma * 1.02):
-                     if current_price < short_ma:
-                         holdings = state.broker.holdings
-                         if holdings > 0.00001:
-                             # TAKE PROFIT / PROTECTION
-                             order = Order(
-                                  id=str(int(time.time()*1000)),
-                                  symbol=symbol, side="sell", quantity=holdings,
-                                  price=current_price, type="market"
-                             )
-                             state.broker.place_order(order)
-                             last_trade_time = time.time()
-                             last_trade_time = time.time()
-                             state.entry_price = 0.0 # Reset entry
-                             logger.info(f"PROTECTION SELL @ {current_price} (Profit Lock - Price crossed ShortMA)")
-
-                # --- FIXED TAKE PROFIT (4%) ---
-                if state.broker.holdings > 0.00001 and state.entry_price > 0:
-                    profit_pct = (current_price - state.entry_price) / state.entry_price
-                    if profit_pct >= 0.04: # 4% target
-                        logger.info(f"💰 TAKE PROFIT TRIGGERED! Profit: {profit_pct*100:.2f}% (Target: 4.0%)")
-                        order = Order(
-                             id=str(int(time.time()*1000)),
-                             symbol=symbol, side="sell", quantity=state.broker.holdings,
-                             price=current_price, type="market"
-                        )
-                        state.broker.place_order(order)
-                        state.entry_price = 0.0
-                        last_trade_time = time.time()
-
-
-                # --- SELL SIGNAL ---
-                # Check if short_ma is at least 0.1% below long_ma
-                elif short_ma < (long_ma * (1 - signal_threshold)):
-                    holdings = state.broker.holdings
-                    if holdings > 0.00001:
-                        order = Order(
-                             id=str(int(time.time()*1000)),
-                             symbol=symbol, side="sell", quantity=holdings,
-                             price=current_price, type="market"
-                        )
-                        state.broker.place_order(order)
-                        last_trade_time = time.time()
-                        logger.info(f"SIGNAL SELL @ {current_price} (Strength: {((long_ma/short_ma)-1)*100:.3f}%)")
+            # 3. Strategy Logic: shared indicators advance once, shadows trade on paper, primary decides
+            position = strategies.Position(state.broker.holdings, state.entry_price, state.last_trade_time)
+            signal = book.on_tick(current_price, position)
+
+            # Periodic Heartbeat Log
+            if not hasattr(state, "last_heartbeat"): state.last_heartbeat = 0
+            if time.time() - state.last_heartbeat > 30:
+                state.last_heartbeat = time.time()
+                values = {k: v for k, v in book.primary.indicators().items() if v is not None}
+                shown = " | ".join(f"{k}: {v:.2f}" for k, v in values.items())
+                state.log(f"Robot watching market... Price: R$ {current_price:.2f} | {shown or 'warming up'}", level="DEBUG", price=current_price, **values)
+
+            if signal is not None:
+                await execute_signal(symbol, signal, current_price, total_equity)
             
+            timing.mark("signal_eval") # Order placement is recorded separately as "order"
+            timing.end()
             error_counter = 0
 
         except Exception as e:
@@ -366,9 +1084,17 @@ async def trading_loop():
                 state.fatal_error = f"AUTO-STOP: {str(e)}"
                 break
 
+        # Periodic checkpoint, written off-loop (skip if the previous write is still running)
+        if time.time() - last_checkpoint > CHECKPOINT_INTERVAL and (pending_checkpoint is None or pending_checkpoint.done()):
+            last_checkpoint = time.time()
+            pending_checkpoint = loop.run_in_executor(None, save_checkpoint, CHECKPOINT_PATH, build_checkpoint())
+
         # CRITICAL: Yield control to event loop
         await asyncio.sleep(1)
 
+    if pending_checkpoint is not None and not pending_checkpoint.done():
+        await pending_checkpoint # Both writes go through the same .tmp file
+    await loop.run_in_executor(None, save_checkpoint, CHECKPOINT_PATH, build_checkpoint())
     state.log("Trading loop stopped.")
 
 # Serve Frontend (Optional, if we build it)
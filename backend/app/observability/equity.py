@@ -0,0 +1,264 @@
+import logging
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from ..storage import models, database
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+
+
+def lttb(points: List[Point], threshold: int) -> List[Point]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Keeps the first and last points and, for every bucket in between, the point
+    forming the largest triangle with the previous pick and the next bucket's average.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # Index of the previously selected point
+
+    for i in range(threshold - 2):
+        # Average of the next bucket (the "third" vertex of the triangle)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(p[0] for p in points[next_start:next_end]) / span
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        # Pick the point of the current bucket with the largest triangle area
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            px, py = points[j]
+            area = abs((ax - avg_x) * (py - ay) - (ax - px) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+class _Column:
+    """
+    Append-only (ts, value) series backed by compact arrays.
+    Trims the oldest entries in chunks so appends stay amortized O(1)
+    and timestamps stay bisectable.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array("d")
+        self.values = array("d")
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append(self, ts: float, value: float):
+        self.ts.append(ts)
+        self.values.append(value)
+        if len(self.ts) > self.capacity + self.capacity // 4:
+            excess = len(self.ts) - self.capacity
+            del self.ts[:excess]
+            del self.values[:excess]
+
+    def range(self, start: float, end: float) -> Tuple[int, int]:
+        return bisect_left(self.ts, start), bisect_right(self.ts, end)
+
+    def points(self, lo: int, hi: int, step: int = 1) -> List[Point]:
+        points = list(zip(self.ts[lo:hi:step], self.values[lo:hi:step]))
+        if step > 1 and (hi - 1 - lo) % step:
+            points.append((self.ts[hi - 1], self.values[hi - 1]))  # Always end on the latest point
+        return points
+
+
+class _Bucket:
+    """Rollup bucket being filled (close/min/max of the samples it received)."""
+    __slots__ = ("start", "close", "low", "high")
+
+    def __init__(self, start: float, close: float, low: float, high: float):
+        self.start = start
+        self.close = close
+        self.low = low
+        self.high = high
+
+    def add(self, close: float, low: float, high: float):
+        self.close = close
+        if low < self.low:
+            self.low = low
+        if high > self.high:
+            self.high = high
+
+
+class EquitySeries:
+    """
+    Multi-resolution equity history.
+    - raw: every sampled tick (in-memory ring)
+    - 1m / 1h: rollups (close, min, max) kept in memory and persisted to the DB
+    Queries pick the finest resolution that covers the range without exceeding
+    `max_source_points`, then downsample with LTTB, so cost is bounded regardless
+    of how much history exists. Persisted rollups are pruned once they fall out of
+    what the in-memory columns can hold.
+    """
+    RESOLUTIONS = (("1m", 60), ("1h", 3600))
+
+    def __init__(self, raw_capacity: int = 8640, minute_capacity: int = 43200,
+                 hour_capacity: int = 43800, max_source_points: int = 20000):
+        self.max_source_points = max_source_points
+        self.columns = {
+            "raw": _Column(raw_capacity),
+            "1m": _Column(minute_capacity),
+            "1h": _Column(hour_capacity),
+        }
+        self._buckets = {"1m": None, "1h": None}
+        self._pending: List[tuple] = []  # Closed rollups waiting to be persisted
+        self._pruned_at = 0.0
+
+    def record(self, ts: float, equity: float):
+        """Sample equity at `ts` (epoch seconds). Called on every market data tick."""
+        raw = self.columns["raw"]
+        if len(raw) and ts < raw.ts[-1]:
+            return  # Out-of-order sample, ignore
+        raw.append(ts, equity)
+        self._roll("1m", 60, ts, equity, equity, equity)
+
+    def _roll(self, resolution: str, seconds: int, ts: float, close: float, low: float, high: float):
+        start = float(int(ts // seconds) * seconds)
+        bucket = self._buckets[resolution]
+        if bucket is None or bucket.start != start:
+            if bucket is not None:
+                self._close_bucket(resolution, bucket)
+            self._buckets[resolution] = _Bucket(start, close, low, high)
+        else:
+            bucket.add(close, low, high)
+
+    def _close_bucket(self, resolution: str, bucket: _Bucket):
+        self.columns[resolution].append(bucket.start, bucket.close)
+        self._pending.append((resolution, bucket.start, bucket.close, bucket.low, bucket.high))
+        if resolution == "1m":
+            self._roll("1h", 3600, bucket.start, bucket.close, bucket.low, bucket.high)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, points: int = 500) -> dict:
+        """Return at most `points` (ts, equity) pairs between `start` and `end`."""
+        end = end if end is not None else time.time()
+        start = start if start is not None else 0.0
+
+        resolution = self._pick_resolution(start, end)
+        column = self.columns[resolution]
+        lo, hi = column.range(start, end)
+        # Even the coarsest rollup is too dense: stride over the whole range rather than dropping its start
+        step = max(1, math.ceil((hi - lo) / self.max_source_points))
+        return {
+            "resolution": resolution,
+            "stride": step,
+            "points": lttb(column.points(lo, hi, step), points),
+        }
+
+    def _pick_resolution(self, start: float, end: float) -> str:
+        """Finest resolution that reaches back to `start` with a bounded number of points."""
+        names = ("raw", "1m", "1h")
+        fallback = "1h"
+        for i, name in enumerate(names):
+            column = self.columns[name]
+            if not len(column):
+                continue
+            fallback = name
+            older = any(
+                len(self.columns[n]) and self.columns[n].ts[0] + seconds <= column.ts[0]
+                for n, seconds in self.RESOLUTIONS[i:]
+            )
+            if column.ts[0] > start and older:
+                continue  # A coarser resolution reaches further back
+            lo, hi = column.range(start, end)
+            if hi - lo <= self.max_source_points:
+                return name
+        return fallback
+
+    def flush(self):
+        """Persist closed rollups (and prune old ones hourly). Blocking: run it in an executor."""
+        pending, self._pending = self._pending, []
+        prune = time.time() - self._pruned_at > 3600
+        if not pending and not prune:
+            return
+        session = database.SessionLocal()
+        try:
+            if pending:
+                session.bulk_insert_mappings(models.EquitySample, [
+                    {"resolution": r, "ts": ts, "equity": close, "equity_min": low, "equity_max": high}
+                    for r, ts, close, low, high in pending
+                ])
+            if prune:
+                self._prune(session)
+            session.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist equity rollups: {e}")
+            session.rollback()
+            self._pending = pending + self._pending  # Retry on next flush
+        finally:
+            session.close()
+
+    def _prune(self, session):
+        """Retention: drop rollups older than their in-memory column can span (30 days of 1m, 5 years of 1h)."""
+        now = time.time()
+        for resolution, seconds in self.RESOLUTIONS:
+            cutoff = now - self.columns[resolution].capacity * seconds
+            session.query(models.EquitySample).filter(
+                models.EquitySample.resolution == resolution, models.EquitySample.ts < cutoff,
+            ).delete(synchronize_session=False)
+        self._pruned_at = now
+
+    def read(self) -> Dict[str, List[Point]]:
+        """Persisted rollups, oldest first (most recent `capacity` of each resolution). Blocking."""
+        session = database.SessionLocal()
+        try:
+            loaded = {}
+            for resolution, _ in self.RESOLUTIONS:
+                rows = (
+                    session.query(models.EquitySample.ts, models.EquitySample.equity)
+                    .filter(models.EquitySample.resolution == resolution)
+                    .order_by(models.EquitySample.ts.desc())
+                    .limit(self.columns[resolution].capacity)
+                    .all()
+                )
+                loaded[resolution] = [(ts, equity) for ts, equity in reversed(rows)]
+            return loaded
+        except Exception as e:
+            logger.error(f"Failed to load equity history: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def restore(self, loaded: Dict[str, List[Point]]):
+        """
+        Put rows from `read` in front of whatever was recorded since startup. Call it from the
+        thread that records (the event loop): columns are swapped, never appended out of order.
+        """
+        for resolution, rows in loaded.items():
+            live = self.columns[resolution]
+            cutoff = live.ts[0] if len(live) else math.inf
+            merged = _Column(live.capacity)
+            for ts, equity in rows:
+                if ts < cutoff:
+                    merged.append(ts, equity)
+            for ts, equity in live.points(0, len(live)):
+                merged.append(ts, equity)
+            self.columns[resolution] = merged
+        logger.info(f"Equity history restored: {len(self.columns['1m'])} minute / {len(self.columns['1h'])} hour points")
+
+    def load(self):
+        """Blocking read + restore, for callers without a concurrent recorder."""
+        self.restore(self.read())
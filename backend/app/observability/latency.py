@@ -0,0 +1,37 @@
+from collections import deque
+from typing import List, Optional
+
+
+def _pick(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class LatencyStats:
+    """
+    Rolling window of latency samples (milliseconds) with percentile summaries for health output.
+    """
+    def __init__(self, capacity: int = 256):
+        self.samples = deque(maxlen=capacity)
+        self.count = 0
+        self.last: Optional[float] = None
+
+    def record(self, ms: float):
+        self.samples.append(ms)
+        self.count += 1
+        self.last = ms
+
+    def percentile(self, pct: float) -> float:
+        return _pick(sorted(self.samples), pct) if self.samples else 0.0
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "last_ms": round(self.last, 2),
+            "p50_ms": round(_pick(ordered, 50), 2),
+            "p95_ms": round(_pick(ordered, 95), 2),
+            "p99_ms": round(_pick(ordered, 99), 2),
+            "max_ms": round(ordered[-1], 2),
+        }
@@ -0,0 +1,168 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from itertools import dropwhile, takewhile
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+LEVEL_ALIASES = {"WARN": "WARNING", "FATAL": "CRITICAL"}
+INDEXED_LEVELS = (logging.WARNING, logging.ERROR, logging.CRITICAL)
+
+FIELDS = ("seq", "ts", "level", "component", "message", "fields")
+
+
+def normalize_level(level: str) -> str:
+    level = level.upper()
+    return LEVEL_ALIASES.get(level, level)
+
+
+class LogStore:
+    """
+    Fixed-capacity ring of structured log records.
+    Each record is a (seq, ts, level, component, message, fields) tuple stored in a
+    preallocated slot, so appends are O(1) and a sequence number maps directly to
+    its slot for cursor queries. Sequence numbers of WARNING+ records and of each
+    component are also indexed, so filtered queries only visit candidate records.
+    """
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._lock = threading.Lock()
+        self.next_seq = 0  # Sequence number of the next record
+        self._by_level: Dict[int, deque] = {level: deque(maxlen=capacity) for level in INDEXED_LEVELS}
+        self._by_component: Dict[str, deque] = {}
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest sequence number still retained."""
+        return max(0, self.next_seq - self.capacity)
+
+    def append(self, level: str, message: str, component: str = "bot", fields: Optional[dict] = None) -> int:
+        level = normalize_level(level)
+        levelno = LEVELS.get(level, 0)
+        with self._lock:
+            seq = self.next_seq
+            self._ring[seq % self.capacity] = (seq, time.time(), level, component, message, fields or None)
+            self.next_seq = seq + 1
+            for indexed in INDEXED_LEVELS:
+                if levelno >= indexed:
+                    self._by_level[indexed].append(seq)
+            if component not in self._by_component:
+                self._by_component[component] = deque(maxlen=self.capacity)
+            self._by_component[component].append(seq)
+        return seq
+
+    def _candidates(self, min_level: int, component: Optional[str]) -> Optional[deque]:
+        """Smallest index covering the filter (None: every record is a candidate)."""
+        options = []
+        if component is not None:
+            options.append(self._by_component.get(component, deque()))
+        indexed = [level for level in INDEXED_LEVELS if level <= min_level]
+        if indexed:
+            options.append(self._by_level[indexed[-1]])
+        return min(options, key=len) if options else None
+
+    def _match(self, record, min_level: int, component: Optional[str]) -> bool:
+        if min_level and LEVELS.get(record[2], 0) < min_level:
+            return False
+        return component is None or record[3] == component
+
+    def query(self, level: Optional[str] = None, since_seq: Optional[int] = None,
+              component: Optional[str] = None, limit: int = 200) -> dict:
+        """
+        Records at or above `level`.
+        With `since_seq`: records after that cursor, oldest first (pass back `cursor` to continue).
+        Without: the most recent `limit` records, oldest first.
+        """
+        min_level = LEVELS.get(normalize_level(level), 0) if level else 0
+        records = []
+
+        with self._lock:  # Appends come from logging threads too
+            end = self.next_seq
+            first = self.first_seq
+            candidates = self._candidates(min_level, component)
+            if since_seq is not None:
+                start = max(first, since_seq + 1)
+                seqs = range(start, end) if candidates is None else dropwhile(lambda s: s < start, candidates)
+            else:
+                seqs = range(end - 1, first - 1, -1) if candidates is None else takewhile(lambda s: s >= first, reversed(candidates))
+            for seq in seqs:
+                if len(records) >= limit:
+                    break
+                record = self._ring[seq % self.capacity]
+                if self._match(record, min_level, component):
+                    records.append(record)
+
+        if since_seq is not None:
+            cursor = records[-1][0] if len(records) == limit else end - 1
+        else:
+            records.reverse()
+            cursor = end - 1
+
+        return {
+            "records": [dict(zip(FIELDS, r)) for r in records],
+            "first_seq": first,
+            "cursor": cursor,
+        }
+
+    def tail(self, n: int = 5) -> list:
+        """Most recent `n` records as preformatted strings, newest first."""
+        lines = []
+        seq = self.next_seq - 1
+        while seq >= self.first_seq and len(lines) < n:
+            _, ts, level, _, message, _ = self._ring[seq % self.capacity]
+            lines.append(f"[{time.strftime('%H:%M:%S', time.localtime(ts))}] [{level}] {message}")
+            seq -= 1
+        return lines
+
+
+class StoreHandler(logging.Handler):
+    """
+    Feeds module loggers (broker, governor, loops...) into a LogStore, so /api/logs shows them.
+    Records logged by `GlobalSystemState.log` carry `in_store` and were already appended.
+    """
+    def __init__(self, store: LogStore, level: int = logging.INFO):
+        super().__init__(level)
+        self.store = store
+
+    def emit(self, record: logging.LogRecord):
+        if getattr(record, "in_store", False):
+            return
+        try:
+            message = record.getMessage()
+            if record.exc_info:
+                message += "\n" + logging.Formatter().formatException(record.exc_info)
+            self.store.append(record.levelname, message, record.name.rsplit(".", 1)[-1])
+        except Exception:
+            self.handleError(record)
+
+
+def start_file_sink(path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> QueueListener:
+    """
+    Attach a non-blocking rotating file sink to the root logger.
+    Log calls only enqueue the record; a listener thread does the disk I/O,
+    so the event loop never waits on the file system.
+    """
+    log_dir = os.path.dirname(path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
@@ -0,0 +1,138 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from .latency import LatencyStats
+
+MAX_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for the live process.
+    A daemon thread snapshots every thread's stack via sys._current_frames() each `interval`
+    seconds and counts identical stacks. Nothing is installed in the profiled code (no
+    sys.setprofile), so overhead is bounded by the sampling rate. One run at a time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+
+    def run(self, seconds: float, interval: float = 0.005) -> Dict[str, int]:
+        """Sample for `seconds` (blocking). Returns {collapsed stack: samples}."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        self.running = True
+        try:
+            return self._sample(seconds, interval)
+        finally:
+            self.running = False
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> Dict[str, int]:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return dict(stacks)
+
+
+def collapse(stacks: Dict[str, int]) -> str:
+    """Brendan Gregg's collapsed format (flamegraph.pl / speedscope): `frame;frame;frame count`."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class _Iteration:
+    __slots__ = ("timer", "started", "last", "excluded")
+
+    def __init__(self, timer: "PhaseTimer"):
+        self.timer = timer
+        self.started = self.last = time.perf_counter()
+        self.excluded = 0.0
+
+    def mark(self, phase: str):
+        """Close `phase`: time since the previous mark, minus nested phases recorded meanwhile."""
+        now = time.perf_counter()
+        self.timer.record(phase, (now - self.last) * 1000 - self.excluded)
+        self.last = now
+        self.excluded = 0.0
+
+    def nested(self, phase: str, ms: float):
+        """Record a phase measured elsewhere (e.g. order placement inside signal evaluation)."""
+        self.timer.record(phase, ms)
+        self.excluded += ms
+
+    def end(self):
+        self.timer.record("total", (time.perf_counter() - self.started) * 1000)
+        self.timer.current = _NOOP
+
+
+class _NoopIteration:
+    __slots__ = ()
+
+    def mark(self, phase: str):
+        pass
+
+    def nested(self, phase: str, ms: float):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP = _NoopIteration()
+
+
+class PhaseTimer:
+    """
+    Opt-in per-phase timing of trading_loop iterations, aggregated into percentiles.
+    Disabled, begin() returns a shared no-op so the loop pays one attribute check.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.enabled = False
+        self.enabled_at: Optional[float] = None
+        self.phases: Dict[str, LatencyStats] = {}
+        self.current = _NOOP
+
+    def enable(self, enabled: bool = True):
+        if enabled and not self.enabled:
+            self.phases = {}
+            self.enabled_at = time.time()
+        self.enabled = enabled
+
+    def begin(self):
+        self.current = _Iteration(self) if self.enabled else _NOOP
+        return self.current
+
+    def record(self, phase: str, ms: float):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = LatencyStats(self.capacity)
+        stats.record(ms)
+
+    def summary(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "since": self.enabled_at,
+            "phases": {name: stats.summary() for name, stats in self.phases.items()},
+        }
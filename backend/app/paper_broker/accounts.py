@@ -0,0 +1,357 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..risk_engine.engine import TradeRisk
+
+logger = logging.getLogger(__name__)
+
+MARKET, LIMIT, STOP = 0, 1, 2
+ORDER_TYPES = {"market": MARKET, "limit": LIMIT, "stop": STOP}
+BUY, SELL = 1, -1
+OPEN, FILLED, CANCELED, REJECTED = 0, 1, 2, 3
+STATUS_NAMES = {OPEN: "open", FILLED: "filled", CANCELED: "canceled", REJECTED: "rejected"}
+DUST = 1e-12
+
+ACCOUNT_COLUMNS = {
+    "balance": "f8", "holdings": "f8", "entry_price": "f8", "initial": "f8", "equity": "f8",
+    "realized_pnl": "f8", "fees": "f8", "fills": "i8",
+    "max_position_pct": "f8", "stop_loss_pct": "f8", "max_drawdown": "f8", "kill_switch": "?",
+    "dirty": "?", "persisted": "?",
+}
+ORDER_COLUMNS = {
+    "id": "i8", "account": "i8", "side": "i1", "type": "i1", "quantity": "f8", "price": "f8",
+    "status": "i1", "filled_price": "f8",
+}
+PERSISTED = ("balance", "holdings", "entry_price", "initial", "realized_pnl", "fees", "fills",
+             "max_position_pct", "stop_loss_pct", "max_drawdown", "kill_switch")
+
+
+class Columns:
+    """Equally sized NumPy columns with amortized O(1) appends (capacity doubles)."""
+    def __init__(self, dtypes: Dict[str, str], capacity: int = 1024):
+        self.size = 0
+        self.data = {name: np.zeros(capacity, dtype) for name, dtype in dtypes.items()}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.data[name][:self.size]  # View: in-place updates write through
+
+    def append(self, count: int, **values) -> np.ndarray:
+        start, end = self.size, self.size + count
+        capacity = len(next(iter(self.data.values())))
+        if end > capacity:
+            while capacity < end:
+                capacity *= 2
+            for name, column in self.data.items():
+                grown = np.zeros(capacity, column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.data[name] = grown
+        for name, value in values.items():
+            self.data[name][start:end] = value
+        self.size = end
+        return np.arange(start, end)
+
+    def keep(self, mask: np.ndarray):
+        """Drop the rows where `mask` is False, preserving order."""
+        kept = int(mask.sum())
+        for column in self.data.values():
+            column[:kept] = column[:self.size][mask]
+        self.size = kept
+
+
+class AccountBook:
+    """
+    Paper accounts for many users in columnar NumPy arrays: one row per account, one row per
+    order. A tick matches every open order, applies the fills, the per-account stop loss and
+    the drawdown kill switch as whole-array operations, so its cost barely depends on the
+    number of accounts. Risk semantics follow RiskEngine / TradeRisk; fills follow PaperBroker
+    (market orders with slippage, limits at their price, fees on notional).
+    Not thread safe: mutate it from the event loop only; `flush` rows are copied out first.
+    """
+    def __init__(self, fee_pct: float = 0.005, slippage_pct: float = 0.001):
+        self.fee_pct = fee_pct
+        self.slippage_pct = slippage_pct
+        self.accounts = Columns(ACCOUNT_COLUMNS)
+        self.orders = Columns(ORDER_COLUMNS, capacity=4096)
+        self.names: List[str] = []
+        self.next_order_id = 1
+        self.last_price = 0.0
+        self.ticks = 0
+        self.last_tick_ms = 0.0
+        self.loaded = False # Set once load() restored the persisted accounts; new ids are only safe after it
+
+    @property
+    def size(self) -> int:
+        return self.accounts.size
+
+    # --- Accounts ---
+
+    def create_account(self, name: str, balance: float, risk: Optional[TradeRisk] = None) -> int:
+        risk = risk or TradeRisk()
+        row = self.accounts.append(
+            1, balance=balance, initial=balance, equity=balance, max_position_pct=risk.max_position_size_pct,
+            stop_loss_pct=risk.stop_loss_pct, max_drawdown=risk.max_drawdown_limit, dirty=True)[0]
+        self.names.append(name)
+        return int(row) + 1  # Account ids are 1-based row numbers (also the DB primary key)
+
+    def _row(self, account_id: int) -> int:
+        if not 1 <= account_id <= self.accounts.size:
+            raise KeyError(account_id)
+        return account_id - 1
+
+    def account(self, account_id: int) -> dict:
+        row = self._row(account_id)
+        a = {name: self.accounts[name][row].item() for name in PERSISTED}
+        price = self.last_price
+        a.update(
+            id=account_id, name=self.names[row],
+            equity=a["balance"] + a["holdings"] * price if price else a["balance"],
+            unrealized_pnl=a["holdings"] * (price - a["entry_price"]) if price and a["holdings"] > DUST else 0.0,
+            open_orders=self.open_orders(account_id),
+        )
+        return a
+
+    # --- Orders ---
+
+    def submit_many(self, account_ids, sides, types, quantities, prices) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Place a batch of orders (sides: BUY/SELL, types: MARKET/LIMIT/STOP). Orders breaking an
+        account's risk limits are recorded as rejected. Returns (order ids, statuses).
+        """
+        rows = np.asarray(account_ids, dtype=np.int64) - 1
+        sides = np.asarray(sides, dtype=np.int8)
+        types = np.asarray(types, dtype=np.int8)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        if rows.size and (rows.min() < 0 or rows.max() >= self.accounts.size):
+            raise KeyError("Unknown account")
+        if np.any(quantities <= 0) or np.any(~np.isin(sides, (BUY, SELL))) or np.any(~np.isin(types, (MARKET, LIMIT, STOP))):
+            raise ValueError("Orders need a positive quantity, a side and a known type")
+        if np.any((types != MARKET) & (prices <= 0)):
+            raise ValueError("Limit and stop orders need a price")
+
+        # RiskEngine.validate_trade, vectorized: kill switch, then position size vs equity for buys
+        acc = self.accounts
+        equity = acc["balance"][rows] + acc["holdings"][rows] * self.last_price
+        reference = np.where(types == LIMIT, prices, self.last_price)
+        too_big = (sides == BUY) & (reference > 0) & (quantities * reference > acc["max_position_pct"][rows] * equity)
+        statuses = np.where(acc["kill_switch"][rows] | too_big, REJECTED, OPEN).astype(np.int8)
+
+        ids = np.arange(self.next_order_id, self.next_order_id + rows.size, dtype=np.int64)
+        self.next_order_id += rows.size
+        self.orders.append(rows.size, id=ids, account=rows, side=sides, type=types, quantity=quantities,
+                           price=prices, status=statuses)
+        return ids, statuses
+
+    def submit(self, account_id: int, side: str, type: str, quantity: float, price: float = 0.0) -> dict:
+        if side not in ("buy", "sell") or type not in ORDER_TYPES:
+            raise ValueError(f"Unsupported order: {side} {type}")
+        self._row(account_id)
+        ids, _ = self.submit_many([account_id], [BUY if side == "buy" else SELL], [ORDER_TYPES[type]], [quantity], [price])
+        return self._order(int(np.searchsorted(self.orders["id"], ids[0])))
+
+    def cancel(self, account_id: int, order_id: int) -> Optional[dict]:
+        ids = self.orders["id"]
+        pos = int(np.searchsorted(ids, order_id))  # Ids are increasing and compaction keeps the order
+        if pos >= ids.size or ids[pos] != order_id or self.orders["account"][pos] != self._row(account_id):
+            return None
+        if self.orders["status"][pos] == OPEN:
+            self.orders["status"][pos] = CANCELED
+        return self._order(pos)
+
+    def open_orders(self, account_id: int) -> List[dict]:
+        o = self.orders
+        positions = np.flatnonzero((o["account"] == self._row(account_id)) & (o["status"] == OPEN))
+        return [self._order(int(p)) for p in positions]
+
+    def _order(self, pos: int) -> dict:
+        o = self.orders
+        return {
+            "id": int(o["id"][pos]),
+            "account": int(o["account"][pos]) + 1,
+            "side": "buy" if o["side"][pos] == BUY else "sell",
+            "type": next(k for k, v in ORDER_TYPES.items() if v == o["type"][pos]),
+            "quantity": float(o["quantity"][pos]),
+            "price": float(o["price"][pos]),
+            "status": STATUS_NAMES[int(o["status"][pos])],
+            "filled_price": float(o["filled_price"][pos]),
+        }
+
+    # --- Tick ---
+
+    def tick(self, price: float) -> dict:
+        """Match all open orders at `price`, then apply stop losses and drawdown limits to every account."""
+        started = time.perf_counter()
+        self.last_price = price
+        acc, o = self.accounts, self.orders
+        n = acc.size
+        balance, holdings, entry = acc["balance"], acc["holdings"], acc["entry_price"]
+        kill, dirty = acc["kill_switch"], acc["dirty"]
+        fills = rejected = 0
+
+        # 1. Orders triggered at this price
+        side, kind, level, status = o["side"], o["type"], o["price"], o["status"]
+        buy = side == BUY
+        triggered = (status == OPEN) & (
+            (kind == MARKET)
+            | ((kind == LIMIT) & np.where(buy, price <= level, price >= level))
+            | ((kind == STOP) & np.where(buy, price >= level, price <= level))
+        )
+        idx = np.flatnonzero(triggered)
+        if idx.size:
+            rows, is_buy, qty = o["account"][idx], buy[idx], o["quantity"][idx]
+            fill = np.where(kind[idx] == LIMIT, level[idx],
+                            np.where(is_buy, price * (1 + self.slippage_pct), price * (1 - self.slippage_pct)))
+            notional = fill * qty
+            fee = notional * self.fee_pct
+
+            # Funds / holdings are checked per account over all of its fills in this tick
+            buy_cost = np.bincount(rows, weights=np.where(is_buy, notional + fee, 0.0), minlength=n)
+            sell_qty = np.bincount(rows, weights=np.where(is_buy, 0.0, qty), minlength=n)
+            buy_ok = (buy_cost <= balance + 1e-9) & ~kill
+            sell_ok = sell_qty <= holdings + DUST
+            ok = np.where(is_buy, buy_ok[rows], sell_ok[rows])
+            status[idx] = np.where(ok, FILLED, REJECTED)
+            o["filled_price"][idx[ok]] = fill[ok]
+            fills, rejected = int(ok.sum()), int((~ok).sum())
+
+            rows, is_buy, qty, notional, fee = rows[ok], is_buy[ok], qty[ok], notional[ok], fee[ok]
+            bought = np.bincount(rows, weights=np.where(is_buy, qty, 0.0), minlength=n)
+            sold = np.bincount(rows, weights=np.where(is_buy, 0.0, qty), minlength=n)
+            buy_value = np.bincount(rows, weights=np.where(is_buy, notional, 0.0), minlength=n)
+            sell_value = np.bincount(rows, weights=np.where(is_buy, 0.0, notional), minlength=n)
+            fees = np.bincount(rows, weights=fee, minlength=n)
+            sell_fees = np.bincount(rows, weights=np.where(is_buy, 0.0, fee), minlength=n)
+
+            touched = (bought > 0) | (sold > 0)
+            # Sells realize against the average entry held before this tick's buys
+            acc["realized_pnl"][:] += sell_value - sell_fees - sold * entry
+            remaining = holdings - sold
+            new_holdings = remaining + bought
+            basis = entry * remaining + buy_value
+            entry[touched] = np.where(new_holdings[touched] > DUST,
+                                      basis[touched] / np.maximum(new_holdings[touched], DUST), 0.0)
+            balance += sell_value - buy_value - fees
+            holdings[:] = np.where(new_holdings > DUST, new_holdings, 0.0)
+            acc["fees"][:] += fees
+            acc["fills"][:] += np.bincount(rows, minlength=n)
+            dirty |= touched
+
+        # 2. Stop loss: liquidate positions that fell stop_loss_pct below their entry
+        stopped = (holdings > DUST) & (entry > 0) & (price <= entry * (1 - acc["stop_loss_pct"]))
+        stop_count = int(stopped.sum())
+        if stop_count:
+            fill = price * (1 - self.slippage_pct)
+            value = holdings[stopped] * fill
+            fee = value * self.fee_pct
+            acc["realized_pnl"][stopped] += value - fee - holdings[stopped] * entry[stopped]
+            balance[stopped] += value - fee
+            acc["fees"][stopped] += fee
+            acc["fills"][stopped] += 1
+            holdings[stopped] = 0.0
+            entry[stopped] = 0.0
+            dirty |= stopped
+            status[(status == OPEN) & ~buy & stopped[o["account"]]] = CANCELED  # Nothing left to sell
+
+        # 3. Equity and the drawdown kill switch (RiskEngine: measured from the initial balance)
+        equity = acc["equity"]
+        equity[:] = balance + holdings * price
+        initial = acc["initial"]
+        engaged = ~kill & (initial > 0) & ((initial - equity) >= acc["max_drawdown"] * initial)
+        if engaged.any():
+            kill |= engaged
+            dirty |= engaged
+
+        # Closed orders are only kept until they outnumber the open ones
+        closed = o.size - int((status == OPEN).sum())
+        if closed > 4096 and closed > o.size // 2:
+            o.keep(status == OPEN)
+
+        self.ticks += 1
+        self.last_tick_ms = (time.perf_counter() - started) * 1000
+        return {"fills": fills, "rejected": rejected, "stopped": stop_count,
+                "killed": int(engaged.sum()), "ms": round(self.last_tick_ms, 3)}
+
+    def stats(self) -> dict:
+        acc = self.accounts
+        return {
+            "accounts": acc.size,
+            "open_orders": int((self.orders["status"] == OPEN).sum()),
+            "total_equity": float(acc["equity"].sum()),
+            "kill_switch": int(acc["kill_switch"].sum()),
+            "ticks": self.ticks,
+            "last_tick_ms": round(self.last_tick_ms, 3),
+        }
+
+    # --- Persistence ---
+
+    def pending_rows(self) -> Tuple[List[dict], List[dict]]:
+        """Copy out changed accounts as (inserts, updates) and clear their dirty flags."""
+        acc = self.accounts
+        rows = np.flatnonzero(acc["dirty"])
+        if not rows.size:
+            return [], []
+        now = time.time()
+        columns = {name: acc[name][rows].tolist() for name in PERSISTED}
+        persisted = acc["persisted"][rows].tolist()
+        inserts, updates = [], []
+        for i, row in enumerate(rows.tolist()):
+            record = {name: values[i] for name, values in columns.items()}
+            record.update(id=row + 1, updated_at=now)
+            if persisted[i]:
+                updates.append(record)
+            else:
+                record["name"] = self.names[row]
+                inserts.append(record)
+        acc["dirty"][rows] = False
+        acc["persisted"][rows] = True
+        return inserts, updates
+
+    def write(self, inserts: List[dict], updates: List[dict]):
+        """Bulk-persist rows from `pending_rows`. Blocking: run it in an executor."""
+        if not inserts and not updates:
+            return
+        from ..storage import database, models
+        session = database.SessionLocal()
+        try:
+            if inserts:
+                session.bulk_insert_mappings(models.PaperAccount, inserts)
+            if updates:
+                session.bulk_update_mappings(models.PaperAccount, updates)
+            session.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist paper accounts: {e}")
+            session.rollback()
+            # Retry on the next flush
+            self.accounts["dirty"][[r["id"] - 1 for r in inserts + updates]] = True
+            self.accounts["persisted"][[r["id"] - 1 for r in inserts]] = False
+        finally:
+            session.close()
+
+    def flush(self):
+        self.write(*self.pending_rows())
+
+    def load(self):
+        """Restore every persisted account (blocking). Open orders are not persisted."""
+        from ..storage import database, models
+        session = database.SessionLocal()
+        try:
+            records = session.query(models.PaperAccount).order_by(models.PaperAccount.id.asc()).all()
+            if not records:
+                self.loaded = True
+                return
+            if records[-1].id != len(records):
+                raise ValueError("paper_accounts ids are not contiguous")
+            values = {name: [getattr(r, name) or 0 for r in records] for name in PERSISTED}
+            self.accounts = Columns(ACCOUNT_COLUMNS, capacity=max(1024, len(records)))
+            self.accounts.append(len(records), persisted=True, **values)
+            self.accounts["equity"][:] = self.accounts["balance"] + self.accounts["holdings"] * self.last_price
+            self.names = [r.name for r in records]
+            self.loaded = True
+            logger.info(f"Paper accounts restored: {len(records)}")
+        except Exception as e:
+            logger.error(f"Failed to load paper accounts: {e}")
+        finally:
+            session.close()
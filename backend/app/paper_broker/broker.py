@@ -1,21 +1,53 @@
 import logging
-from dataclasses import dataclass
+import os
+import time
+import uuid
+from collections import deque
 from datetime import datetime
+from typing import Dict, List, Optional
+
+from . import fixedpoint as fx
+from . import ledger as position_ledger
+from .triggers import TriggerIndex
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+ORDER_HISTORY_WINDOW = int(os.getenv("ORDER_HISTORY_WINDOW", "500")) # Recent orders / fills kept in memory (all fills are in the DB)
+COMPACT_AFTER = 1000 # Canceled orders tolerated in the trigger index before it is rebuilt
+PERSIST_RETRIES = 3 # Attempts to write a booked fill (trade row, analytics, ledger snapshot)
+PERSIST_RETRY_DELAY = 0.1 # Seconds before the first retry, doubled after each failure
+
 class Order:
-    id: str
-    symbol: str
-    side: str  # 'buy' or 'sell'
-    type: str  # 'market' or 'limit'
-    quantity: float
-    price: float  # Limit price, or 0 for market
-    status: str = "open"  # open, filled, canceled
-    created_at: datetime = datetime.now()
-    filled_at: datetime = None
-    filled_price: float = 0.0
+    """
+    Slotted record (no per-instance __dict__): brokers keep many of these alive.
+    `to_dict` is the JSON shape served by /api/history.
+    """
+    __slots__ = ("id", "symbol", "side", "type", "quantity", "price", "status", "created_at",
+                 "filled_at", "filled_price", "stop_price", "trail_pct", "oco_group")
+
+    def __init__(self, id: str, symbol: str, side: str, type: str, quantity: float, price: float,
+                 status: str = "open", created_at: Optional[datetime] = None, filled_at: Optional[datetime] = None,
+                 filled_price: float = 0.0, stop_price: float = 0.0, trail_pct: float = 0.0,
+                 oco_group: Optional[str] = None):
+        self.id = id
+        self.symbol = symbol
+        self.side = side  # 'buy' or 'sell'
+        self.type = type  # 'market', 'limit', 'stop' or 'trailing_stop'
+        self.quantity = quantity
+        self.price = price  # Limit price, or 0 for market
+        self.status = status  # open, filled, canceled, rejected
+        self.created_at = created_at or datetime.now()
+        self.filled_at = filled_at
+        self.filled_price = filled_price
+        self.stop_price = stop_price  # 'stop': market order once price trades through it
+        self.trail_pct = trail_pct  # 'trailing_stop': distance from the best price since placement
+        self.oco_group = oco_group  # Filling one order of the group cancels the others
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Order({self.id!r}, {self.side} {self.quantity} {self.symbol} {self.type}, {self.status})"
 
 class PaperBroker:
     """
@@ -23,22 +55,47 @@ class PaperBroker:
     Match orders against real-time market data (ticker/book).
     """
     def __init__(self, initial_balance: float = 10000.0, fee_pct: float = 0.005, slippage_pct: float = 0.001):
-        self.balance = initial_balance  # BRL
-        self.holdings = 0.0             # BTC
-        self.orders = []
+        self.balance_cents = fx.to_cents(initial_balance)  # BRL, exact (see fixedpoint)
+        self.holdings_sats = 0                             # BTC, exact
+        self.orders: deque = deque(maxlen=ORDER_HISTORY_WINDOW) # Recently placed, any status
         self.fee_pct = fee_pct
+        self.fee_ppm = fx.to_ppm(fee_pct)
         self.slippage_pct = slippage_pct
-        self.trade_history = []
+        self.trade_history: deque = deque(maxlen=ORDER_HISTORY_WINDOW) # Recent fills; older ones only in the DB
+        self.open_orders: Dict[str, Order] = {}
+        self.pending_market: List[Order] = []
+        self.triggers = TriggerIndex() # Resting limit / stop / trailing orders, nearest trigger first
+        self.oco_groups: Dict[str, List[Order]] = {}
+        self.revision = 0 # Bumped on every order state change (history cache key)
+        self._canceled = 0 # Canceled orders possibly still in the trigger index
+        self.ledger = position_ledger.PositionLedger() # FIFO lots, average cost, PnL
         
         # Late import to avoid circular dep if any, though direct import is fine usually
         from ..storage.database import SessionLocal
-        from ..storage import models
+        from ..storage import models, analytics
         self.SessionLocal = SessionLocal
         self.models = models
+        self.analytics = analytics
         
         # Try to restore state
         self._load_state()
 
+    @property
+    def balance(self) -> float:
+        return fx.from_cents(self.balance_cents)
+
+    @balance.setter
+    def balance(self, value: float):
+        self.balance_cents = fx.to_cents(value)
+
+    @property
+    def holdings(self) -> float:
+        return fx.from_sats(self.holdings_sats)
+
+    @holdings.setter
+    def holdings(self, value: float):
+        self.holdings_sats = fx.to_sats(value)
+
     def _load_state(self):
         session = self.SessionLocal()
         try:
@@ -53,8 +110,8 @@ class PaperBroker:
                 
             # 2. Load Trade History
             # We map DB Trade model back to Order object approx for UI consistency
-            db_trades = session.query(self.models.Trade).order_by(self.models.Trade.entered_at.asc()).limit(50).all()
-            for t in db_trades:
+            db_trades = session.query(self.models.Trade).order_by(self.models.Trade.entered_at.desc()).limit(50).all()
+            for t in reversed(db_trades): # Most recent 50, oldest first
                 # Reconstruct Order object for history display
                 o = Order(
                     id=str(t.id),
@@ -69,6 +126,12 @@ class PaperBroker:
                     filled_price=t.entry_price
                 )
                 self.trade_history.append(o)
+
+            # 3. Position ledger: snapshot + fills since
+            self.ledger = position_ledger.load(session, self.fee_pct)
+            session.commit()
+            if abs(self.ledger.quantity - self.holdings) > 1e-8:
+                logger.warning(f"Ledger quantity {self.ledger.quantity:.8f} differs from stored holdings {self.holdings:.8f}")
             
         except Exception as e:
             logger.error(f"Failed to load broker state: {e}")
@@ -101,104 +164,162 @@ class PaperBroker:
         finally:
             session.close()
 
-    def _persist_trade(self, order: Order):
-        session = self.SessionLocal()
-        try:
-            trade = self.models.Trade(
-                symbol=order.symbol,
-                side=order.side,
-                entry_price=order.filled_price,
-                quantity=order.quantity,
-                status="filled",
-                entered_at=datetime.utcnow(),
-                strategy_name="SMA_Crossover" # Default for now
-            )
-            session.add(trade)
-            session.commit()
-        except Exception as e:
-            logger.error(f"Failed to persist trade: {e}")
-            session.rollback()
-        finally:
-            session.close()
+    def _persist_trade(self, order: Order, fee: float = 0.0):
+        """
+        Trade row, PnL analytics and the ledger snapshot in one transaction. The fill is already
+        booked (balances, ledger), so a failed write is retried rather than undoing anything.
+        """
+        for attempt in range(PERSIST_RETRIES):
+            session = self.SessionLocal()
+            try:
+                trade = self.models.Trade(
+                    symbol=order.symbol,
+                    side=order.side,
+                    entry_price=order.filled_price,
+                    quantity=order.quantity,
+                    status="filled",
+                    entered_at=datetime.utcnow(),
+                    strategy_name="SMA_Crossover" # Default for now
+                )
+                session.add(trade)
+                session.flush()
+                self.analytics.record_fill(session, trade, fee) # Round trips + PnL aggregates, same transaction
+                self.ledger.mark(trade.id, trade.entered_at)
+                position_ledger.save_snapshot(session, self.ledger)
+                session.commit()
+                return
+            except Exception as e:
+                session.rollback()
+                if attempt == PERSIST_RETRIES - 1:
+                    logger.error(f"Failed to persist trade: {e}")
+                    return
+                logger.warning(f"Persisting trade failed, retrying: {e}")
+            finally:
+                session.close()
+            time.sleep(PERSIST_RETRY_DELAY * 2 ** attempt)
 
     def place_order(self, order: Order) -> Order:
         logger.info(f"PaperBroker: Placing {order.side} order for {order.quantity} @ {order.type}")
+        if order.type == "market":
+            self.pending_market.append(order)
+        else:
+            self.triggers.add(order) # ValueError on unknown types
         self.orders.append(order)
+        self.open_orders[order.id] = order
+        self.revision += 1
         return order
 
+    def place_oco(self, orders: List[Order]) -> str:
+        """One-cancels-the-other: e.g. a take-profit limit and a stop protecting the same position."""
+        group = uuid.uuid4().hex[:12]
+        for order in orders:
+            order.oco_group = group
+        self.oco_groups[group] = orders
+        for order in orders:
+            self.place_order(order)
+        return group
+
     def cancel_order(self, order_id: str):
-        for o in self.orders:
-            if o.id == order_id and o.status == "open":
-                o.status = "canceled"
-                logger.info(f"Order {order_id} canceled.")
+        o = self.open_orders.get(order_id)
+        if o is not None and o.status == "open":
+            self._cancel(o)
+            logger.info(f"Order {order_id} canceled.")
+
+    def cancel_group(self, group: str):
+        for o in self.oco_groups.pop(group, []):
+            if o.status == "open":
+                self._cancel(o)
+
+    def _cancel(self, order: Order):
+        order.status = "canceled" # Dropped lazily from the trigger index
+        self._settle(order)
+        self._canceled += 1
+        if self._canceled > COMPACT_AFTER: # Far-off canceled orders may never reach a heap top
+            self.triggers.compact()
+            self._canceled = 0
+
+    def _settle(self, order: Order):
+        if self.open_orders.get(order.id) is order:
+            del self.open_orders[order.id]
+        self.revision += 1
+
+    def stop_level(self, order: Order) -> float:
+        """Where a stop / trailing stop currently sits."""
+        return self.triggers.trailing_stop_of(order) if order.type == "trailing_stop" else order.stop_price
 
     def process_data_tick(self, current_price: float):
         """
         Check open orders against current price.
         Simple simulation:
         - Market orders fill immediately at current_price (+/- slippage)
-        - Limit orders fill if price crosses limit.
+        - Limit orders fill at their limit once price crosses it
+        - Stop and trailing stop orders become market orders once triggered
+        Only the nearest trigger on each side is inspected, so resting orders cost nothing per tick.
         """
-        for order in self.orders:
-            if order.status != "open":
+        pending, self.pending_market = self.pending_market, []
+        for order in pending:
+            if order.status == "open":
+                self._execute_fill(order, self._market_price(order.side, current_price))
+
+        for order in self.triggers.on_tick(current_price):
+            if order.status != "open": # OCO partner filled earlier in this tick
                 continue
-            
-            should_fill = False
-            fill_price = current_price
-
-            if order.type == "market":
-                should_fill = True
-                # Apply slippage
-                if order.side == "buy":
-                    fill_price = current_price * (1 + self.slippage_pct)
-                else:
-                    fill_price = current_price * (1 - self.slippage_pct)
-            
-            elif order.type == "limit":
-                if order.side == "buy" and current_price <= order.price:
-                    should_fill = True
-                    fill_price = order.price # Naively fill at limit
-                elif order.side == "sell" and current_price >= order.price:
-                    should_fill = True
-                    fill_price = order.price
+            fill_price = order.price if order.type == "limit" else self._market_price(order.side, current_price)
+            self._execute_fill(order, fill_price)
+
+    def _market_price(self, side: str, current_price: float) -> float:
+        # Apply slippage
+        return current_price * (1 + self.slippage_pct) if side == "buy" else current_price * (1 - self.slippage_pct)
 
-            if should_fill:
-                self._execute_fill(order, fill_price)
+    def _close_group(self, order: Order):
+        if order.oco_group:
+            for other in self.oco_groups.pop(order.oco_group, []):
+                if other is not order and other.status == "open":
+                    self._cancel(other)
+
+    def _apply_to_ledger(self, order: Order, fee: float):
+        """Book the fill into the position ledger as it executes, independent of the DB write."""
+        try:
+            self.ledger.apply(order.side, order.quantity, order.filled_price, fee)
+        except Exception as e:
+            logger.error(f"Failed to apply fill to the position ledger: {e}")
 
     def _execute_fill(self, order: Order, price: float):
-        cost = price * order.quantity
-        fee = cost * self.fee_pct
-
-        if order.side == "buy":
-            if self.balance >= (cost + fee):
-                self.balance -= (cost + fee)
-                self.holdings += order.quantity
-                order.status = "filled"
-                order.filled_price = price
-                order.filled_at = datetime.now()
-                self.trade_history.append(order)
-                logger.info(f" FILLED BUY: {order.quantity} @ {price:.2f}")
-
-                # Persist
-                self._save_state()
-                self._persist_trade(order)
-            else:
-                logger.warning("Insufficient funds for paper trade.")
-                order.status = "rejected"
-
-        elif order.side == "sell":
-            if self.holdings >= order.quantity:
-                self.balance += (cost - fee)
-                self.holdings -= order.quantity
-                order.status = "filled"
-                order.filled_price = price
-                order.filled_at = datetime.now()
-                self.trade_history.append(order)
-                logger.info(f" FILLED SELL: {order.quantity} @ {price:.2f}")
-                
-                # Persist
-                self._save_state()
-                self._persist_trade(order)
+        if order.side not in ("buy", "sell"):
+            return
+        # Whole satoshis at a centavo price; cost and fee round up, proceeds round down
+        quantity, price_cents = fx.to_sats(order.quantity), fx.to_cents(price)
+        buy = order.side == "buy"
+        value = fx.notional(price_cents, quantity, round_up=buy)
+        fee = fx.fee(value, self.fee_ppm)
+
+        if quantity <= 0:
+            logger.warning(f"Paper order quantity {order.quantity} is below one satoshi.")
+            order.status = "rejected"
+        elif buy and self.balance_cents < value + fee:
+            logger.warning("Insufficient funds for paper trade.")
+            order.status = "rejected"
+        elif not buy and self.holdings_sats < quantity:
+            logger.warning("Insufficient holdings for paper trade.")
+            order.status = "rejected"
+        else:
+            if buy:
+                self.balance_cents -= value + fee
+                self.holdings_sats += quantity
             else:
-                logger.warning("Insufficient holdings for paper trade.")
-                order.status = "rejected"
+                self.balance_cents += value - fee
+                self.holdings_sats -= quantity
+            order.quantity = fx.from_sats(quantity)
+            order.status = "filled"
+            order.filled_price = fx.from_cents(price_cents)
+            order.filled_at = datetime.now()
+            self.trade_history.append(order)
+            self._apply_to_ledger(order, fx.from_cents(fee))
+            logger.info(f" FILLED {order.side.upper()}: {order.quantity} @ {order.filled_price:.2f}")
+        self._settle(order)
+        self._close_group(order)
+
+        if order.status == "filled":
+            # Persist
+            self._save_state()
+            self._persist_trade(order, fx.from_cents(fee))
@@ -0,0 +1,191 @@
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Optional, Union
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ..storage import models
+from ..storage.analytics import DUST, match_fifo
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "position_ledger"
+SNAPSHOT_VERSION = 1
+
+
+class PositionLedger:
+    """
+    Open position as FIFO lots [quantity, price, entry fee still attached]. Buys append a lot,
+    sells consume lots from the front, so each fill is amortized O(1): a lot is opened once and
+    closed once. Quantity, cost and open fees are running totals, never re-summed.
+    Realized PnL is net of entry and exit fees; unrealized PnL is net of the entry fees.
+    Sells are matched by storage.analytics.match_fifo, like the persisted open lots.
+    """
+    def __init__(self):
+        self.lots: deque = deque()
+        self.quantity = 0.0
+        self.cost = 0.0        # Sum of remaining quantity * entry price
+        self.open_fees = 0.0   # Entry fees of the remaining quantity
+        self.realized_pnl = 0.0
+        self.fees = 0.0        # All fees paid
+        self.fills = 0
+        self.last_fill: Optional[tuple] = None  # (entered_at, trade id) of the last applied fill
+
+    @property
+    def avg_price(self) -> float:
+        """Average entry price of the open quantity (0 when flat)."""
+        return self.cost / self.quantity if self.quantity > DUST else 0.0
+
+    @property
+    def break_even(self) -> float:
+        return (self.cost + self.open_fees) / self.quantity if self.quantity > DUST else 0.0
+
+    def unrealized_pnl(self, market: float) -> float:
+        return self.quantity * market - self.cost - self.open_fees if self.quantity > DUST else 0.0
+
+    def apply(self, side: str, quantity: float, price: float, fee: float = 0.0,
+              trade_id: Optional[int] = None, filled_at: Optional[datetime] = None) -> float:
+        """Apply one fill; returns its realized PnL (0 for buys)."""
+        self.fills += 1
+        self.fees += fee
+        if trade_id is not None:
+            self.last_fill = (filled_at or datetime.utcnow(), trade_id)
+        if quantity <= 0:
+            return 0.0
+
+        if side == "buy":
+            self.lots.append([quantity, price, fee])
+            self.quantity += quantity
+            self.cost += quantity * price
+            self.open_fees += fee
+            return 0.0
+
+        remaining = quantity
+        pnl = 0.0
+        lots = self.lots
+        for _, matched, entry_fee, _, lot_pnl in match_fifo(lots, quantity, price, fee):
+            lot = lots[0]  # Matches start at the oldest lot; fully closed ones are popped below
+            pnl += lot_pnl
+            self.quantity -= matched
+            self.cost -= matched * lot[1]
+            self.open_fees -= entry_fee
+            lot[0] -= matched
+            lot[2] -= entry_fee
+            remaining -= matched
+            if lot[0] <= DUST:
+                lots.popleft()
+        if remaining > DUST:
+            # Sold more than the ledger holds (e.g. a position opened before the ledger existed)
+            pnl -= fee / quantity * remaining
+            logger.warning(f"Ledger sell of {quantity} exceeded open lots by {remaining:.8f}")
+        if not lots:
+            self.quantity = self.cost = self.open_fees = 0.0  # Drop accumulated float residue when flat
+        self.realized_pnl += pnl
+        return pnl
+
+    def mark(self, trade_id: int, filled_at: datetime):
+        """Record the trade row of the last applied fill, once it has one (load() replays what follows)."""
+        self.last_fill = (filled_at, trade_id)
+
+    def summary(self, market: float = 0.0) -> dict:
+        return {
+            "quantity": self.quantity,
+            "avg_price": self.avg_price,
+            "break_even": self.break_even,
+            "lots": len(self.lots),
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl(market) if market > 0 else 0.0,
+            "fees": self.fees,
+            "fills": self.fills,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "v": SNAPSHOT_VERSION,
+            "lots": [list(lot) for lot in self.lots],
+            "realized_pnl": self.realized_pnl,
+            "fees": self.fees,
+            "fills": self.fills,
+            "last_fill": [self.last_fill[0].isoformat(), self.last_fill[1]] if self.last_fill else None,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "PositionLedger":
+        ledger = cls()
+        for quantity, price, fee in data.get("lots", []):
+            ledger.lots.append([quantity, price, fee])
+            ledger.quantity += quantity
+            ledger.cost += quantity * price
+            ledger.open_fees += fee
+        ledger.realized_pnl = data.get("realized_pnl", 0.0)
+        ledger.fees = data.get("fees", 0.0)
+        ledger.fills = data.get("fills", 0)
+        last = data.get("last_fill")
+        ledger.last_fill = (datetime.fromisoformat(last[0]), last[1]) if last else None
+        return ledger
+
+
+def save_snapshot(session: Session, ledger: Union[PositionLedger, dict]):
+    """
+    Upsert the snapshot of `ledger`, or a snapshot() taken earlier, e.g. on the order path
+    (caller commits, normally in the fill's transaction).
+    """
+    data = ledger.snapshot() if isinstance(ledger, PositionLedger) else ledger
+    value = json.dumps(data, separators=(",", ":"))
+    row = session.get(models.Configuration, SNAPSHOT_KEY)
+    if row is None:
+        session.add(models.Configuration(key=SNAPSHOT_KEY, value=value))
+    else:
+        row.value = value
+
+
+def invalidate(session: Session, trade: models.Trade) -> bool:
+    """
+    Drop the snapshot if it already counted `trade`, e.g. when reconcile merged late partial
+    fills into it, so the next load() replays every fill with the corrected row (caller commits).
+    """
+    row = session.get(models.Configuration, SNAPSHOT_KEY)
+    if row is None:
+        return False
+    try:
+        last = json.loads(row.value).get("last_fill")
+    except (ValueError, AttributeError):
+        last = None
+    if last and trade.entered_at is not None and (trade.entered_at, trade.id) > (datetime.fromisoformat(last[0]), last[1]):
+        return False  # Not replayed yet: load() picks up the merged row as a whole
+    session.delete(row)
+    logger.warning(f"Position ledger snapshot predates changes to trade {trade.id}; it will be rebuilt from all fills")
+    return True
+
+
+def load(session: Session, fee_pct: float = 0.0) -> PositionLedger:
+    """
+    Latest snapshot plus the fills persisted after it (e.g. imported by reconcile, or every
+    fill on a database that predates the ledger), re-snapshotted if any (caller commits).
+    Trades carry no fee column, so replayed fills are charged `fee_pct` of notional.
+    """
+    row = session.get(models.Configuration, SNAPSHOT_KEY)
+    ledger = PositionLedger()
+    if row is not None:
+        try:
+            ledger = PositionLedger.from_snapshot(json.loads(row.value))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Unreadable position ledger snapshot, replaying all fills: {e}")
+
+    query = session.query(models.Trade).filter(models.Trade.status == "filled")
+    if ledger.last_fill:
+        at, trade_id = ledger.last_fill
+        query = query.filter(or_(models.Trade.entered_at > at,
+                                 and_(models.Trade.entered_at == at, models.Trade.id > trade_id)))
+    replayed = 0
+    for trade in query.order_by(models.Trade.entered_at.asc(), models.Trade.id.asc()).yield_per(1000):
+        price, quantity = trade.entry_price or 0.0, trade.quantity or 0.0
+        ledger.apply(trade.side, quantity, price, price * quantity * fee_pct, trade.id, trade.entered_at)
+        replayed += 1
+    if replayed:
+        save_snapshot(session, ledger)
+        logger.info(f"Position ledger: replayed {replayed} fill(s) after the snapshot")
+    return ledger
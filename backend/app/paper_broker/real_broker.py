@@ -1,13 +1,23 @@
 
 import logging
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Optional
 from ..foxbit_client.binance_client import BinanceClient
-from ..storage import models, database
-from .broker import Order
+from ..observability.latency import LatencyStats
+from ..storage import models, database, analytics, repository
+from .broker import Order, ORDER_HISTORY_WINDOW, PERSIST_RETRIES, PERSIST_RETRY_DELAY
+from . import fixedpoint as fx
+from . import ledger as position_ledger
+from . import reconcile
 
 logger = logging.getLogger(__name__)
 
+REPLAY_FEE_PCT = 0.001 # Binance spot fee, charged to fills replayed into the ledger (trades store no fee)
+
 class RealBroker:
     """
     Real execution broker delegating to Binance.
@@ -22,212 +32,258 @@ class RealBroker:
              raise ValueError("Missing Binance Credentials")
              
         self.client = BinanceClient(self.api_key, self.api_secret)
-        self.balance = 0.0 # BRL
-        self.holdings = 0.0 # BTC
-        self.orders = []
+        self.balance_cents = 0 # BRL
+        self.holdings_sats = 0 # BTC, exact: step flooring and "sell all" never leave float dust
+        self.orders: deque = deque(maxlen=ORDER_HISTORY_WINDOW) # Full history is in the DB
+        self.revision = 0 # Bumped on every placed order (history cache key)
+        self.step_sats = 1000 # LOT_SIZE stepSize (0.00001 BTC), cached by load_filters()
+        self.exchange_rtt = LatencyStats() # Order POST round trips
+        # DB writes happen off the order path; a single worker keeps them in order
+        self._persist_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trade-persist")
         
+        # Clock offset + keep-alive connection first, so the first order is a single warm round trip
+        self.sync_time()
+        self.load_filters()
         # Initial Balance Sync
         self.sync_balances()
         self.sync_history() # Sync past trades
+        self.ledger = self.load_ledger() # Cost basis of the position, including the fills just synced
         self.last_sync = 0 # Initialize sync timer
         logger.info(f"🔌 Connected to Binance. Balance: R${self.balance:.2f} | BTC: {self.holdings}")
 
+    @property
+    def balance(self) -> float:
+        return fx.from_cents(self.balance_cents)
+
+    @balance.setter
+    def balance(self, value: float):
+        self.balance_cents = fx.to_cents(value)
+
+    @property
+    def holdings(self) -> float:
+        return fx.from_sats(self.holdings_sats)
+
+    @holdings.setter
+    def holdings(self, value: float):
+        self.holdings_sats = fx.to_sats(value)
+
+    @property
+    def step_size(self) -> float:
+        return fx.from_sats(self.step_sats)
+
+    def sync_time(self):
+        try:
+            self.client.sync_time()
+        except Exception as e:
+            logger.error(f"Failed to sync Binance clock: {e}")
+        self.last_time_sync = time.time()
+
+    def load_filters(self):
+        """Cache the LOT_SIZE step once instead of querying exchangeInfo on every order."""
+        try:
+            symbol_info = self.client.get_symbol_info("BTCBRL")
+            for f in symbol_info.get("filters", []):
+                if f["filterType"] == "LOT_SIZE":
+                    self.step_sats = fx.to_sats(float(f.get("stepSize", self.step_size)))
+        except Exception as e:
+            logger.error(f"Failed to load symbol filters: {e}")
+
     def sync_balances(self):
         try:
-            self.balance = self.client.get_asset_balance("BRL")
-            self.holdings = self.client.get_asset_balance("BTC")
+            balances = self.client.get_balances("BRL", "BTC") # Single account call
+            self.balance = balances["BRL"]
+            self.holdings = balances["BTC"]
         except Exception as e:
             logger.error(f"Failed to sync balances: {e}")
 
-    def sync_history(self):
+    def sync_history(self, page_size: int = 1000):
         """
-        Fetch historical trades from Binance and populate DB if missing.
+        Incrementally reconcile Binance fills into the DB.
+        Pages myTrades from the persisted fromId cursor, so cost is proportional to new fills
+        and nothing is skipped after downtime. Each page is aggregated per order, written with
+        one existence query and one bulk insert, and committed together with the cursor, so an
+        interruption resumes from the last complete page. Runs before the ledger is loaded:
+        fills merged into trades the ledger snapshot already counted make load_ledger() rebuild it.
         """
+        db = database.SessionLocal()
         try:
             logger.info("🔄 Syncing Trade History from Binance...")
-            binance_trades = self.client.get_my_trades("BTCBRL", limit=20)
-            
-            db = database.SessionLocal()
-            count = 0
-            
-            for t in binance_trades:
-                # Binance keys: id, orderId, price, qty, commission, time, isBuyer
-                trade_id = int(t['orderId']) # Using OrderID as Trade ID for 1-to-1 mapping
-                
-                exists = db.query(models.Trade).filter(models.Trade.id == trade_id).first()
-                if not exists:
-                    side = "buy" if t['isBuyer'] else "sell"
-                    price = float(t['price'])
-                    qty = float(t['qty'])
-                    dt = datetime.fromtimestamp(t['time'] / 1000)
-                    
-                    new_trade = models.Trade(
-                        id=trade_id,
-                        symbol="BTCBRL",
-                        side=side,
-                        quantity=qty,
-                        # price=price, <-- REMOVED (Invalid)
-                        status="filled",
-                        entered_at=dt,
-                        entry_price=price if side == "buy" else price, # Store effective price
-                        exit_price=price if side == "sell" else None
-                    )
-                    db.add(new_trade)
-                    count += 1
-            
-            if count > 0:
+            cursor = reconcile.load_cursor(db)
+            synced = inserted = merged = 0
+            while True:
+                page = self.client.get_my_trades("BTCBRL", limit=page_size, from_id=cursor)
+                if not page:
+                    break
+                result = reconcile.reconcile_fills(db, page, symbol="BTCBRL")
+                cursor = max(int(t['id']) for t in page) + 1
+                reconcile.save_cursor(db, cursor)
                 db.commit()
-                logger.info(f"✅ Synced {count} new trades from Binance to DB.")
-            else:
+                synced += len(page)
+                inserted += result["inserted"]
+                merged += result["merged"]
+                if len(page) < page_size:
+                    break
+
+            if not synced:
                 logger.info("✅ Trade History is up to date.")
-                
-            db.close()
+                return
+            logger.info(f"✅ Synced {synced} fills from Binance: {inserted} new orders, {merged} merged.")
             
         except Exception as e:
+            db.rollback()
             logger.error(f"Failed to sync history: {e}")
+        finally:
+            db.close()
+
+    def load_ledger(self) -> position_ledger.PositionLedger:
+        db = database.SessionLocal()
+        try:
+            ledger = position_ledger.load(db, REPLAY_FEE_PCT)
+            db.commit()
+            return ledger
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to load position ledger: {e}")
+            return position_ledger.PositionLedger()
+        finally:
+            db.close()
 
     @property
     def trade_history(self):
         """
         Fetch trade history from DB and format as Orders for Frontend consistency.
-        Matches logic in PaperBroker._load_state.
+        Blocking: the API reads it through repository.recent_trades instead.
         """
         try:
             db = database.SessionLocal()
-            trades = db.query(models.Trade).order_by(models.Trade.entered_at.desc()).limit(50).all()
-            db.close()
-            
-            # Transform DB Trade -> API Order format
-            formatted_history = []
-            for t in trades:
-                # Use entry_price as the filled_price representation
-                price = t.entry_price if t.entry_price is not None else 0.0
-                
-                # Create dict that mimics Order object attributes expected by frontend
-                o = {
-                    "id": str(t.id),
-                    "symbol": t.symbol,
-                    "side": t.side,
-                    "type": "market",
-                    "quantity": t.quantity,
-                    "price": price,
-                    "status": t.status,
-                    "created_at": t.entered_at,
-                    "filled_at": t.entered_at, # Frontend uses this for date formatting
-                    "filled_price": price      # Frontend uses this for display
-                }
-                formatted_history.append(o)
-                
-            return formatted_history
-            
+            try:
+                trades = db.query(models.Trade).order_by(models.Trade.entered_at.desc()).limit(50).all()
+                return [repository.trade_to_order(t) for t in trades]
+            finally:
+                db.close()
         except Exception as e:
             logger.error(f"Failed to fetch trade history: {e}")
             return []
 
     def place_order(self, order: Order) -> Order:
         """
-        Execute Real Order on Binance and persist to DB.
-        """
-    def place_order(self, order: Order) -> Order:
-        """
-        Execute Real Order on Binance and persist to DB.
+        Execute Real Order on Binance. The critical path is a single order POST: step size is
+        cached, balances are inferred from the FULL ack and the DB write is queued off-path.
         """
         try:
             logger.info(f"🚨 EXECUTING REAL ORDER: {order.side.upper()} {order.quantity} BTC")
+            step_sats = self.step_sats
+            target_sats = fx.to_sats(order.quantity)
+
+            # 1. Smart SELL Logic: Handle "Sell All" & Fees
+            # Holdings already reflect purchase fees (tracked from fill acks).
+            # If target is very close to holdings (>99%), assume Full Exit.
+            # E.g. Buy 0.00005 -> Get 0.00004995 -> Sell 0.00005 (Fail) -> Adjust to 0.00004995
+            if order.side.upper() == "SELL" and target_sats * 100 >= self.holdings_sats * 99:
+                logger.info(f"🔄 Smart Sell: Adjusting quantity {order.quantity} -> {self.holdings} (Max Available)")
+                target_sats = self.holdings_sats
             
-            # 1. Fetch Symbol Info (Step Size)
-            symbol_info = self.client.get_symbol_info("BTCBRL")
-            step_size = 0.00001 # Default fallback
-            for f in symbol_info.get("filters", []):
-                if f["filterType"] == "LOT_SIZE":
-                    step_size = float(f.get("stepSize", 0.00001))
-            
-            target_qty = order.quantity
-
-            # 2. Smart SELL Logic: Handle "Sell All" & Fees
-            if order.side.upper() == "SELL":
-                 # Sync latest balance to know exactly what we have (after purchase fees)
-                 self.sync_balances() # Updates self.holdings
-                 
-                 # If target is very close to holdings (>99%), assume Full Exit.
-                 # E.g. Buy 0.00005 -> Get 0.00004995 -> Sell 0.00005 (Fail) -> Adjust to 0.00004995
-                 if target_qty >= (self.holdings * 0.99):
-                     logger.info(f"🔄 Smart Sell: Adjusting quantity {target_qty} -> {self.holdings} (Max Available)")
-                     target_qty = self.holdings
-            
-            # 3. Normalize Quantity to Step Size
+            # 2. Normalize Quantity to Step Size, in whole satoshis (float division could land one step short)
             # Floor execution to nearest step size (e.g. 0.00004995 -> 0.00004)
             # This handles the "Dust" issue automatically.
-            import math
-            normalized_qty = float(int(target_qty / step_size) * step_size)
+            normalized_sats = fx.floor_to_step(target_sats, step_sats)
             
-            # 4. Format for API
-            # Avoids scientific notation and uses correct precision based on step size
-            import decimal
-            # Calculate decimals from step_size (e.g. 0.00001 -> 5 decimals)
-            decimals = 0
-            if step_size < 1:
-                decimals = int(abs(math.log10(step_size)))
-            
-            qty_str = "{:.{}f}".format(normalized_qty, decimals)
+            # 3. Format for API: exact decimal string with the step's precision
+            qty_str = fx.format_btc(normalized_sats, fx.step_decimals(step_sats))
 
-            logger.info(f"📏 Normalized Qty: {qty_str} (Step: {step_size})")
+            logger.info(f"📏 Normalized Qty: {qty_str} (Step: {fx.format_btc(step_sats)})")
 
-            if float(qty_str) <= 0:
+            if normalized_sats <= 0:
                  logger.warning("⚠️ Trade Quantity is Zero after normalization (Dust?). Skipping.")
                  return order
 
+            sent = time.perf_counter()
             response = self.client.create_order(
                 symbol="BTCBRL",
                 side=order.side,
-                quantity=float(qty_str), # Client handles formatting too, but we send float
+                quantity=fx.from_sats(normalized_sats), # Client formats it back to the same 8-decimal string
                 type="MARKET"
             )
+            self.exchange_rtt.record((time.perf_counter() - sent) * 1000)
             
             # Update Order Object with Real Fill Data
             order.status = "filled" if response.get("status") == "FILLED" else "open"
             
-            # Calculate Avg Price from Fills
+            # Calculate Avg Price (and fees in BRL) from Fills
             fills = response.get("fills", [])
+            fee = 0.0
             if fills:
                 total_qty = sum(float(f['qty']) for f in fills)
                 total_cost = sum(float(f['price']) * float(f['qty']) for f in fills)
                 order.filled_price = total_cost / total_qty if total_qty > 0 else 0.0
+                fee = sum(reconcile.fill_fee_brl(f) for f in fills)
             else:
                  # Fallback if no fills (shouldn't happen on market filled)
                  order.filled_price = float(response.get("cummulativeQuoteQty", 0)) / float(response.get("executedQty", 1))
 
             order.filled_at = datetime.now()
+            self.orders.append(order)
+            self.revision += 1
+            
+            # Balances straight from the ack; the periodic sync in process_data_tick corrects drift
+            brl, btc = reconcile.balance_deltas(order.side, response)
+            self.balance_cents += fx.to_cents(brl)
+            self.holdings_sats = max(0, self.holdings_sats + fx.to_sats(btc))
             
-            # Re-sync balances immediately
-            self.sync_balances()
+            # Position ledger follows the ack; its snapshot is taken here so the persist thread never reads the live ledger
+            trade_id = int(response.get("orderId", order.id))
+            executed_qty = float(response.get("executedQty") or order.quantity)
+            snapshot = None
+            if order.status == "filled":
+                try:
+                    self.ledger.apply(order.side, executed_qty, order.filled_price, fee, trade_id, order.filled_at)
+                    snapshot = self.ledger.snapshot()
+                except Exception as e:
+                    logger.error(f"Failed to apply fill to the position ledger: {e}")
+
+            # --- PERSISTENCE (Save to Supabase, off the order path) ---
+            self._persist_pool.submit(self._persist_trade, order, trade_id, executed_qty, fee, snapshot)
+            return order
             
-            # --- PERSISTENCE (Save to Supabase) ---
+        except Exception as e:
+            logger.error(f"❌ REAL ORDER FAILED: {e}")
+            order.status = "rejected"
+            self.sync_balances() # Inferred balances may be off (e.g. insufficient balance reject)
+            return order
+
+    def _persist_trade(self, order: Order, trade_id: int, quantity: float, fee: float, snapshot: Optional[dict] = None):
+        """Trade row, PnL analytics and the ledger snapshot taken at the ack, in one transaction, retried."""
+        for attempt in range(PERSIST_RETRIES):
+            db = database.SessionLocal()
             try:
-                db = database.SessionLocal()
                 db_trade = models.Trade(
-                    id=order.id,
+                    id=trade_id, # Exchange order id, shared with sync_history
                     symbol=order.symbol,
                     side=order.side,
-                    quantity=order.quantity,
-                    price=order.filled_price, # Use filled price
+                    quantity=quantity,
                     status=order.status,
                     entered_at=order.filled_at,
-                    entry_price=order.filled_price
+                    entry_price=order.filled_price, # Use filled price
+                    strategy_name="SMA_Crossover"
                 )
                 db.add(db_trade)
+                db.flush()
+                if order.status == "filled":
+                    analytics.record_fill(db, db_trade, fee)
+                if snapshot is not None:
+                    position_ledger.save_snapshot(db, snapshot)
                 db.commit()
-                db.close()
                 logger.info(f"💾 Real Trade {order.side} Saved to DB.")
+                return
             except Exception as e:
-                logger.error(f"Failed to save real trade to DB: {e}")
-            
-            return order
-            
-        except Exception as e:
-            logger.error(f"❌ REAL ORDER FAILED: {e}")
-            order.status = "rejected"
-            return order
+                db.rollback()
+                if attempt == PERSIST_RETRIES - 1:
+                    logger.error(f"Failed to save real trade to DB: {e}")
+                    return
+                logger.warning(f"Saving real trade failed, retrying: {e}")
+            finally:
+                db.close()
+            time.sleep(PERSIST_RETRY_DELAY * 2 ** attempt)
 
     def cancel_order(self, order_id: str):
         logger.warning("Cancel order not fully implemented for Market Orders (Instant fill)")
@@ -238,8 +294,9 @@ class RealBroker:
         Called by main loop. RealBroker delegates execution to Binance.
         Periodically sync balance to detect deposits.
         """
-        import time
-        if time.time() - self.last_sync > 60: # Sync every 60 seconds
+        if time.time() - self.last_sync > 60: # Sync every 60 seconds (also keeps the connection warm)
              # logger.debug("⏳ Auto-Syncing Balances...") 
              self.sync_balances()
              self.last_sync = time.time()
+        if time.time() - self.last_time_sync > 600: # Clock drift check every 10 minutes
+             self.sync_time()
@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..storage import models, analytics
+from . import ledger as position_ledger
+
+logger = logging.getLogger(__name__)
+
+SYNC_STRATEGY = "binance_sync"  # strategy_name of rows created by the reconciler
+CURSOR_KEY = "binance_trade_cursor"  # Configuration key holding the next myTrades fromId
+
+
+def fill_fee_brl(fill: dict) -> float:
+    """Commission of one Binance fill expressed in BRL (BNB / other assets are ignored)."""
+    commission = float(fill.get("commission", 0.0))
+    asset = fill.get("commissionAsset")
+    if asset == "BRL":
+        return commission
+    if asset == "BTC":
+        return commission * float(fill["price"])
+    return 0.0
+
+
+def balance_deltas(side: str, response: dict) -> Tuple[float, float]:
+    """(BRL, BTC) free balance change implied by a FULL order ack, commissions included."""
+    qty = float(response.get("executedQty", 0.0))
+    quote = float(response.get("cummulativeQuoteQty", 0.0))
+    brl, btc = (-quote, qty) if side.upper() == "BUY" else (quote, -qty)
+    for f in response.get("fills", []):
+        if f.get("commissionAsset") == "BRL":
+            brl -= float(f["commission"])
+        elif f.get("commissionAsset") == "BTC":
+            btc -= float(f["commission"])
+    return brl, btc
+
+
+def aggregate_fills(fills: List[dict]) -> Dict[int, dict]:
+    """
+    Collapse myTrades fills into one record per orderId:
+    total qty, volume-weighted price, fees (BRL) and the time of the first fill.
+    """
+    orders: Dict[int, dict] = {}
+    for f in fills:
+        order_id = int(f["orderId"])
+        qty = float(f["qty"])
+        quote = float(f.get("quoteQty") or float(f["price"]) * qty)
+        agg = orders.get(order_id)
+        if agg is None:
+            orders[order_id] = {
+                "side": "buy" if f["isBuyer"] else "sell",
+                "qty": qty,
+                "quote": quote,
+                "fee": fill_fee_brl(f),
+                "time": int(f["time"]),
+                "fills": 1,
+            }
+        else:
+            agg["qty"] += qty
+            agg["quote"] += quote
+            agg["fee"] += fill_fee_brl(f)
+            agg["time"] = min(agg["time"], int(f["time"]))
+            agg["fills"] += 1
+    return orders
+
+
+def reconcile_fills(session: Session, fills: List[dict], symbol: str = "BTCBRL") -> dict:
+    """
+    Merge a batch of new fills into `trades` (caller commits).
+    One set-based existence query, one bulk insert for unseen orders. Orders already imported
+    by a previous reconcile get their new partial fills merged (and a position ledger snapshot
+    that already counted them is dropped); rows written by the live order path are
+    authoritative and left untouched.
+    """
+    orders = aggregate_fills(fills)
+    if not orders:
+        return {"inserted": 0, "merged": 0, "skipped": 0}
+
+    existing = {
+        t.id: t for t in session.query(models.Trade).filter(models.Trade.id.in_(list(orders))).all()
+    }
+
+    new_trades = []
+    merged = skipped = 0
+    for order_id, agg in sorted(orders.items(), key=lambda item: item[1]["time"]):
+        price = agg["quote"] / agg["qty"] if agg["qty"] > 0 else 0.0
+        trade = existing.get(order_id)
+        if trade is None:
+            new_trades.append((models.Trade(
+                id=order_id,
+                symbol=symbol,
+                side=agg["side"],
+                quantity=agg["qty"],
+                status="filled",
+                entered_at=datetime.fromtimestamp(agg["time"] / 1000),
+                entry_price=price,
+                exit_price=price if agg["side"] == "sell" else None,
+                strategy_name=SYNC_STRATEGY,
+            ), agg["fee"]))
+        elif trade.strategy_name == SYNC_STRATEGY:
+            # Later partial fills of an order we imported earlier: merge, and feed the delta to analytics
+            delta = models.Trade(
+                id=order_id, symbol=symbol, side=agg["side"], quantity=agg["qty"], entry_price=price,
+                entered_at=datetime.fromtimestamp(agg["time"] / 1000), strategy_name=SYNC_STRATEGY,
+            )
+            total_qty = trade.quantity + agg["qty"]
+            trade.entry_price = (trade.entry_price * trade.quantity + agg["quote"]) / total_qty
+            trade.quantity = total_qty
+            trade.pnl = (trade.pnl or 0.0) + analytics.record_fill(session, delta, agg["fee"])
+            position_ledger.invalidate(session, trade)
+            merged += 1
+        else:
+            skipped += 1
+
+    if new_trades:
+        session.add_all([t for t, _ in new_trades])
+        session.flush()  # Single batched INSERT
+        for trade, fee in new_trades:
+            analytics.record_fill(session, trade, fee)
+
+    return {"inserted": len(new_trades), "merged": merged, "skipped": skipped}
+
+
+def load_cursor(session: Session) -> int:
+    row = session.get(models.Configuration, CURSOR_KEY)
+    return int(row.value) if row else 0
+
+
+def save_cursor(session: Session, cursor: int):
+    row = session.get(models.Configuration, CURSOR_KEY)
+    if row is None:
+        session.add(models.Configuration(key=CURSOR_KEY, value=str(cursor)))
+    else:
+        row.value = str(cursor)
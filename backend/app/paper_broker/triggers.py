@@ -0,0 +1,160 @@
+import heapq
+import itertools
+from collections import deque
+from typing import Callable, Dict, List
+
+_seq = itertools.count()  # Tie-breaker so heap entries never compare orders
+
+
+class PriceIndex:
+    """
+    Orders keyed by trigger price in a heap whose top is the nearest trigger. `fires_above`
+    is True for orders that trigger when the market trades at or above their price (sell
+    limits, buy stops) and False for at or below (buy limits, sell stops). Canceled / filled
+    orders are skipped lazily when they reach the top.
+    """
+    def __init__(self, fires_above: bool, price_of: Callable):
+        self.fires_above = fires_above
+        self.price_of = price_of
+        self.heap: List[tuple] = []
+
+    def push(self, order):
+        price = self.price_of(order)
+        heapq.heappush(self.heap, (price if self.fires_above else -price, next(_seq), order))
+
+    def pop_triggered(self, market: float) -> List:
+        """Pop every open order triggered at `market` price, nearest first."""
+        triggered = []
+        heap = self.heap
+        while heap:
+            key, _, order = heap[0]
+            if order.status != "open":
+                heapq.heappop(heap)
+                continue
+            price = key if self.fires_above else -key
+            if (market >= price) if self.fires_above else (market <= price):
+                heapq.heappop(heap)
+                triggered.append(order)
+            else:
+                break
+        return triggered
+
+    def compact(self):
+        """Drop every non-open order, not just those that reached the top."""
+        self.heap = [entry for entry in self.heap if entry[2].status == "open"]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class TrailingBook:
+    """
+    Trailing stops sharing one trail percentage. A sell trailer fires when price falls `pct`
+    below the highest price since it was placed (buy trailers mirror this on the lowest price).
+
+    Orders are grouped in buckets by their extreme. After each tick every bucket's extreme is
+    at least as far out as the current price, so buckets form a stack ordered by extreme: a
+    new extreme only collapses buckets at the near end (amortized O(1)) and the trigger check
+    only looks at the far end, the bucket with the tightest stop level.
+    """
+    def __init__(self, pct: float, sell: bool):
+        self.pct = pct
+        self.sell = sell
+        self.buckets: deque = deque()  # [extreme, orders]; far end (tightest level) at index 0
+
+    def _beyond(self, a: float, b: float) -> bool:
+        """a is a more extreme price than b (higher for sells, lower for buys)."""
+        return a > b if self.sell else a < b
+
+    def level(self, extreme: float) -> float:
+        return extreme * (1 - self.pct) if self.sell else extreme * (1 + self.pct)
+
+    def on_tick(self, market: float, placed: List = ()) -> List:
+        """Advance to `market`, anchor orders `placed` since the last tick on it, return triggered orders."""
+        buckets = self.buckets
+        # 1. Raise (lower, for buys) the extremes the market just passed: merge them into one bucket
+        if buckets and self._beyond(market, buckets[-1][0]):
+            merged = buckets.pop()[1]
+            while buckets and self._beyond(market, buckets[-1][0]):
+                other = buckets.pop()[1]
+                if len(other) > len(merged):
+                    merged, other = other, merged
+                merged.extend(other)
+            buckets.append([market, merged])
+        if placed:
+            if buckets and buckets[-1][0] == market:
+                buckets[-1][1].extend(placed)
+            else:
+                buckets.append([market, list(placed)])
+
+        # 2. Fire buckets whose stop level has been crossed, tightest first
+        triggered = []
+        while buckets:
+            level = self.level(buckets[0][0])
+            if (market <= level) if self.sell else (market >= level):
+                triggered.extend(o for o in buckets.popleft()[1] if o.status == "open")
+            else:
+                break
+        return triggered
+
+    def compact(self):
+        for bucket in self.buckets:
+            bucket[1] = [o for o in bucket[1] if o.status == "open"]
+        self.buckets = deque(b for b in self.buckets if b[1])
+
+    def stop_of(self, order) -> float:
+        """Current stop level of `order` (O(buckets): for display, not the tick path)."""
+        for extreme, orders in self.buckets:
+            if order in orders:
+                return self.level(extreme)
+        return 0.0
+
+    def __len__(self):
+        return sum(len(orders) for _, orders in self.buckets)
+
+
+class TriggerIndex:
+    """All resting conditional orders of a broker, split by side and type."""
+    def __init__(self):
+        self.buy_limits = PriceIndex(fires_above=False, price_of=lambda o: o.price)
+        self.sell_limits = PriceIndex(fires_above=True, price_of=lambda o: o.price)
+        self.buy_stops = PriceIndex(fires_above=True, price_of=lambda o: o.stop_price)
+        self.sell_stops = PriceIndex(fires_above=False, price_of=lambda o: o.stop_price)
+        self.trailing: Dict[tuple, TrailingBook] = {}  # (side, pct) -> book
+        self.pending_trailing: Dict[tuple, List] = {}  # Placed since the last tick: anchored on the next price
+
+    def add(self, order):
+        if order.type == "limit":
+            (self.buy_limits if order.side == "buy" else self.sell_limits).push(order)
+        elif order.type == "stop":
+            (self.buy_stops if order.side == "buy" else self.sell_stops).push(order)
+        elif order.type == "trailing_stop":
+            key = (order.side, order.trail_pct)
+            if key not in self.trailing:
+                self.trailing[key] = TrailingBook(order.trail_pct, sell=order.side == "sell")
+            self.pending_trailing.setdefault(key, []).append(order)
+        else:
+            raise ValueError(f"Unsupported conditional order type: {order.type}")
+
+    def on_tick(self, market: float) -> List:
+        """Orders triggered at `market`, limits first, then stops, then trailing stops."""
+        triggered = self.buy_limits.pop_triggered(market) + self.sell_limits.pop_triggered(market)
+        triggered += self.buy_stops.pop_triggered(market) + self.sell_stops.pop_triggered(market)
+        pending, self.pending_trailing = self.pending_trailing, {}
+        for key, book in self.trailing.items():
+            placed = pending.get(key, ())
+            if book.buckets or placed:
+                triggered += book.on_tick(market, placed)
+        return triggered
+
+    def compact(self):
+        for index in (self.buy_limits, self.sell_limits, self.buy_stops, self.sell_stops):
+            index.compact()
+        for book in self.trailing.values():
+            book.compact()
+        self.pending_trailing = {k: [o for o in v if o.status == "open"] for k, v in self.pending_trailing.items()}
+
+    def trailing_stop_of(self, order) -> float:
+        book = self.trailing.get((order.side, order.trail_pct))
+        return book.stop_of(order) if book else 0.0
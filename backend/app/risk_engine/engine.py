@@ -30,7 +30,29 @@ class RiskEngine:
         self.current_balance = total_equity # We track equity as 'balance' for drawdown purposes
         self._check_global_drawdown()
 
+    def set_balance(self, balance: float):
+        """Alias of update_equity for callers tracking a single balance figure"""
+        self.update_equity(balance)
 
+    def snapshot(self) -> dict:
+        """Counters and reference balances needed to resume after a restart"""
+        return {
+            "initial_balance": self.initial_balance,
+            "current_balance": self.current_balance,
+            "cooldown_until": self.cooldown_until.timestamp() if self.cooldown_until > datetime.min else 0.0,
+            "daily_trades": self.daily_trades,
+            "consecutive_losses": self.consecutive_losses,
+            "kill_switch_active": self.kill_switch_active,
+        }
+
+    def restore(self, snapshot: dict):
+        self.initial_balance = snapshot.get("initial_balance", 0.0)
+        self.current_balance = snapshot.get("current_balance", 0.0)
+        cooldown = snapshot.get("cooldown_until", 0.0)
+        self.cooldown_until = datetime.fromtimestamp(cooldown) if cooldown else datetime.min
+        self.daily_trades = snapshot.get("daily_trades", 0)
+        self.consecutive_losses = snapshot.get("consecutive_losses", 0)
+        self.kill_switch_active = snapshot.get("kill_switch_active", False)
 
     def _check_global_drawdown(self):
         if self.initial_balance <= 0:
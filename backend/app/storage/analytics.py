@@ -0,0 +1,188 @@
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+DUST = 1e-12  # Remaining lot quantity treated as zero
+
+
+def _buckets(trade_time: datetime, strategy: str) -> List[Tuple[str, str]]:
+    return [("all", "all"), ("day", trade_time.date().isoformat()), ("strategy", strategy)]
+
+
+def _summary(session: Session, scope: str, bucket: str) -> models.PnlSummary:
+    row = session.get(models.PnlSummary, (scope, bucket))
+    if row is None:
+        row = models.PnlSummary(scope=scope, bucket=bucket, fills=0, round_trips=0, wins=0, losses=0,
+                                realized_pnl=0.0, fees=0.0, volume=0.0)
+        session.add(row)
+        session.flush()  # Sessions don't autoflush; make the new row visible to get()
+    return row
+
+
+def match_fifo(lots: Iterable[Sequence[float]], quantity: float, price: float, fee: float = 0.0) -> List[tuple]:
+    """
+    FIFO matching shared by these tables and the in-memory position ledger. `lots` are
+    (remaining quantity, entry price, entry fee of the remaining quantity), oldest first. A sell
+    of `quantity` at `price` paying `fee` consumes them in order; returns one
+    (lot index, matched, entry fee share, exit fee share, pnl) per lot it touches and stops
+    reading `lots` once filled, so callers only pay for the lots they close (plus one peek).
+    """
+    matches = []
+    remaining = quantity
+    exit_fee_per_unit = fee / quantity if quantity > 0 else 0.0
+    for index, (lot_qty, lot_price, lot_fee) in enumerate(lots):
+        if remaining <= DUST:
+            break
+        matched = min(lot_qty, remaining)
+        entry_fee = lot_fee * (matched / lot_qty) if lot_qty > 0 else 0.0
+        exit_fee = exit_fee_per_unit * matched
+        matches.append((index, matched, entry_fee, exit_fee, (price - lot_price) * matched - entry_fee - exit_fee))
+        remaining -= matched
+    return matches
+
+
+def record_fill(session: Session, trade: models.Trade, fee: float = 0.0) -> float:
+    """
+    Update lots, round trips and summaries for one persisted fill (same transaction as the trade).
+    Buys open a lot; sells are matched FIFO against open lots of the same symbol.
+    Sets `trade.pnl` on sells and exit_price/exited_at/pnl on buys once fully closed.
+    Returns the realized PnL of the fill (0 for buys).
+    """
+    if trade.id is None:
+        session.flush()  # Need the trade id for lot / round-trip references
+
+    symbol = (trade.symbol or "").upper()
+    strategy = trade.strategy_name or "unknown"
+    price = float(trade.entry_price or 0.0)
+    qty = float(trade.quantity or 0.0)
+    filled_at = trade.entered_at or datetime.utcnow()
+
+    for scope, bucket in _buckets(filled_at, strategy):
+        row = _summary(session, scope, bucket)
+        row.fills += 1
+        row.fees += fee
+        row.volume += price * qty
+
+    if trade.side == "buy":
+        session.add(models.OpenLot(
+            trade_id=trade.id, symbol=symbol, strategy_name=strategy, price=price,
+            quantity=qty, remaining=qty, fee=fee, exit_value=0.0, realized_pnl=0.0, opened_at=filled_at,
+        ))
+        session.flush()
+        return 0.0
+
+    remaining = qty
+    total_pnl = 0.0
+    lots = (
+        session.query(models.OpenLot)
+        .filter(models.OpenLot.symbol == symbol)
+        .order_by(models.OpenLot.id.asc())
+        .all()
+    )
+    open_lots = ((lot.remaining, lot.price, lot.fee * lot.remaining / lot.quantity if lot.quantity else 0.0) for lot in lots)
+    for index, matched, entry_fee, exit_fee, pnl in match_fifo(open_lots, qty, price, fee):
+        lot = lots[index]
+        fees = entry_fee + exit_fee
+
+        session.add(models.RoundTrip(
+            symbol=symbol, strategy_name=lot.strategy_name, buy_trade_id=lot.trade_id, sell_trade_id=trade.id,
+            quantity=matched, entry_price=lot.price, exit_price=price, fees=fees, pnl=pnl,
+            opened_at=lot.opened_at, closed_at=filled_at,
+        ))
+        for scope, bucket in _buckets(filled_at, lot.strategy_name):
+            row = _summary(session, scope, bucket)
+            row.round_trips += 1
+            row.wins += 1 if pnl > 0 else 0
+            row.losses += 1 if pnl <= 0 else 0
+            row.realized_pnl += pnl
+
+        lot.remaining -= matched
+        lot.exit_value += matched * price
+        lot.realized_pnl += pnl
+        remaining -= matched
+        total_pnl += pnl
+
+        if lot.remaining <= DUST:
+            buy = session.get(models.Trade, lot.trade_id)
+            if buy is not None:
+                buy.exit_price = lot.exit_value / lot.quantity
+                buy.exited_at = filled_at
+                buy.pnl = lot.realized_pnl
+            session.delete(lot)
+
+    session.flush()
+    if remaining > DUST:
+        logger.warning(f"Sell of {qty} {symbol} exceeded open lots by {remaining:.8f} (unmatched)")
+    trade.pnl = total_pnl
+    return total_pnl
+
+
+def rebuild(session: Session, fee_pct: float = 0.0, chunk_size: int = 1000):
+    """
+    Recompute lots, round trips and summaries from the full trade history.
+    Historical fills carry no fee, so `fee_pct` of notional is assumed.
+    """
+    session.query(models.OpenLot).delete()
+    session.query(models.RoundTrip).delete()
+    session.query(models.PnlSummary).delete()
+    trades: Iterable[models.Trade] = (
+        session.query(models.Trade)
+        .filter(models.Trade.status == "filled")
+        .order_by(models.Trade.entered_at.asc(), models.Trade.id.asc())
+        .yield_per(chunk_size)
+    )
+    count = 0
+    for trade in trades:
+        record_fill(session, trade, fee=(trade.entry_price or 0.0) * (trade.quantity or 0.0) * fee_pct)
+        count += 1
+    session.commit()
+    logger.info(f"PnL analytics rebuilt from {count} trades")
+
+
+def ensure_indexes(engine):
+    """create_all() skips indexes on tables that already exist; add any that are missing."""
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                logger.warning(f"Could not create index {index.name}: {e}")
+
+
+def summary(session: Session, days: int = 30) -> dict:
+    """Aggregates: overall, per strategy and the last `days` day buckets."""
+    def as_dict(row: Optional[models.PnlSummary]) -> dict:
+        if row is None:
+            return {"fills": 0, "round_trips": 0, "wins": 0, "losses": 0, "win_rate": 0.0,
+                    "realized_pnl": 0.0, "fees": 0.0, "volume": 0.0}
+        return {
+            "fills": row.fills,
+            "round_trips": row.round_trips,
+            "wins": row.wins,
+            "losses": row.losses,
+            "win_rate": row.wins / row.round_trips if row.round_trips else 0.0,
+            "realized_pnl": row.realized_pnl,
+            "fees": row.fees,
+            "volume": row.volume,
+        }
+
+    total = session.get(models.PnlSummary, ("all", "all"))
+    strategies = session.query(models.PnlSummary).filter(models.PnlSummary.scope == "strategy").all()
+    day_rows = (
+        session.query(models.PnlSummary)
+        .filter(models.PnlSummary.scope == "day")
+        .order_by(models.PnlSummary.bucket.desc())
+        .limit(days)
+        .all()
+    )
+    return {
+        "total": as_dict(total),
+        "by_strategy": {r.bucket: as_dict(r) for r in strategies},
+        "by_day": {r.bucket: as_dict(r) for r in reversed(day_rows)},
+    }
@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Tuple
+from uuid import uuid4
 
 import os
 
@@ -8,6 +11,14 @@ import os
 DEFAULT_DB_URL = "sqlite:///./storage.db"
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DB_URL)
 
+# Pool tuning (Supabase round trips from the VPS are tens of ms: keep warm connections around)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800")) # Seconds; the pooler drops idle connections
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")) # Compiled SQL statements cached
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256")) # asyncpg prepared statements
+PGBOUNCER_PORT = 6543 # Supabase transaction pooler: no server-side prepared statements
+
 # Ensure directory exists if it's a file path
 if "sqlite" in SQLALCHEMY_DATABASE_URL and "/" in SQLALCHEMY_DATABASE_URL:
     db_path = SQLALCHEMY_DATABASE_URL.replace("sqlite:///", "")
@@ -20,9 +31,34 @@ connect_args = {}
 if "sqlite" in SQLALCHEMY_DATABASE_URL:
     connect_args = {"check_same_thread": False}
 
+def engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": True, "query_cache_size": DB_QUERY_CACHE_SIZE}
+    if not url.startswith("sqlite"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_recycle=DB_POOL_RECYCLE)
+    return options
+
+pool_counters = {"connects": 0, "checkouts": 0, "invalidated": 0}
+async_pool_counters = {"connects": 0, "checkouts": 0, "invalidated": 0}
+
+def _instrument(sync_engine, name: str):
+    counters = pool_counters if name == "sync" else async_pool_counters
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_conn, record):
+        counters["connects"] += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_conn, record, proxy):
+        counters["checkouts"] += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_conn, record, exception):
+        counters["invalidated"] += 1 # e.g. pre-ping found a dead connection
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args=connect_args
+    SQLALCHEMY_DATABASE_URL, connect_args=connect_args, **engine_options(SQLALCHEMY_DATABASE_URL)
 )
+_instrument(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -33,3 +69,69 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# --- Async layer (asyncpg / aiosqlite), created on first use ---
+
+_async_engine = None
+_async_sessionmaker = None
+
+def async_database_url(url: str) -> Tuple[str, dict]:
+    """Map the sync DATABASE_URL onto its async driver. Returns (url, driver connect_args)."""
+    u = make_url(url)
+    args = {}
+    if u.drivername.startswith("sqlite"):
+        u = u.set(drivername="sqlite+aiosqlite")
+    elif u.drivername.startswith("postgresql"):
+        query = dict(u.query)
+        sslmode = query.pop("sslmode", None) # psycopg2 spelling; asyncpg takes `ssl`
+        if sslmode:
+            args["ssl"] = sslmode
+        if u.port == PGBOUNCER_PORT:
+            # Transaction pooling hands each transaction a different backend: disable both caches
+            # and give prepared statements unique names
+            args["statement_cache_size"] = 0
+            args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+            query["prepared_statement_cache_size"] = "0"
+        else:
+            query.setdefault("prepared_statement_cache_size", str(DB_STATEMENT_CACHE_SIZE))
+        u = u.set(drivername="postgresql+asyncpg", query=query)
+    return u.render_as_string(hide_password=False), args
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        url, args = async_database_url(SQLALCHEMY_DATABASE_URL)
+        _async_engine = create_async_engine(url, connect_args=args, **engine_options(url))
+        _instrument(_async_engine.sync_engine, "async")
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+def AsyncSessionLocal():
+    """New AsyncSession (use as `async with AsyncSessionLocal() as session`)."""
+    get_async_engine()
+    return _async_sessionmaker()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
+
+def pool_status() -> dict:
+    """Pool occupancy and connection counters for both engines."""
+    def describe(pool, counters) -> dict:
+        stats = {"pool": type(pool).__name__, **counters}
+        if hasattr(pool, "checkedout"):
+            stats.update(size=pool.size(), checked_in=pool.checkedin(),
+                         checked_out=pool.checkedout(), overflow=pool.overflow())
+        return stats
+
+    status = {"sync": describe(engine.pool, pool_counters)}
+    if _async_engine is not None:
+        status["async"] = describe(_async_engine.pool, async_pool_counters)
+    return status
@@ -0,0 +1,146 @@
+import csv
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Table, select
+
+from . import database, models
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for format=parquet
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "5000"))  # Rows per cursor fetch / CSV write / Parquet row group
+
+
+@dataclass
+class Dataset:
+    table: Table
+    time_column: str
+    epoch: bool  # Time column holds epoch seconds (else a naive UTC DateTime)
+
+
+DATASETS = {
+    "trades": Dataset(models.Trade.__table__, "entered_at", epoch=False),
+    "ticks": Dataset(models.Tick.__table__, "ts", epoch=True),
+}
+
+
+def stream_rows(dataset: Dataset, start: Optional[float] = None, end: Optional[float] = None,
+                symbol: Optional[str] = None, chunk_size: int = EXPORT_CHUNK, engine=None) -> Iterator[List[tuple]]:
+    """Rows in time order, `chunk_size` at a time from a server-side cursor (psycopg2 named cursor on Postgres)."""
+    table = dataset.table
+    column = table.c[dataset.time_column]
+    stmt = select(*table.columns).order_by(column, table.c.id)
+    if start is not None:
+        stmt = stmt.where(column >= (start if dataset.epoch else datetime.utcfromtimestamp(start)))
+    if end is not None:
+        stmt = stmt.where(column < (end if dataset.epoch else datetime.utcfromtimestamp(end)))
+    if symbol:
+        stmt = stmt.where(table.c.symbol.in_({symbol.lower(), symbol.upper()}))  # Both spellings are stored
+    with (engine or database.engine).connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for partition in result.partitions(chunk_size):
+            yield [tuple(row) for row in partition]
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_stream(dataset: Dataset, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.name for c in dataset.table.columns])
+    yield buffer.getvalue().encode()  # Header goes out before the query has produced anything
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in chunk)
+        yield buffer.getvalue().encode()
+
+
+class _Drain:
+    """Write-only file object for ParquetWriter; emptied after every row group."""
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    return pa.string()
+
+
+def parquet_stream(dataset: Dataset, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """One row group per chunk, flushed to the client as soon as it is encoded."""
+    columns = list(dataset.table.columns)
+    schema = pa.schema([(c.name, _arrow_type(c)) for c in columns])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        yield sink.drain()
+        for chunk in chunks:
+            values = list(zip(*chunk))
+            batch = pa.record_batch([pa.array(v, type=f.type) for v, f in zip(values, schema)], schema=schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()  # Footer
+    yield sink.drain()
+
+
+FORMATS = {
+    "csv": ("text/csv", csv_stream),
+    "parquet": ("application/vnd.apache.parquet", parquet_stream),
+}
+
+
+def open_export(name: str, fmt: str, start: Optional[float] = None, end: Optional[float] = None,
+                symbol: Optional[str] = None, chunk_size: int = EXPORT_CHUNK) -> Iterator[bytes]:
+    """
+    Validate eagerly (KeyError: unknown dataset, ValueError: unusable format), then return a lazy
+    byte stream; memory stays bounded by `chunk_size` rows whatever the size of the result.
+    """
+    dataset = DATASETS[name]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+    encode: Callable = FORMATS[fmt][1]
+    return encode(dataset, stream_rows(dataset, start, end, symbol, chunk_size))
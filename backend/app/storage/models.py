@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index
 from datetime import datetime
 from .database import Base
 
@@ -13,7 +13,7 @@ class Trade(Base):
     quantity = Column(Float)
     pnl = Column(Float, default=0.0)
     status = Column(String) # open, closed
-    entered_at = Column(DateTime, default=datetime.utcnow)
+    entered_at = Column(DateTime, default=datetime.utcnow, index=True)
     exited_at = Column(DateTime, nullable=True)
     strategy_name = Column(String)
 
@@ -22,3 +22,90 @@ class Configuration(Base):
 
     key = Column(String, primary_key=True, index=True)
     value = Column(String)
+
+class EquitySample(Base):
+    __tablename__ = "equity_samples"
+    __table_args__ = (Index("ix_equity_samples_resolution_ts", "resolution", "ts"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(String)  # 1m, 1h
+    ts = Column(Float)           # Bucket start (epoch seconds)
+    equity = Column(Float)       # Close
+    equity_min = Column(Float)
+    equity_max = Column(Float)
+
+class OpenLot(Base):
+    """Buy fill not yet fully matched by sells (FIFO round-trip matching)"""
+    __tablename__ = "open_lots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trade_id = Column(Integer, index=True)
+    symbol = Column(String, index=True)
+    strategy_name = Column(String)
+    price = Column(Float)
+    quantity = Column(Float)   # Original quantity
+    remaining = Column(Float)  # Not yet matched
+    fee = Column(Float, default=0.0)        # Entry fee for the whole lot
+    exit_value = Column(Float, default=0.0) # Sum of matched qty * exit price
+    realized_pnl = Column(Float, default=0.0)
+    opened_at = Column(DateTime)
+
+class RoundTrip(Base):
+    __tablename__ = "round_trips"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, index=True)
+    strategy_name = Column(String)
+    buy_trade_id = Column(Integer, index=True)
+    sell_trade_id = Column(Integer, index=True)
+    quantity = Column(Float)
+    entry_price = Column(Float)
+    exit_price = Column(Float)
+    fees = Column(Float)
+    pnl = Column(Float)
+    opened_at = Column(DateTime)
+    closed_at = Column(DateTime, index=True)
+
+class PnlSummary(Base):
+    """Incrementally maintained aggregates, one row per (scope, bucket): all/all, day/<date>, strategy/<name>"""
+    __tablename__ = "pnl_summary"
+
+    scope = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    fills = Column(Integer, default=0)
+    round_trips = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    realized_pnl = Column(Float, default=0.0)
+    fees = Column(Float, default=0.0)
+    volume = Column(Float, default=0.0)
+
+class Tick(Base):
+    """Market price as polled by market_data_loop (see storage.ticks.TickRecorder)"""
+    __tablename__ = "ticks"
+    __table_args__ = (Index("ix_ticks_symbol_ts", "symbol", "ts"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String)
+    ts = Column(Float, index=True) # Epoch seconds
+    price = Column(Float)
+    source = Column(String, nullable=True)
+
+class PaperAccount(Base):
+    """One row per multi-account paper trader (see paper_broker.accounts.AccountBook)"""
+    __tablename__ = "paper_accounts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, index=True)
+    balance = Column(Float)
+    holdings = Column(Float)
+    entry_price = Column(Float)
+    initial = Column(Float)
+    realized_pnl = Column(Float)
+    fees = Column(Float)
+    fills = Column(Integer)
+    max_position_pct = Column(Float)
+    stop_loss_pct = Column(Float)
+    max_drawdown = Column(Float)
+    kill_switch = Column(Boolean)
+    updated_at = Column(Float) # Epoch seconds
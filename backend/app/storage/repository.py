@@ -0,0 +1,83 @@
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from . import models, analytics
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def trade_to_order(t: models.Trade) -> dict:
+    """DB Trade -> the Order-shaped dict the frontend history table expects."""
+    price = t.entry_price if t.entry_price is not None else 0.0
+    return {
+        "id": str(t.id),
+        "symbol": t.symbol,
+        "side": t.side,
+        "type": "market",
+        "quantity": t.quantity,
+        "price": price,
+        "status": t.status,
+        "created_at": t.entered_at,
+        "filled_at": t.entered_at, # Frontend uses this for date formatting
+        "filled_price": price      # Frontend uses this for display
+    }
+
+
+async def recent_trades(limit: int = 50) -> List[models.Trade]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(models.Trade).order_by(models.Trade.entered_at.desc()).limit(limit)
+        )
+        return list(result.scalars())
+
+
+async def last_trade() -> Optional[dict]:
+    """Most recent trade as plain values."""
+    trades = await recent_trades(limit=1)
+    if not trades:
+        return None
+    t = trades[0]
+    return {"side": t.side, "status": t.status, "quantity": t.quantity, "entry_price": t.entry_price,
+            "entered_at": t.entered_at}
+
+
+async def add_trade(trade: models.Trade, fee: float = 0.0) -> models.Trade:
+    """Insert a fill and update PnL aggregates in the same transaction."""
+    async with AsyncSessionLocal() as session:
+        session.add(trade)
+        await session.flush()
+        if trade.status == "filled":
+            await session.run_sync(lambda s: analytics.record_fill(s, trade, fee))
+        await session.commit()
+        return trade
+
+
+async def get_config(key: str) -> Optional[str]:
+    async with AsyncSessionLocal() as session:
+        row = await session.get(models.Configuration, key)
+        return row.value if row else None
+
+
+async def get_configs(*keys: str) -> Dict[str, Optional[str]]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(models.Configuration).where(models.Configuration.key.in_(keys))
+        )
+        found = {row.key: row.value for row in result.scalars()}
+        return {key: found.get(key) for key in keys}
+
+
+async def set_configs(values: Dict[str, str]):
+    """Upsert several configuration keys in one transaction."""
+    async with AsyncSessionLocal() as session:
+        for key, value in values.items():
+            await session.merge(models.Configuration(key=key, value=str(value)))
+        await session.commit()
+
+
+async def pnl_summary(days: int = 30) -> dict:
+    async with AsyncSessionLocal() as session:
+        return await session.run_sync(lambda s: analytics.summary(s, days))
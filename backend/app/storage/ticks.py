@@ -0,0 +1,39 @@
+import logging
+import os
+from typing import List, Optional
+
+from . import database, models
+
+logger = logging.getLogger(__name__)
+
+TICK_RECORDING = os.getenv("TICK_RECORDING", "1") == "1"  # Persist polled prices for /api/export/ticks
+MAX_PENDING = 100000  # Drop the oldest unsaved ticks beyond this while the DB is unreachable
+
+
+class TickRecorder:
+    """Buffers polled prices in memory and writes them in one bulk insert per flush."""
+    def __init__(self, enabled: bool = TICK_RECORDING):
+        self.enabled = enabled
+        self._pending: List[dict] = []
+        self.recorded = 0
+
+    def record(self, symbol: str, ts: float, price: float, source: Optional[str] = None):
+        if self.enabled:
+            self._pending.append({"symbol": symbol, "ts": ts, "price": price, "source": source})
+
+    def flush(self):
+        """Persist buffered ticks. Blocking: run it in an executor."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        session = database.SessionLocal()
+        try:
+            session.bulk_insert_mappings(models.Tick, pending)
+            session.commit()
+            self.recorded += len(pending)
+        except Exception as e:
+            logger.error(f"Failed to persist ticks: {e}")
+            session.rollback()
+            self._pending = (pending + self._pending)[-MAX_PENDING:]  # Retry on next flush
+        finally:
+            session.close()
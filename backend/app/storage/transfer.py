@@ -0,0 +1,370 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+MASK = (1 << 64) - 1
+
+
+@dataclass
+class TableSpec:
+    name: str
+    key: Optional[str] = None  # Integer key for incremental sync; None -> snapshot copy
+
+
+TABLES = [
+    TableSpec("trades", "id"),
+    TableSpec("equity_samples", "id"),
+    TableSpec("ticks", "id"),
+    TableSpec("round_trips", "id"),
+    TableSpec("configurations"),
+    TableSpec("open_lots"),
+    TableSpec("pnl_summary"),
+    TableSpec("paper_accounts"),  # Balances and holdings are updated in place
+]
+
+
+def copy_value(value) -> str:
+    """Encode one value in Postgres COPY text format."""
+    kind = type(value)
+    if kind is float:
+        return repr(value)
+    if kind is int:
+        return str(value)
+    if value is None:
+        return "\\N"
+    if kind is bool:
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_line(row: Sequence) -> str:
+    return "\t".join(copy_value(v) for v in row)
+
+
+def row_hash(text: str) -> int:
+    """64-bit hash of an encoded row. Summed (mod 2^64) so checksums are order independent."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _stream(engine, table, key: Optional[str] = None, after: int = 0, chunk_size: int = 10000,
+            upto: Optional[int] = None) -> Iterator[List[tuple]]:
+    """Yield chunks of rows (column order) with after < key <= upto, using a streaming cursor."""
+    stmt = select(*table.columns)
+    if key is not None:
+        stmt = stmt.where(table.c[key] > after).order_by(table.c[key])
+        if upto is not None:
+            stmt = stmt.where(table.c[key] <= upto)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for partition in result.partitions(chunk_size):
+            yield [tuple(row) for row in partition]
+
+
+def add_checksums(sums: Dict[int, int], rows: List[tuple], key_index: Optional[int], bucket_size: int):
+    """
+    Fold rows into checksums grouped by key range (key // bucket_size); a single bucket 0 for
+    snapshot tables. Rows are hashed by repr() of the typed values, which is identical across dialects.
+    """
+    for row in rows:
+        bucket = row[key_index] // bucket_size if key_index is not None else 0
+        sums[bucket] = (sums.get(bucket, 0) + row_hash(repr(row))) & MASK
+
+
+def bucket_checksums(engine, spec: TableSpec, table, bucket_size: int, chunk_size: int = 10000,
+                     after: int = 0, upto: Optional[int] = None) -> Dict[int, int]:
+    """Checksums of the rows with after < key <= upto (every row of snapshot tables)."""
+    sums: Dict[int, int] = {}
+    key_index = [c.name for c in table.columns].index(spec.key) if spec.key else None
+    for chunk in _stream(engine, table, spec.key, after, chunk_size, upto):
+        add_checksums(sums, chunk, key_index, bucket_size)
+    return sums
+
+
+class DatabaseSink:
+    """Writes into a live database: COPY on Postgres, chunked executemany elsewhere."""
+    def __init__(self, url: str):
+        self.engine = create_engine(url)
+        self.is_postgres = self.engine.dialect.name == "postgresql"
+
+    def prepare(self):
+        models.Base.metadata.create_all(bind=self.engine)
+
+    def high_water_mark(self, spec: TableSpec, table) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.max(table.c[spec.key]))).scalar() or 0
+
+    def transaction(self):
+        """Connection whose clear()/write() calls commit together (or not at all)."""
+        return self.engine.begin()
+
+    def _connection(self, conn):
+        return nullcontext(conn) if conn is not None else self.engine.begin()
+
+    def clear(self, table, key: Optional[str] = None, lo: int = 0, hi: int = 0, conn=None):
+        with self._connection(conn) as conn:
+            stmt = table.delete()
+            if key is not None:
+                stmt = stmt.where(table.c[key] >= lo).where(table.c[key] < hi)
+            conn.execute(stmt)
+
+    def write(self, table, rows: List[tuple], conn=None):
+        columns = [c.name for c in table.columns]
+        with self._connection(conn) as conn:
+            if self.is_postgres:
+                # COPY through the DBAPI connection underneath, inside the same transaction
+                buffer = io.StringIO("".join(copy_line(r) + "\n" for r in rows))
+                with conn.connection.cursor() as cur:
+                    cur.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+            elif self.engine.dialect.name == "sqlite":
+                # Raw executemany skips per-row SQLAlchemy bind processing; datetimes use its storage format
+                sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                params = [
+                    tuple(v.strftime("%Y-%m-%d %H:%M:%S.%f") if isinstance(v, datetime) else v for v in r)
+                    for r in rows
+                ]
+                conn.exec_driver_sql(sql, params)
+            else:
+                conn.execute(table.insert(), [dict(zip(columns, r)) for r in rows])
+
+    def finish(self, spec: TableSpec, table):
+        if self.is_postgres and spec.key:
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', '{spec.key}'), "
+                    f"COALESCE((SELECT MAX({spec.key}) FROM {table.name}), 1))"
+                )
+
+    def close(self):
+        self.engine.dispose()
+
+
+class CopyFileSink:
+    """
+    Writes a psql-replayable script (DDL + COPY ... FROM stdin blocks).
+    High-water marks for incremental dumps are kept in a JSON state file.
+    """
+    def __init__(self, path: str, state_path: Optional[str] = None):
+        self.path = path
+        self.state_path = state_path
+        self.state = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path) as f:
+                self.state = json.load(f)
+        self.file = None
+        self.checksums: Dict[str, int] = {}
+
+    def prepare(self):
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(f"-- Bulk transfer generated {datetime.utcnow().isoformat()}Z\nBEGIN;\n\n")
+        dialect = postgresql.dialect()
+        for table in models.Base.metadata.sorted_tables:
+            self.file.write(f"{CreateTable(table, if_not_exists=True).compile(dialect=dialect)};\n")
+            for index in table.indexes:
+                self.file.write(f"{CreateIndex(index, if_not_exists=True).compile(dialect=dialect)};\n")
+        self.file.write("\n")
+
+    def high_water_mark(self, spec: TableSpec, table) -> int:
+        return self.state.get(spec.name, 0)
+
+    def transaction(self):
+        return nullcontext()  # The whole script already runs in one BEGIN/COMMIT
+
+    def clear(self, table, key: Optional[str] = None, lo: int = 0, hi: int = 0, conn=None):
+        self.file.write(f"DELETE FROM {table.name};\n")
+
+    def begin(self, table):
+        columns = ", ".join(c.name for c in table.columns)
+        self.file.write(f"COPY {table.name} ({columns}) FROM stdin;\n")
+        self.checksums[table.name] = 0
+
+    def write(self, table, rows: List[tuple], conn=None):
+        lines = [copy_line(r) for r in rows]
+        total = self.checksums[table.name]
+        for line in lines:
+            total = (total + row_hash(line)) & MASK
+        self.checksums[table.name] = total
+        self.file.write("\n".join(lines) + "\n")
+
+    def end(self, table):
+        self.file.write("\\.\n")
+
+    def finish(self, spec: TableSpec, table):
+        if spec.key:
+            self.file.write(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{spec.key}'), "
+                f"COALESCE((SELECT MAX({spec.key}) FROM {table.name}), 1));\n"
+            )
+        self.file.write(f"-- checksum {table.name} {self.checksums.get(table.name, 0):016x}\n\n")
+
+    def save_state(self):
+        """Persist high-water marks (only once the dump completed)."""
+        if self.state_path:
+            with open(self.state_path, "w") as f:
+                json.dump(self.state, f, indent=2)
+
+    def close(self):
+        if self.file:
+            self.file.write("COMMIT;\n")
+            self.file.close()
+            self.file = None
+
+
+def read_copy_checksums(path: str) -> Dict[str, int]:
+    """Re-read a COPY file and checksum the rows of every COPY block."""
+    sums: Dict[str, int] = {}
+    table = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if table is None:
+                if line.startswith("COPY "):
+                    table = line.split()[1]
+                    sums.setdefault(table, 0)
+            elif line == "\\.":
+                table = None
+            else:
+                sums[table] = (sums[table] + row_hash(line)) & MASK
+    return sums
+
+
+def transfer(source_url: str, dest_url: Optional[str] = None, copy_file: Optional[str] = None,
+             state_path: Optional[str] = None, chunk_size: int = 10000, full: bool = False,
+             verify: bool = True, audit: bool = False) -> dict:
+    """
+    Transfer every table in TABLES from `source_url` to `dest_url` (database) or `copy_file`.
+    Rows are streamed in `chunk_size` chunks (server-side cursor on Postgres) and written through
+    bulk paths: COPY on Postgres / COPY files, one executemany transaction per chunk elsewhere.
+    Keyed tables sync incrementally from the target's high-water mark unless `full`; snapshot
+    tables are cleared and rewritten in a single transaction. Incremental runs only copy new keys:
+    rows updated in place at the source (trade exits, round trips, merged partial fills) reach a
+    database target only with `audit`, and a COPY file only with `full`.
+    Verification covers the rows copied in this run: a database target is compared with the
+    checksums taken while streaming (mismatched key ranges are re-copied), a COPY file is re-read
+    and compared with the source rows. `audit` checksums every row on both sides instead, which
+    also repairs rows updated at the source after they were synced.
+    Returns a per-table report: rows written, new high-water mark, elapsed seconds and whether
+    the checksums matched.
+    """
+    if bool(dest_url) == bool(copy_file):
+        raise ValueError("Provide exactly one of dest_url or copy_file")
+
+    source = create_engine(source_url)
+    sink = DatabaseSink(dest_url) if dest_url else CopyFileSink(copy_file, state_path)
+    tables = models.Base.metadata.tables
+    report = {}
+    ranges = {}
+
+    try:
+        sink.prepare()
+        for spec in TABLES:
+            table = tables[spec.name]
+            started = time.perf_counter()
+            incremental = spec.key is not None and not full
+            after = sink.high_water_mark(spec, table) if incremental else 0
+            track = verify and not audit and isinstance(sink, DatabaseSink)
+            copied: Dict[int, int] = {}
+            rows = 0
+            hwm = after
+            key_index = [c.name for c in table.columns].index(spec.key) if spec.key else None
+
+            # Incremental chunks commit as they go; a rewrite never leaves the table half empty
+            with (nullcontext() if incremental else sink.transaction()) as conn:
+                if not incremental:
+                    sink.clear(table, conn=conn)
+                if isinstance(sink, CopyFileSink):
+                    sink.begin(table)
+                for chunk in _stream(source, table, spec.key, after, chunk_size):
+                    sink.write(table, chunk, conn)
+                    if track:
+                        add_checksums(copied, chunk, key_index, chunk_size)
+                    rows += len(chunk)
+                    if key_index is not None:
+                        hwm = chunk[-1][key_index]
+                if isinstance(sink, CopyFileSink):
+                    sink.end(table)
+                    if spec.key:
+                        sink.state[spec.name] = hwm
+            sink.finish(spec, table)
+            ranges[spec.name] = (after, hwm)
+
+            entry = {"rows": rows, "high_water_mark": hwm if spec.key else None}
+            if verify and isinstance(sink, DatabaseSink):
+                if audit:
+                    expected = bucket_checksums(source, spec, table, chunk_size, chunk_size)
+                    entry.update(_verify_database(source, sink, spec, table, chunk_size, expected))
+                else:
+                    entry.update(_verify_database(source, sink, spec, table, chunk_size, copied, after, hwm))
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+            report[spec.name] = entry
+            logger.info(f"Transferred {rows} rows of {spec.name} in {entry['seconds']}s")
+        if isinstance(sink, CopyFileSink):
+            sink.save_state()
+            sink.close()  # Writes the COMMIT so the file can be re-read
+            if verify:
+                _verify_copy_file(source, copy_file, report, ranges, chunk_size)
+    finally:
+        sink.close()
+        source.dispose()
+    return report
+
+
+def _verify_database(source, sink: DatabaseSink, spec: TableSpec, table, chunk_size: int,
+                     expected: Dict[int, int], after: int = 0, upto: Optional[int] = None) -> dict:
+    """
+    Compare the target's per-key-range checksums over after < key <= upto with `expected` and
+    re-copy ranges that differ.
+    """
+    actual = bucket_checksums(sink.engine, spec, table, chunk_size, chunk_size, after, upto)
+    bad = sorted(b for b in set(expected) | set(actual) if expected.get(b) != actual.get(b))
+    if not bad:
+        return {"verified": True, "repaired_ranges": 0}
+    if not spec.key:
+        return {"verified": False, "repaired_ranges": 0}
+
+    key_index = [c.name for c in table.columns].index(spec.key)
+    for bucket in bad:
+        lo, hi = max(bucket * chunk_size, after + 1), (bucket + 1) * chunk_size
+        if upto is not None:
+            hi = min(hi, upto + 1)
+        stmt = select(*table.columns).where(table.c[spec.key] >= lo).where(table.c[spec.key] < hi)
+        with source.connect() as conn:
+            rows = [tuple(r) for r in conn.execute(stmt)]
+        with sink.transaction() as conn:
+            sink.clear(table, spec.key, lo, hi, conn)
+            if rows:
+                sink.write(table, rows, conn)
+        expected.pop(bucket, None)
+        add_checksums(expected, rows, key_index, chunk_size)
+    actual = bucket_checksums(sink.engine, spec, table, chunk_size, chunk_size, after, upto)
+    return {"verified": actual == expected, "repaired_ranges": len(bad)}
+
+
+def _verify_copy_file(source, path: str, report: dict, ranges: dict, chunk_size: int):
+    """Checksum every COPY block of the written file against the source rows of the range it covers."""
+    written = read_copy_checksums(path)
+    tables = models.Base.metadata.tables
+    for spec in TABLES:
+        after, hwm = ranges[spec.name]
+        expected = 0
+        for chunk in _stream(source, tables[spec.name], spec.key, after, chunk_size, hwm):
+            for row in chunk:
+                expected = (expected + row_hash(copy_line(row))) & MASK
+        report[spec.name]["verified"] = written.get(spec.name) == expected
@@ -0,0 +1,124 @@
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+RESUM_EVERY = 10000  # Updates between exact re-sums of running SMA totals (float drift)
+
+
+class PriceRing:
+    """Fixed-capacity price window with O(1) access to the price `n` ticks back."""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = [0.0] * capacity
+        self.count = 0
+
+    def append(self, price: float):
+        self.data[self.count % self.capacity] = price
+        self.count += 1
+
+    def ago(self, n: int) -> float:
+        """Price `n` ticks before the latest (0 = latest)."""
+        return self.data[(self.count - 1 - n) % self.capacity]
+
+    def tail(self, n: int):
+        n = min(n, self.count, self.capacity)
+        return [self.ago(i) for i in range(n - 1, -1, -1)]
+
+
+class SMA:
+    """Simple moving average kept as a running sum: O(1) per tick regardless of period."""
+    def __init__(self, period: int):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.total = 0.0
+        self.value: Optional[float] = None
+        self.updates = 0
+
+    def update(self, ring: PriceRing, price: float):
+        self.total += price
+        if ring.count > self.period:
+            self.total -= ring.ago(self.period)
+        self.updates += 1
+        if self.updates % RESUM_EVERY == 0:
+            self.total = sum(ring.tail(self.period))
+        if ring.count >= self.period:
+            self.value = self.total / self.period
+
+
+class Extreme:
+    """Rolling max (or min) of the previous `period` ticks, excluding the current one (monotonic deque)."""
+    def __init__(self, period: int, highest: bool = True):
+        self.period = period
+        self.highest = highest
+        self.reset()
+
+    def reset(self):
+        self.window: deque = deque()  # (tick index, price), monotonic
+        self.value: Optional[float] = None
+
+    def update(self, ring: PriceRing, price: float):
+        index = ring.count - 1
+        window = self.window
+        # Value before the current tick is folded in: breakouts compare against the prior range
+        while window and window[0][0] < index - self.period:
+            window.popleft()
+        self.value = window[0][1] if window and index >= self.period else None
+        if self.highest:
+            while window and window[-1][1] <= price:
+                window.pop()
+        else:
+            while window and window[-1][1] >= price:
+                window.pop()
+        window.append((index, price))
+
+
+class IndicatorGraph:
+    """
+    Indicators shared by every live strategy. Each unique (kind, period) is computed once
+    per tick no matter how many strategies subscribe to it.
+    """
+    def __init__(self):
+        self.nodes: Dict[Tuple, object] = {}
+        self.ring = PriceRing(1)
+        self.last: Optional[float] = None
+
+    def _node(self, key: Tuple, factory):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = factory()
+            self._rebuild(max(self.ring.capacity, key[1] + 1))
+        return node
+
+    def sma(self, period: int) -> SMA:
+        return self._node(("sma", period), lambda: SMA(period))
+
+    def highest(self, period: int) -> Extreme:
+        return self._node(("highest", period), lambda: Extreme(period, highest=True))
+
+    def lowest(self, period: int) -> Extreme:
+        return self._node(("lowest", period), lambda: Extreme(period, highest=False))
+
+    def _rebuild(self, capacity: int):
+        # A node registered after warmup must see the same history as the others: replay the ring
+        prices = self.ring.tail(self.ring.capacity)
+        self.ring = PriceRing(capacity)
+        for node in self.nodes.values():
+            node.reset()
+        for price in prices:
+            self.update(price)
+
+    @property
+    def capacity(self) -> int:
+        return self.ring.capacity
+
+    def update(self, price: float):
+        self.ring.append(price)
+        self.last = price
+        for node in self.nodes.values():
+            node.update(self.ring, price)
+
+    def warm(self, prices):
+        """Replay a price buffer (e.g. from a checkpoint) so indicators are ready immediately."""
+        for price in prices[-self.capacity:]:
+            self.update(price)
@@ -0,0 +1,284 @@
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+
+from .indicators import IndicatorGraph
+
+logger = logging.getLogger(__name__)
+
+MIN_HOLDINGS = 0.00001  # BTC dust below this is treated as flat
+
+
+@dataclass
+class Signal:
+    side: str          # "buy" | "sell"
+    reason: str        # "signal" | "protection" | "take_profit" | "exit"
+    strength: float = 0.0
+
+
+@dataclass
+class Position:
+    """What a strategy needs to know about the account it is deciding for."""
+    holdings: float = 0.0
+    entry_price: float = 0.0
+    last_trade_time: float = 0.0
+
+
+class LiveStrategy:
+    """
+    Tick-driven strategy for trading_loop. Subclasses request indicators from the shared
+    graph in `bind` and return a Signal (or None) from `decide`; sizing, risk checks and
+    order placement stay with the caller.
+    """
+    name = "base"
+    defaults: Dict[str, float] = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {self.name}: {', '.join(sorted(unknown))}")
+        self.params = {**self.defaults, **params}
+
+    def bind(self, graph: IndicatorGraph):
+        raise NotImplementedError
+
+    def decide(self, price: float, position: Position, now: float) -> Optional[Signal]:
+        raise NotImplementedError
+
+    def indicators(self) -> Dict[str, Optional[float]]:
+        return {}
+
+    def distance(self, price: float, position: Position) -> Optional[float]:
+        """Relative gap to the nearest level where `decide` would act (None: unknown), for poll scheduling."""
+        return None
+
+    @property
+    def label(self) -> str:
+        changed = {k: v for k, v in self.params.items() if v != self.defaults[k]}
+        return f"{self.name}(" + ",".join(f"{k}={v}" for k, v in sorted(changed.items())) + ")"
+
+
+STRATEGIES: Dict[str, Type[LiveStrategy]] = {}
+
+
+def register(name: str):
+    def wrap(cls):
+        cls.name = name
+        STRATEGIES[name] = cls
+        return cls
+    return wrap
+
+
+def create(name: str, **params) -> LiveStrategy:
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{name}'. Available: {', '.join(STRATEGIES)}")
+    return STRATEGIES[name](**params)
+
+
+@register("StrategyA")
+class SmaCrossover(LiveStrategy):
+    """
+    Smoothed SMA crossover with cooldown, profit protection (overextended price losing the
+    short SMA) and a fixed take profit. Defaults assume 10s ticks: 30 = 5 min, 120 = 20 min.
+    """
+    defaults = {
+        "short": 30,
+        "long": 120,
+        "threshold": 0.003,       # 0.3% buffer to overcome Foxbit fees (0.5% + 0.1% slippage)
+        "cooldown": 1800,         # Seconds to wait after a trade to avoid churn
+        "take_profit": 0.04,
+        "protection": 0.02,       # Price this far above the long SMA counts as overextended
+    }
+
+    def bind(self, graph: IndicatorGraph):
+        self.short_ma = graph.sma(int(self.params["short"]))
+        self.long_ma = graph.sma(int(self.params["long"]))
+
+    def decide(self, price: float, position: Position, now: float) -> Optional[Signal]:
+        short_ma, long_ma = self.short_ma.value, self.long_ma.value
+        if short_ma is None or long_ma is None:
+            return None
+        p = self.params
+        holding = position.holdings > MIN_HOLDINGS
+
+        if not holding:
+            if short_ma > long_ma * (1 + p["threshold"]) and now - position.last_trade_time >= p["cooldown"]:
+                return Signal("buy", "signal", short_ma / long_ma - 1)
+            return None
+        if price > long_ma * (1 + p["protection"]) and price < short_ma:
+            return Signal("sell", "protection", price / long_ma - 1)
+        if position.entry_price > 0 and (price - position.entry_price) / position.entry_price >= p["take_profit"]:
+            return Signal("sell", "take_profit", (price - position.entry_price) / position.entry_price)
+        if short_ma < long_ma * (1 - p["threshold"]):
+            return Signal("sell", "signal", long_ma / short_ma - 1)
+        return None
+
+    def indicators(self) -> Dict[str, Optional[float]]:
+        return {"sma_short": self.short_ma.value, "sma_long": self.long_ma.value}
+
+    def distance(self, price: float, position: Position) -> Optional[float]:
+        short_ma, long_ma = self.short_ma.value, self.long_ma.value
+        if short_ma is None or long_ma is None:
+            return None
+        p = self.params
+        gap = short_ma / long_ma - 1  # The SMA gap is compared against +/- threshold
+        if position.holdings <= MIN_HOLDINGS:
+            return abs(gap - p["threshold"])
+        gaps = [abs(gap + p["threshold"])]
+        if position.entry_price > 0:
+            gaps.append(abs(price / (position.entry_price * (1 + p["take_profit"])) - 1))
+        if price > long_ma * (1 + p["protection"]):
+            gaps.append(abs(price / short_ma - 1))
+        return min(gaps)
+
+
+@register("StrategyB")
+class Breakout(LiveStrategy):
+    """Donchian breakout on ticks: buy above the prior `lookback` high, exit below the prior `exit_lookback` low."""
+    defaults = {"lookback": 120, "exit_lookback": 60, "cooldown": 1800}
+
+    def bind(self, graph: IndicatorGraph):
+        self.high = graph.highest(int(self.params["lookback"]))
+        self.low = graph.lowest(int(self.params["exit_lookback"]))
+
+    def decide(self, price: float, position: Position, now: float) -> Optional[Signal]:
+        if self.high.value is None or self.low.value is None:
+            return None
+        if position.holdings > MIN_HOLDINGS:
+            if price < self.low.value:
+                return Signal("sell", "exit", self.low.value / price - 1)
+        elif price > self.high.value and now - position.last_trade_time >= self.params["cooldown"]:
+            return Signal("buy", "signal", price / self.high.value - 1)
+        return None
+
+    def indicators(self) -> Dict[str, Optional[float]]:
+        return {"highest": self.high.value, "lowest": self.low.value}
+
+    def distance(self, price: float, position: Position) -> Optional[float]:
+        if self.high.value is None or self.low.value is None:
+            return None
+        level = self.low.value if position.holdings > MIN_HOLDINGS else self.high.value
+        return abs(price / level - 1)
+
+
+class ShadowAccount:
+    """Paper position for a shadow strategy: all-in market fills at the tick price with a flat fee."""
+    def __init__(self, strategy: LiveStrategy, capital: float, fee_pct: float):
+        self.strategy = strategy
+        self.capital = capital
+        self.fee_pct = fee_pct
+        self.cash = capital
+        self.position = Position()
+        self.trades = 0
+        self.wins = 0
+        self.peak = capital
+        self.max_drawdown = 0.0
+
+    def on_tick(self, price: float, now: float):
+        position = self.position
+        signal = self.strategy.decide(price, position, now)
+        if signal is not None:
+            if signal.side == "buy" and self.cash > 10:
+                spend = self.cash * 0.98
+                position.holdings += spend * (1 - self.fee_pct) / price
+                position.entry_price = price
+                self.cash -= spend
+                position.last_trade_time = now
+                self.trades += 1
+            elif signal.side == "sell" and position.holdings > 0:
+                self.cash += position.holdings * price * (1 - self.fee_pct)
+                if price * (1 - self.fee_pct) ** 2 > position.entry_price:
+                    self.wins += 1
+                position.holdings = 0.0
+                position.entry_price = 0.0
+                position.last_trade_time = now
+                self.trades += 1
+        equity = self.cash + position.holdings * price
+        if equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            drawdown = (self.peak - equity) / self.peak
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
+
+    def report(self, price: float) -> dict:
+        equity = self.cash + self.position.holdings * price
+        return {
+            "strategy": self.strategy.label,
+            "return_pct": round((equity / self.capital - 1) * 100, 3),
+            "equity": round(equity, 2),
+            "trades": self.trades,
+            "wins": self.wins,
+            "max_drawdown_pct": round(self.max_drawdown * 100, 3),
+            "in_position": self.position.holdings > MIN_HOLDINGS,
+        }
+
+
+class StrategyBook:
+    """
+    The primary strategy (its signals become real orders) plus shadow strategies that are
+    paper-evaluated on the same ticks, all reading one IndicatorGraph.
+    """
+    def __init__(self, primary: LiveStrategy, shadows: Optional[List[LiveStrategy]] = None,
+                 shadow_capital: float = 1000.0, fee_pct: float = 0.005):
+        self.graph = IndicatorGraph()
+        self.primary = primary
+        primary.bind(self.graph)
+        self.shadows: List[ShadowAccount] = []
+        for strategy in shadows or []:
+            strategy.bind(self.graph)
+            self.shadows.append(ShadowAccount(strategy, shadow_capital, fee_pct))
+        self.ticks = 0
+        self.shadow_seconds = 0.0  # Time spent evaluating shadows (reported per tick)
+
+    def set_primary(self, primary: LiveStrategy):
+        primary.bind(self.graph)
+        self.primary = primary
+
+    def on_tick(self, price: float, position: Position, now: Optional[float] = None) -> Optional[Signal]:
+        """Advance indicators once, paper-trade every shadow, return the primary's signal."""
+        now = time.time() if now is None else now
+        self.graph.update(price)
+        self.ticks += 1
+        if self.shadows:
+            started = time.perf_counter()
+            for shadow in self.shadows:
+                shadow.on_tick(price, now)
+            self.shadow_seconds += time.perf_counter() - started
+        return self.primary.decide(price, position, now)
+
+    def warm(self, prices: List[float]):
+        self.graph.warm(prices)
+
+    def report(self) -> dict:
+        price = self.graph.last or 0.0
+        shadows = sorted((s.report(price) for s in self.shadows), key=lambda r: r["return_pct"], reverse=True)
+        return {
+            "primary": self.primary.label,
+            "indicators": self.primary.indicators(),
+            "unique_indicators": len(self.graph.nodes),
+            "ticks": self.ticks,
+            "shadow_ms_per_tick": round(self.shadow_seconds * 1000 / self.ticks, 4) if self.ticks else 0.0,
+            "shadows": shadows,
+        }
+
+
+def default_shadow_grid() -> List[LiveStrategy]:
+    """50 SMA crossover variants around the primary's settings."""
+    grid = itertools.product((10, 20, 30, 45, 60), (60, 120, 180, 240, 360), (0.002, 0.004))
+    return [create("StrategyA", short=s, long=l, threshold=t) for s, l, t in grid]
+
+
+def parse_shadows(spec: Optional[str]) -> List[LiveStrategy]:
+    """
+    SHADOW_STRATEGIES: "default" (50 SMA variants), "none", or a JSON list of
+    {"strategy": "StrategyA", "params": {...}}.
+    """
+    if not spec or spec == "none":
+        return []
+    if spec == "default":
+        return default_shadow_grid()
+    return [create(item["strategy"], **item.get("params", {})) for item in json.loads(spec)]
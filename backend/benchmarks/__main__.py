@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks with regression gate")
+    parser.add_argument("--only", help="Comma separated benchmark names")
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads (separate baseline)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (median is kept)")
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("BENCH_TOLERANCE", "20")),
+                        help="Allowed drop vs baseline, in percent, on top of two standard deviations of measured noise")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Record results as the new baseline")
+    parser.add_argument("--output", help="Also write results JSON here")
+    args = parser.parse_args()
+
+    # Benchmarks write to a throwaway SQLite file, never the real database
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from .suite import BENCHMARKS, run, compare
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    mode = "quick" if args.quick else "full"
+    results = run(names, scale=1 if args.quick else 5, repeat=args.repeat)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(mode, {}).get("metrics", {})
+    rows = compare(results, baseline, args.tolerance)
+
+    # change / allowed are relative to the reference workload, not raw throughput
+    print(f"{'benchmark':<26}{'value':>14}  {'unit':<9}{'baseline':>14}{'change':>9}{'allowed':>9}")
+    for row in rows:
+        unit = results[row["name"]]["unit"]
+        base = f"{row['baseline']:.2f}" if row["baseline"] is not None else "-"
+        change = f"{row['change_pct']:+.1f}%" if row["change_pct"] is not None else "new"
+        allowed = f"-{row['allowed_pct']:.1f}%" if row["allowed_pct"] is not None else "-"
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['name']:<26}{row['value']:>14.2f}  {unit:<9}{base:>14}{change:>9}{allowed:>9}{flag}")
+
+    report = {"mode": mode, "recorded_at": datetime.utcnow().isoformat() + "Z",
+              "python": platform.python_version(), "machine": platform.machine(), "metrics": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({**report, "comparison": rows, "tolerance_pct": args.tolerance}, f, indent=2)
+
+    if args.update_baseline:
+        # Keep metrics that were not re-run this time
+        merged = {**baselines.get(mode, {}).get("metrics", {}), **results}
+        baselines[mode] = {**report, "metrics": merged}
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline updated ({mode}): {args.baseline}")
+        return 0
+
+    regressions = [r["name"] for r in rows if r["regressed"]]
+    if regressions:
+        print(f"FAILED: {', '.join(regressions)} regressed beyond tolerance ({args.tolerance:.0f}% plus measured noise)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
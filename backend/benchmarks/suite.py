@@ -0,0 +1,349 @@
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from .ticks import synthetic_ticks
+
+# name -> (function(scale) -> (operations, seconds), unit)
+BENCHMARKS: Dict[str, Tuple[Callable[[int], Tuple[int, float]], str]] = {}
+
+
+def benchmark(name: str, unit: str):
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit)
+        return fn
+    return register
+
+
+def _fresh_db():
+    """Empty schema in the benchmark database (DATABASE_URL is pointed at a temp file by the runner)."""
+    from backend.app.storage import database, models
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+
+
+def _strategy_ticks(book, prices) -> float:
+    from backend.app.strategies.live import Position
+    position = Position()
+    started = time.perf_counter()
+    for i, price in enumerate(prices):
+        book.on_tick(price, position, now=i * 10.0)
+    return time.perf_counter() - started
+
+
+@benchmark("strategy_tick", "ticks/s")
+def bench_strategy_tick(scale: int) -> Tuple[int, float]:
+    """Primary strategy evaluation trading_loop runs on every tick (shared indicator update + decide)."""
+    from backend.app.strategies import live
+    prices = synthetic_ticks(20000 * scale)
+    return len(prices), _strategy_ticks(live.StrategyBook(live.create("StrategyA")), prices)
+
+
+@benchmark("strategy_tick_50_shadows", "ticks/s")
+def bench_strategy_tick_shadows(scale: int) -> Tuple[int, float]:
+    """Primary plus the default 50 shadow configurations paper-trading on the same ticks."""
+    from backend.app.strategies import live
+    prices = synthetic_ticks(5000 * scale)
+    return len(prices), _strategy_ticks(live.StrategyBook(live.create("StrategyA"), live.default_shadow_grid()), prices)
+
+
+@benchmark("broker_tick_1k_orders", "ticks/s")
+def bench_broker_tick(scale: int) -> Tuple[int, float]:
+    """PaperBroker.process_data_tick with 1000 resting limit / stop / trailing orders that never fill."""
+    from backend.app.paper_broker.broker import PaperBroker, Order
+    _fresh_db()
+    broker = PaperBroker(initial_balance=1e9)
+    for i in range(1000):
+        kind = ("limit", "stop", "trailing_stop")[i % 3]
+        broker.place_order(Order(id=str(i), symbol="btcbrl", side="buy" if kind == "limit" else "sell", type=kind,
+                                 quantity=0.001, price=1.0, stop_price=1.0, trail_pct=0.9))
+    prices = synthetic_ticks(500 * scale)
+    started = time.perf_counter()
+    for price in prices:
+        broker.process_data_tick(price)
+    return len(prices), time.perf_counter() - started
+
+
+@benchmark("accounts_tick_10k", "ticks/s")
+def bench_accounts_tick(scale: int) -> Tuple[int, float]:
+    """AccountBook.tick over 10000 accounts with two orders each (a fifth of them market orders)."""
+    import numpy as np
+    from backend.app.paper_broker.accounts import AccountBook, BUY, SELL, MARKET, LIMIT
+    book = AccountBook()
+    n = 10000
+    for i in range(n):
+        book.create_account(f"user{i}", 10000.0)
+    prices = synthetic_ticks(100 * scale)
+    book.tick(prices[0])
+    rng = np.random.default_rng(0)
+    sides = np.where(rng.random(2 * n) < 0.5, BUY, SELL)
+    types = np.where(rng.random(2 * n) < 0.2, MARKET, LIMIT)
+    limits = prices[0] * (1 + np.where(sides == BUY, -1, 1) * rng.uniform(0.001, 0.05, 2 * n))
+    book.submit_many(np.repeat(np.arange(1, n + 1), 2), sides, types, np.full(2 * n, 0.001), limits)
+    started = time.perf_counter()
+    for price in prices:
+        book.tick(price)
+    return len(prices), time.perf_counter() - started
+
+
+@benchmark("broker_soak", "orders/s")
+def bench_broker_soak(scale: int) -> Tuple[int, float]:
+    """
+    Long PaperBroker run (round trips plus placed-then-canceled limits) with persistence off.
+    Fails if live objects keep growing over the second half: broker memory must be flat.
+    """
+    import gc
+    from backend.app.paper_broker.broker import PaperBroker, Order
+    _fresh_db()
+    broker = PaperBroker(initial_balance=1e12)
+    broker._persist_trade = lambda order, fee=0.0: None
+    broker._save_state = lambda: None
+    prices = synthetic_ticks(20000 * scale)
+    half = len(prices) // 2
+    elapsed, live = 0.0, 0
+    started = time.perf_counter()
+    for i, price in enumerate(prices):
+        if i == half:
+            elapsed += time.perf_counter() - started
+            gc.collect()
+            live = len(gc.get_objects())
+            started = time.perf_counter()
+        side = "buy" if i % 2 == 0 else "sell"
+        broker.place_order(Order(id=f"m{i}", symbol="btcbrl", side=side, type="market", quantity=0.001, price=0.0))
+        broker.place_order(Order(id=f"l{i}", symbol="btcbrl", side="buy", type="limit", quantity=0.001, price=price * 0.5))
+        broker.process_data_tick(price)
+        broker.cancel_order(f"l{i}")
+    elapsed += time.perf_counter() - started
+    gc.collect()
+    growth = len(gc.get_objects()) - live
+    if growth > 2000:  # Slack for interpreter caches; unbounded state would add ~3 objects per iteration
+        raise RuntimeError(f"broker_soak: {growth} objects retained over {len(prices) - half} iterations")
+    return len(prices) * 2, elapsed
+
+
+def _fill_inputs(count: int):
+    import random
+    rng = random.Random(0)
+    return [(round(rng.uniform(250000, 350000), 2), round(rng.uniform(0.00001, 0.01), 8)) for _ in range(count)]
+
+
+@benchmark("fill_math_fixedpoint", "fills/s")
+def bench_fill_math(scale: int) -> Tuple[int, float]:
+    """
+    Fill cost, fee and balance update in integer centavos / satoshis. Fails if it is not
+    faster than the same exact math in Decimal.
+    """
+    from decimal import Decimal, ROUND_CEILING
+    from backend.app.paper_broker import fixedpoint as fx
+    fills = _fill_inputs(20000 * scale)
+    rate = fx.to_ppm(0.005)
+    started = time.perf_counter()
+    balance = 10**12
+    for price, quantity in fills:
+        value = fx.notional(fx.to_cents(price), fx.to_sats(quantity))
+        balance -= value + fx.fee(value, rate)
+    elapsed = time.perf_counter() - started
+
+    cent, fee_pct = Decimal("0.01"), Decimal("0.005")
+    started = time.perf_counter()
+    reference = Decimal(10**10)
+    for price, quantity in fills:
+        value = (Decimal(repr(price)) * Decimal(repr(quantity))).quantize(cent, ROUND_CEILING)
+        reference -= value + (value * fee_pct).quantize(cent, ROUND_CEILING)
+    decimal_elapsed = time.perf_counter() - started
+    if balance != int(reference * 100):
+        raise RuntimeError(f"fill_math_fixedpoint: {balance} centavos != Decimal {reference}")
+    if elapsed >= decimal_elapsed:
+        raise RuntimeError(f"fill_math_fixedpoint: {elapsed:.3f}s is not faster than Decimal ({decimal_elapsed:.3f}s)")
+    return len(fills), elapsed
+
+
+@benchmark("fill_math_numpy", "fills/s")
+def bench_fill_math_numpy(scale: int) -> Tuple[int, float]:
+    """Vectorized fixed-point fill math (backtests): 100k fills per batch."""
+    from backend.app.paper_broker import fixedpoint as fx
+    prices, quantities = zip(*_fill_inputs(100000))
+    rounds = 5 * scale
+    rate = fx.to_ppm(0.005)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        values = fx.notional_array(fx.to_cents_array(prices), fx.floor_to_step_array(fx.to_sats_array(quantities), 1000))
+        int((values + fx.fee_array(values, rate)).sum())
+    return len(prices) * rounds, time.perf_counter() - started
+
+
+@benchmark("risk_engine", "checks/s")
+def bench_risk_engine(scale: int) -> Tuple[int, float]:
+    """update_equity + validate_trade pair, as done once per tick / order."""
+    from backend.app.risk_engine.engine import RiskEngine, TradeRisk
+    engine = RiskEngine(TradeRisk())
+    prices = synthetic_ticks(20000 * scale)
+    started = time.perf_counter()
+    for price in prices:
+        engine.update_equity(1000.0 + price * 1e-6)
+        engine.validate_trade("btcbrl", "buy", 0.001, price, 1000.0)
+    return len(prices), time.perf_counter() - started
+
+
+@benchmark("fill_persistence_sqlite", "fills/s")
+def bench_fill_persistence(scale: int) -> Tuple[int, float]:
+    """PaperBroker._persist_trade (trade row + lots / round trips / PnL aggregates) against SQLite."""
+    from backend.app.paper_broker.broker import PaperBroker, Order
+    _fresh_db()
+    broker = PaperBroker(initial_balance=1e9)
+    prices = synthetic_ticks(100 * scale)
+    started = time.perf_counter()
+    for i, price in enumerate(prices):
+        order = Order(id=str(i), symbol="btcbrl", side="buy" if i % 2 == 0 else "sell",
+                      type="market", quantity=0.001, price=price, status="filled", filled_price=price)
+        broker._persist_trade(order, fee=price * 0.001 * 0.005)
+    return len(prices), time.perf_counter() - started
+
+
+def _api_client():
+    from fastapi.testclient import TestClient
+    from backend.app import main
+    from backend.app.paper_broker.broker import PaperBroker, Order
+    _fresh_db()
+    broker = PaperBroker(initial_balance=1000.0)
+    for i, price in enumerate(synthetic_ticks(50)):
+        broker.trade_history.append(Order(id=str(i), symbol="btcbrl", side="buy" if i % 2 == 0 else "sell",
+                                          type="market", quantity=0.001, price=price, status="filled",
+                                          filled_at=datetime(2024, 1, 1), filled_price=price))
+    main.state.broker = broker
+    main.state.ready = True
+    main.state.last_price = 300000.0
+    return TestClient(main.app)  # No startup event: loops stay off
+
+
+def _bench_endpoint(path: str, scale: int) -> Tuple[int, float]:
+    client = _api_client()
+    n = 300 * scale
+    client.get(path)  # Warm routing / validation caches
+    started = time.perf_counter()
+    for _ in range(n):
+        client.get(path)
+    return n, time.perf_counter() - started
+
+
+@benchmark("api_status", "req/s")
+def bench_api_status(scale: int) -> Tuple[int, float]:
+    return _bench_endpoint("/api/status", scale)
+
+
+@benchmark("api_history", "req/s")
+def bench_api_history(scale: int) -> Tuple[int, float]:
+    return _bench_endpoint("/api/history", scale)
+
+
+@benchmark("backtest", "bars/s")
+def bench_backtest(scale: int) -> Tuple[int, float]:
+    """Backtrader run of StrategyA over synthetic 1-minute bars."""
+    import backtrader as bt
+    import pandas as pd
+    from backend.app.strategies.strategies import StrategyA_TrendFollowing
+
+    closes = synthetic_ticks(4000 * scale, sigma=0.001)
+    index = [datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(len(closes))]
+    frame = pd.DataFrame({"open": closes, "high": [c * 1.001 for c in closes], "low": [c * 0.999 for c in closes],
+                          "close": closes, "volume": 1.0}, index=index)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.addstrategy(StrategyA_TrendFollowing)
+    cerebro.adddata(bt.feeds.PandasData(dataname=frame, timeframe=bt.TimeFrame.Minutes))
+    cerebro.broker.setcash(1e9)
+    started = time.perf_counter()
+    cerebro.run()
+    return len(closes), time.perf_counter() - started
+
+
+def _reference(runs: int = 5) -> float:
+    """
+    Fixed pure-Python workload (float math, dict and list traffic, calls), in ops/s: the median
+    of `runs` short runs, so one scheduler hiccup or frequency boost doesn't skew it. Timed
+    around every sample so results can be compared as ratios: machine speed and load cancel out.
+    """
+    def step(book, i):
+        price = 100.0 + (i % 97) * 0.5
+        book[i % 512] = price * 1.001
+        return book.get((i * 7) % 512, 0.0) - price
+
+    count = 20000
+    rates = []
+    for _ in range(runs):
+        book: Dict[int, float] = {}
+        window: List[float] = []
+        started = time.perf_counter()
+        for i in range(count):
+            window.append(step(book, i))
+            if len(window) > 64:
+                window.pop(0)
+        rates.append(count / (time.perf_counter() - started))
+    return statistics.median(rates)
+
+
+def _noise_pct(ratios: List[float]) -> float:
+    """Robust standard deviation of one sample (1.4826 x median absolute deviation), % of the median."""
+    if len(ratios) < 3:
+        return 0.0  # Unknown: the baseline's noise is used instead
+    median = statistics.median(ratios)
+    mad = statistics.median(abs(r - median) for r in ratios)
+    return 1.4826 * mad / median * 100 if median else 0.0
+
+
+def run(names: List[str], scale: int = 1, repeat: int = 5) -> Dict[str, dict]:
+    """
+    Median-of-`repeat` throughput per benchmark after one untimed warm-up call, plus `relative`:
+    the median ratio to the reference workload timed around each sample, and `noise_pct`: how
+    much a single ratio sample scatters on this machine.
+    """
+    logging.disable(logging.WARNING)  # Per-order INFO/WARNING logs would dominate the timings
+    results = {}
+    try:
+        for name in names:
+            fn, unit = BENCHMARKS[name]
+            fn(scale)  # Imports, caches and first-use allocations stay out of the samples
+            values, ratios = [], []
+            for _ in range(repeat):
+                before = _reference()
+                ops, seconds = fn(scale)
+                reference = (before + _reference()) / 2
+                value = ops / seconds if seconds > 0 else float("inf")
+                values.append(value)
+                ratios.append(value / reference)
+            results[name] = {
+                "value": round(statistics.median(values), 2),
+                "unit": unit,
+                "relative": round(statistics.median(ratios), 6),
+                "noise_pct": round(_noise_pct(ratios), 1),
+            }
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance_pct: float) -> List[dict]:
+    """
+    Per-metric change vs baseline (all metrics are throughputs: higher is better), measured on
+    the ratio to the in-run reference when both sides have one, so a slower or busier machine
+    is not a regression. A metric regresses when it drops more than `tolerance_pct` plus two
+    standard deviations of sample noise (the larger of this run's and the baseline's) below
+    its baseline.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append({"name": name, "value": result["value"], "baseline": None, "change_pct": None,
+                         "allowed_pct": None, "regressed": False})
+            continue
+        if result.get("relative") and base.get("relative"):
+            current, reference = result["relative"], base["relative"]
+        else:
+            current, reference = result["value"], base["value"]
+        change = (current - reference) / reference * 100 if reference else 0.0
+        allowed = tolerance_pct + 2 * max(result.get("noise_pct", 0.0), base.get("noise_pct", 0.0))
+        rows.append({"name": name, "value": result["value"], "baseline": base["value"],
+                     "change_pct": round(change, 1), "allowed_pct": round(allowed, 1), "regressed": change < -allowed})
+    return rows
@@ -0,0 +1,15 @@
+import math
+import random
+from typing import List
+
+
+def synthetic_ticks(n: int, start: float = 300000.0, sigma: float = 0.0005, drift: float = 0.0,
+                    seed: int = 42) -> List[float]:
+    """Geometric random walk of `n` BTCBRL prices (per-tick log-return stdev `sigma`). Deterministic per seed."""
+    rng = random.Random(seed)
+    prices = []
+    price = start
+    for _ in range(n):
+        price *= math.exp(drift + sigma * rng.gauss(0.0, 1.0))
+        prices.append(price)
+    return prices
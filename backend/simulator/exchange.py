@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from backend.app.foxbit_client.governor import ENDPOINTS, DEFAULT_COST
+from .market import MarketConfig, MarketSimulator
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_INTERVAL = 0.01  # Seconds between simulator advances / WebSocket batches
+
+
+def _error(status: int, code: int, msg: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"code": code, "msg": msg})
+
+
+class MockExchange:
+    """
+    In-memory exchange state behind the mock API: balances, fills (myTrades), request weight
+    accounting and the counters load tests read from /sim/stats.
+    """
+    def __init__(self, sim: MarketSimulator, balances: Optional[Dict[str, float]] = None, fee_pct: float = 0.001,
+                 weight_limit: int = 6000, api_secret: Optional[str] = None, symbol: str = "BTCBRL",
+                 step_size: str = "0.00001"):
+        self.sim = sim
+        self.balances = balances or {"BRL": 10000.0, "BTC": 0.0}
+        self.fee_pct = fee_pct
+        self.weight_limit = weight_limit
+        self.api_secret = api_secret
+        self.symbol = symbol
+        self.step_size = step_size
+        self.trades: List[dict] = []
+        self.next_order_id = 1000
+        self.weight_minute = 0
+        self.weight_used = 0
+        self.requests: Dict[str, int] = {}
+        self.last_served_seq = 0
+        self.distinct_served = 0  # Distinct price updates handed to pollers
+
+    def charge(self, endpoint: str) -> Optional[float]:
+        """Add the endpoint weight to the current minute. Returns Retry-After seconds when over the limit."""
+        minute = int(time.time() // 60)
+        if minute != self.weight_minute:
+            self.weight_minute, self.weight_used = minute, 0
+        self.weight_used += ENDPOINTS.get(endpoint, DEFAULT_COST)[0]
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if self.weight_used > self.weight_limit:
+            return 60 - time.time() % 60
+        return None
+
+    def current_price(self) -> float:
+        self.sim.advance()
+        if self.sim.seq != self.last_served_seq:
+            self.last_served_seq = self.sim.seq
+            self.distinct_served += 1
+        return self.sim.price
+
+    def verify(self, request: Request) -> Optional[JSONResponse]:
+        """Signed endpoint checks: recvWindow and (when a secret is configured) the HMAC signature."""
+        params = request.query_params
+        if "timestamp" not in params:
+            return _error(400, -1102, "Mandatory parameter 'timestamp' was not sent.")
+        recv_window = int(params.get("recvWindow", 5000))
+        if abs(time.time() * 1000 - int(params["timestamp"])) > recv_window:
+            return _error(400, -1021, "Timestamp for this request is outside of the recvWindow.")
+        if self.api_secret:
+            query = request.url.query
+            payload, _, signature = query.rpartition("&signature=")
+            expected = hmac.new(self.api_secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(signature, expected):
+                return _error(400, -1022, "Signature for this request is not valid.")
+        return None
+
+    def fill_market(self, side: str, quantity: float) -> dict:
+        price = self.current_price()
+        quote = price * quantity
+        if side == "BUY":
+            if self.balances["BRL"] < quote:
+                raise ValueError("insufficient")
+            commission, asset = quantity * self.fee_pct, "BTC"
+            self.balances["BRL"] -= quote
+            self.balances["BTC"] += quantity - commission
+        else:
+            if self.balances["BTC"] < quantity:
+                raise ValueError("insufficient")
+            commission, asset = quote * self.fee_pct, "BRL"
+            self.balances["BTC"] -= quantity
+            self.balances["BRL"] += quote - commission
+
+        self.next_order_id += 1
+        now_ms = int(time.time() * 1000)
+        trade = {
+            "id": len(self.trades) + 1, "orderId": self.next_order_id, "symbol": self.symbol,
+            "price": f"{price:.2f}", "qty": f"{quantity:.8f}", "quoteQty": f"{quote:.8f}",
+            "commission": f"{commission:.8f}", "commissionAsset": asset, "time": now_ms,
+            "isBuyer": side == "BUY", "isMaker": False,
+        }
+        self.trades.append(trade)
+        return {
+            "symbol": self.symbol, "orderId": self.next_order_id, "transactTime": now_ms,
+            "executedQty": f"{quantity:.8f}", "cummulativeQuoteQty": f"{quote:.8f}",
+            "status": "FILLED", "type": "MARKET", "side": side,
+            "fills": [{"price": trade["price"], "qty": trade["qty"], "commission": trade["commission"],
+                       "commissionAsset": asset, "tradeId": trade["id"]}],
+        }
+
+
+def create_app(exchange: Optional[MockExchange] = None) -> FastAPI:
+    if exchange is None:
+        config = MarketConfig(
+            tick_rate=float(os.getenv("MOCK_TICK_RATE", "10")),
+            seed=int(os.getenv("MOCK_SEED", "42")),
+        )
+        exchange = MockExchange(
+            MarketSimulator(config),
+            balances={"BRL": float(os.getenv("MOCK_BRL", "10000")), "BTC": 0.0},
+            api_secret=os.getenv("MOCK_API_SECRET") or None,
+        )
+    app = FastAPI(title="Mock Exchange", version="1.0.0")
+    app.state.exchange = exchange
+    subscribers: List[asyncio.Queue] = []
+
+    @app.middleware("http")
+    async def weight_accounting(request: Request, call_next):
+        path = request.url.path
+        if not path.startswith("/api/v3/"):
+            return await call_next(request)
+        retry_after = exchange.charge(path[len("/api/v3/"):])
+        if retry_after is not None:
+            response = _error(429, -1003, "Too much request weight used.")
+            response.headers["Retry-After"] = str(int(retry_after) + 1)
+        else:
+            response = await call_next(request)
+        response.headers["X-MBX-USED-WEIGHT-1M"] = str(exchange.weight_used)
+        return response
+
+    async def ticker_pump():
+        """Advance the simulator on the wall clock and fan ticks out to WebSocket subscribers."""
+        last_seq = exchange.sim.seq
+        while True:
+            exchange.sim.advance()
+            if subscribers and exchange.sim.seq != last_seq:
+                batch = [list(t) for t in exchange.sim.since(last_seq)]
+                for queue in subscribers:
+                    if queue.qsize() < 100:  # Slow consumer: drop batches rather than grow unbounded
+                        queue.put_nowait(batch)
+            last_seq = exchange.sim.seq
+            await asyncio.sleep(BROADCAST_INTERVAL)
+
+    @app.on_event("startup")
+    async def start_pump():
+        app.state.pump = asyncio.create_task(ticker_pump())
+
+    # --- Binance (api/v3) ---
+
+    @app.get("/api/v3/ticker/price")
+    async def ticker_price(symbol: str = "BTCBRL"):
+        return {"symbol": symbol.upper(), "price": f"{exchange.current_price():.2f}"}
+
+    @app.get("/api/v3/time")
+    async def server_time():
+        return {"serverTime": int(time.time() * 1000)}
+
+    @app.get("/api/v3/exchangeInfo")
+    async def exchange_info(symbol: str = "BTCBRL"):
+        return {"symbols": [{
+            "symbol": symbol.upper(), "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "BRL",
+            "filters": [
+                {"filterType": "LOT_SIZE", "minQty": exchange.step_size, "maxQty": "9000.00000000",
+                 "stepSize": exchange.step_size},
+                {"filterType": "NOTIONAL", "minNotional": "10.00000000"},
+            ],
+        }]}
+
+    @app.get("/api/v3/account")
+    async def account(request: Request):
+        error = exchange.verify(request)
+        if error:
+            return error
+        return {"canTrade": True, "balances": [
+            {"asset": asset, "free": f"{amount:.8f}", "locked": "0.00000000"}
+            for asset, amount in exchange.balances.items()
+        ]}
+
+    @app.post("/api/v3/order")
+    async def order(request: Request):
+        error = exchange.verify(request)
+        if error:
+            return error
+        params = request.query_params
+        if params.get("type", "MARKET").upper() != "MARKET":
+            return _error(400, -1116, "Invalid orderType (mock supports MARKET only).")
+        try:
+            return exchange.fill_market(params["side"].upper(), float(params["quantity"]))
+        except ValueError:
+            return _error(400, -2010, "Account has insufficient balance for requested action.")
+
+    @app.get("/api/v3/myTrades")
+    async def my_trades(request: Request, limit: int = Query(500, le=1000), fromId: Optional[int] = None):
+        error = exchange.verify(request)
+        if error:
+            return error
+        if fromId is not None:
+            return [t for t in exchange.trades if t["id"] >= fromId][:limit]
+        return exchange.trades[-limit:]
+
+    # --- Mercado Bitcoin (fallback ticker) ---
+
+    @app.get("/mb/api/{coin}/ticker/")
+    async def mb_ticker(coin: str):
+        return {"ticker": {"last": f"{exchange.current_price():.2f}", "date": int(time.time())}}
+
+    # --- Stream + simulator control ---
+
+    @app.websocket("/ws/ticker")
+    async def ws_ticker(websocket: WebSocket):
+        """Batches of [seq, ts, price] every BROADCAST_INTERVAL."""
+        await websocket.accept()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribers.append(queue)
+        try:
+            while True:
+                await websocket.send_json({"ticks": await queue.get()})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscribers.remove(queue)
+
+    @app.post("/sim/config")
+    async def sim_config(tick_rate: float = Query(..., gt=0, le=100000)):
+        exchange.sim.set_tick_rate(tick_rate)
+        return {"tick_rate": tick_rate}
+
+    @app.get("/sim/stats")
+    async def sim_stats():
+        return {
+            "tick_rate": exchange.sim.config.tick_rate,
+            "ticks": exchange.sim.seq,
+            "price": exchange.sim.price,
+            "regime": exchange.sim.regime_name,
+            "distinct_served": exchange.distinct_served,
+            "requests": exchange.requests,
+            "weight_used_1m": exchange.weight_used,
+            "balances": exchange.balances,
+            "subscribers": len(subscribers),
+        }
+
+    return app
+
+
+app = create_app()
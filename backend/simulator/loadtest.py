@@ -0,0 +1,80 @@
+import argparse
+import sys
+import time
+from typing import List
+
+import requests
+
+from backend.app.observability.latency import LatencyStats
+
+
+def measure_step(exchange: str, backend: str, rate: float, seconds: float, status_rps: float) -> dict:
+    """Run the simulator at `rate` ticks/s for `seconds` while sampling the backend's /api/status."""
+    requests.post(f"{exchange}/sim/config", params={"tick_rate": rate}, timeout=5).raise_for_status()
+    before = requests.get(f"{exchange}/sim/stats", timeout=5).json()
+
+    latency = LatencyStats(capacity=100_000)
+    staleness: List[float] = []
+    errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            status = requests.get(f"{backend}/api/status", timeout=5).json()
+            latency.record((time.perf_counter() - started) * 1000)
+            if status.get("last_update"):
+                staleness.append(time.time() - status["last_update"])
+        except (requests.RequestException, ValueError):
+            errors += 1
+        time.sleep(max(0.0, 1.0 / status_rps - (time.perf_counter() - started)))
+
+    after = requests.get(f"{exchange}/sim/stats", timeout=5).json()
+    ticks = after["ticks"] - before["ticks"]
+    served = after["distinct_served"] - before["distinct_served"]
+    polls = sum(after["requests"].values()) - sum(before["requests"].values())
+    return {
+        "rate": rate,
+        "ticks": ticks,
+        "ticks_seen": served,
+        "coverage": served / ticks if ticks else 0.0,
+        "exchange_requests": polls,
+        "status_p50_ms": round(latency.percentile(50), 2),
+        "status_p99_ms": round(latency.percentile(99), 2),
+        "staleness_s": max(staleness) if staleness else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step the mock exchange tick rate and measure the backend")
+    parser.add_argument("--exchange", default="http://127.0.0.1:9000")
+    parser.add_argument("--backend", default="http://127.0.0.1:8006")
+    parser.add_argument("--rates", default="10,100,1000,5000", help="Comma separated ticks/s per step")
+    parser.add_argument("--step-seconds", type=float, default=30.0)
+    parser.add_argument("--status-rps", type=float, default=20.0, help="/api/status sampling rate")
+    parser.add_argument("--min-coverage", type=float, default=0.9,
+                        help="Fraction of generated ticks the backend must observe to keep up")
+    parser.add_argument("--max-p99-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",")]
+    print(f"{'ticks/s':>9}{'ticks':>9}{'seen':>8}{'coverage':>10}{'p50 ms':>9}{'p99 ms':>9}{'stale s':>9}{'errors':>8}")
+    behind_at = None
+    for rate in rates:
+        row = measure_step(args.exchange, args.backend, rate, args.step_seconds, args.status_rps)
+        stale = f"{row['staleness_s']:.2f}" if row["staleness_s"] is not None else "-"
+        print(f"{rate:>9.0f}{row['ticks']:>9}{row['ticks_seen']:>8}{row['coverage']:>10.3f}"
+              f"{row['status_p50_ms']:>9.1f}{row['status_p99_ms']:>9.1f}{stale:>9}{row['errors']:>8}")
+        if behind_at is None and (row["coverage"] < args.min_coverage or row["status_p99_ms"] > args.max_p99_ms):
+            behind_at = rate
+
+    if behind_at is None:
+        print(f"Backend kept up at every rate up to {rates[-1]:.0f} ticks/s")
+    else:
+        print(f"Backend falls behind at {behind_at:.0f} ticks/s "
+              f"(coverage < {args.min_coverage} or /api/status p99 > {args.max_p99_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+@dataclass
+class Regime:
+    name: str
+    volatility: float      # Annualized
+    mean_duration: float   # Seconds before switching to another regime (exponential)
+
+
+@dataclass
+class MarketConfig:
+    start_price: float = 350000.0  # BTCBRL
+    drift: float = 0.0             # Annualized
+    tick_rate: float = 10.0        # Ticks per second
+    regimes: List[Regime] = field(default_factory=lambda: [
+        Regime("calm", 0.45, 1800.0),
+        Regime("volatile", 1.20, 300.0),
+    ])
+    jumps_per_day: float = 4.0
+    jump_mean: float = -0.002      # Log-return of an average jump
+    jump_std: float = 0.01
+    seed: Optional[int] = 42
+
+
+class MarketSimulator:
+    """
+    BTCBRL price path: GBM with Markov volatility regimes and Poisson (Merton) jumps.
+    Ticks are generated in vectorized batches, so wall-clock driven rates of thousands
+    of ticks per second stay cheap. Keeps a ring of recent (seq, ts, price) ticks.
+    """
+    def __init__(self, config: Optional[MarketConfig] = None, history: int = 100_000):
+        self.config = config or MarketConfig()
+        self.rng = np.random.default_rng(self.config.seed)
+        self.price = self.config.start_price
+        self.seq = 0
+        self.regime = 0
+        self.regime_ticks_left = self._regime_length(0)
+        self.recent: deque = deque(maxlen=history)
+        self.clock: Optional[float] = None  # Wall time the path has been generated up to
+
+    def _regime_length(self, regime: int) -> int:
+        duration = self.rng.exponential(self.config.regimes[regime].mean_duration)
+        return max(1, int(duration * self.config.tick_rate))
+
+    def step(self, n: int, now: Optional[float] = None) -> np.ndarray:
+        """Advance `n` ticks and return their prices."""
+        cfg = self.config
+        dt = 1.0 / (cfg.tick_rate * SECONDS_PER_YEAR)
+        jump_prob = cfg.jumps_per_day / (cfg.tick_rate * 86400)
+        out = np.empty(n)
+        done = 0
+        while done < n:
+            count = min(n - done, self.regime_ticks_left)
+            sigma = cfg.regimes[self.regime].volatility
+            returns = (cfg.drift - 0.5 * sigma ** 2) * dt + sigma * math.sqrt(dt) * self.rng.standard_normal(count)
+            jumps = self.rng.random(count) < jump_prob
+            if jumps.any():
+                returns[jumps] += self.rng.normal(cfg.jump_mean, cfg.jump_std, int(jumps.sum()))
+            path = self.price * np.exp(np.cumsum(returns))
+            out[done:done + count] = path
+            self.price = float(path[-1])
+            done += count
+            self.regime_ticks_left -= count
+            if self.regime_ticks_left <= 0:
+                self.regime = (self.regime + 1) % len(cfg.regimes)
+                self.regime_ticks_left = self._regime_length(self.regime)
+
+        ts = time.time() if now is None else now
+        first = self.seq + 1
+        self.seq += n
+        self.recent.extend(zip(range(first, self.seq + 1), [ts] * n, out.tolist()))
+        return out
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Generate every tick due since the last call at `tick_rate` (wall clock). Returns the count."""
+        now = time.time() if now is None else now
+        if self.clock is None:
+            self.clock = now
+            return 0
+        due = int((now - self.clock) * self.config.tick_rate)
+        if due > self.config.tick_rate * 2:
+            # Stalled (e.g. event loop blocked): don't replay more than 2s worth of ticks
+            due = int(self.config.tick_rate * 2)
+            self.clock = now - due / self.config.tick_rate
+        if due > 0:
+            self.step(due, now)
+            self.clock += due / self.config.tick_rate
+        return due
+
+    def set_tick_rate(self, tick_rate: float):
+        self.config.tick_rate = tick_rate
+        self.regime_ticks_left = self._regime_length(self.regime)
+        self.clock = None
+
+    def since(self, seq: int) -> List[Tuple[int, float, float]]:
+        """Ticks after `seq` still in the ring."""
+        if not self.recent or seq >= self.seq:
+            return []
+        count = min(self.seq - seq, len(self.recent))
+        return list(islice(reversed(self.recent), count))[::-1]
+
+    @property
+    def regime_name(self) -> str:
+        return self.config.regimes[self.regime].name
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+import pytest
+
+# The app binds its engine to DATABASE_URL at import time: point the whole suite at a
+# throwaway database so runs never touch (or get restored from) ./storage.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="tests_"), "test.db")
+
+
+@pytest.fixture
+def fresh_db():
+    """Empty schema for tests that persist broker, ledger or trade state."""
+    from backend.app.storage import database, models
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+    yield database
+    database.engine.dispose()
@@ -0,0 +1,129 @@
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.paper_broker.accounts import AccountBook, BUY, LIMIT, MARKET, SELL
+from backend.app.risk_engine.engine import TradeRisk
+from backend.app.storage import database, models
+
+
+def test_fills_average_entry_and_realized_pnl():
+    book = AccountBook(fee_pct=0.01, slippage_pct=0.0)
+    acc = book.create_account("alice", 1000.0, TradeRisk(max_position_size_pct=1.0, stop_loss_pct=0.5))
+    book.tick(100.0)
+    book.submit(acc, "buy", "market", 4.0)
+    book.submit(acc, "buy", "limit", 4.0, price=80.0)
+    sell = book.submit(acc, "sell", "limit", 6.0, price=110.0)
+    book.tick(100.0)
+    book.tick(80.0)
+    a = book.account(acc)
+    assert a["holdings"] == pytest.approx(8.0) and a["entry_price"] == pytest.approx(90.0)
+    assert a["balance"] == pytest.approx(1000.0 - 720.0 * 1.01)
+
+    book.tick(120.0) # Limit sells at its price
+    a = book.account(acc)
+    assert book.cancel(acc, sell["id"])["status"] == "filled"
+    assert a["holdings"] == pytest.approx(2.0) and a["entry_price"] == pytest.approx(90.0)
+    assert a["realized_pnl"] == pytest.approx(6 * (110 - 90) - 660.0 * 0.01)
+    assert a["fees"] == pytest.approx(720.0 * 0.01 + 660.0 * 0.01) and a["fills"] == 3
+
+
+def test_risk_checks_are_per_account():
+    book = AccountBook(fee_pct=0.0, slippage_pct=0.0)
+    risk = TradeRisk(max_position_size_pct=0.5, stop_loss_pct=0.1, max_drawdown_limit=0.3)
+    small, greedy, holder = (book.create_account(n, 1000.0, risk) for n in ("small", "greedy", "holder"))
+    book.tick(100.0)
+    assert book.submit(greedy, "buy", "market", 6.0)["status"] == "rejected" # 600 > 50% of equity
+    # Two orders that each pass but together exceed the balance: both rejected at fill time
+    for _ in range(3):
+        book.submit(small, "buy", "limit", 4.0, price=100.0)
+    book.submit(holder, "buy", "market", 5.0)
+    book.submit(holder, "sell", "limit", 5.0, price=200.0)
+    assert book.tick(100.0)["rejected"] == 3
+    assert book.account(holder)["holdings"] == 5.0
+
+    result = book.tick(89.0) # Below entry * (1 - 10%): liquidated, resting sell canceled
+    a = book.account(holder)
+    assert result["stopped"] == 1 and a["holdings"] == 0.0 and a["open_orders"] == []
+    assert a["realized_pnl"] == pytest.approx(-55.0)
+
+    book.accounts["balance"][small - 1] = 600.0 # Lost 40% of the initial balance
+    assert book.tick(89.0)["killed"] == 1
+    assert book.account(small)["kill_switch"] and not book.account(holder)["kill_switch"]
+    assert book.submit(small, "buy", "market", 0.1)["status"] == "rejected"
+
+
+def test_persists_in_bulk_and_restores():
+    models.Base.metadata.create_all(bind=database.engine)
+    with database.engine.begin() as conn:
+        conn.execute(models.PaperAccount.__table__.delete())
+    book = AccountBook(fee_pct=0.0, slippage_pct=0.0)
+    ids = [book.create_account(f"user{i}", 1000.0 + i) for i in range(50)]
+    book.flush()
+    book.tick(100.0)
+    book.submit(ids[7], "buy", "market", 2.0)
+    book.tick(100.0)
+    inserts, updates = book.pending_rows()
+    assert not inserts and [u["id"] for u in updates] == [ids[7]] # Only the changed account
+    book.write(inserts, updates)
+
+    restored = AccountBook()
+    restored.load()
+    assert restored.loaded and restored.size == 50 and restored.names[7] == "user7"
+    assert restored.account(ids[7])["holdings"] == 2.0 and restored.account(ids[7])["balance"] == pytest.approx(807.0)
+
+
+def test_ten_thousand_accounts_tick_fast():
+    book = AccountBook()
+    n = 10000
+    for i in range(n):
+        book.create_account(f"user{i}", 10000.0)
+    book.tick(300000.0)
+    rng = np.random.default_rng(1)
+    accounts = np.repeat(np.arange(1, n + 1), 2)
+    sides = np.where(rng.random(2 * n) < 0.5, BUY, SELL)
+    types = np.where(rng.random(2 * n) < 0.2, MARKET, LIMIT)
+    prices = 300000.0 * (1 + np.where(sides == BUY, -1, 1) * rng.uniform(0.001, 0.05, 2 * n))
+    book.submit_many(accounts, sides, types, np.full(2 * n, 0.001), prices)
+    timings = []
+    for price in 300000.0 * (1 + 0.01 * np.sin(np.arange(50) / 5)):
+        started = time.perf_counter()
+        book.tick(price)
+        timings.append(time.perf_counter() - started)
+    assert book.stats()["accounts"] == n
+    assert sorted(timings)[len(timings) // 2] < 0.01 # Median tick under 10 ms
+
+
+def test_account_endpoints(monkeypatch):
+    book = AccountBook()
+    monkeypatch.setattr(main.state, "accounts", book)
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.state, "ready", False)
+    assert client.post("/api/accounts", json={"name": "early", "balance": 5000}).status_code == 503
+    monkeypatch.setattr(main.state, "ready", True)
+    assert client.get("/api/accounts").status_code == 503 # Load failed: ids could collide with stored ones
+    book.loaded = True
+
+    account = client.post("/api/accounts", json={"name": "bob", "balance": 5000}).json()
+    assert account["balance"] == 5000 and account["open_orders"] == []
+    order = client.post(f"/api/accounts/{account['id']}/orders", json={"side": "buy", "type": "limit", "quantity": 0.01, "price": 1000})
+    assert order.status_code == 201 and order.json()["status"] == "open"
+    assert client.post(f"/api/accounts/{account['id']}/orders", json={"side": "buy", "type": "limit", "quantity": 0.01}).status_code == 400
+    assert client.post("/api/accounts/99/orders", json={"side": "buy", "quantity": 1}).status_code == 404
+    assert client.delete(f"/api/accounts/{account['id']}/orders/{order.json()['id']}").json()["status"] == "canceled"
+    assert client.get("/api/accounts").json()["accounts"] == 1
+
+
+def test_accounts_tick_on_new_prices_after_warmup(monkeypatch):
+    book = AccountBook()
+    book.create_account("alice", 1000.0)
+    monkeypatch.setattr(main.state, "accounts", book)
+    monkeypatch.setattr(main.state, "ready", False)
+    main.tick_accounts(100.0)
+    assert book.ticks == 0 # The persisted book has not replaced this one yet
+    monkeypatch.setattr(main.state, "ready", True)
+    main.tick_accounts(100.0)
+    assert book.ticks == 1 and book.last_price == 100.0
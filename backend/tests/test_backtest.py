@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from backend.app.backtest.engine import BacktestConfig, load_frame, run_batch, synthetic_frame
+
+START, END = datetime(2023, 1, 1), datetime(2023, 9, 1)
+
+
+def test_batch_returns_trades_and_equity_in_input_order():
+    frame = synthetic_frame(START, END)
+    configs = [
+        BacktestConfig("StrategyA", {"fast_period": 5, "slow_period": 30}),
+        BacktestConfig("StrategyB", {"lookback": 10}),
+        BacktestConfig("StrategyA", {"fast_period": 10, "slow_period": 50}),
+    ]
+    results = run_batch(configs, frame, maxcpus=1)
+    assert [r["label"] for r in results] == [c.label for c in configs]
+
+    first = results[0]
+    assert first["trades"] and first["trade_stats"]["closed"] == len(first["trades"])
+    assert sum(t["pnl_net"] for t in first["trades"]) == pytest.approx(first["trade_stats"]["pnl_net"])
+    assert first["equity"][0][1] == pytest.approx(10000.0)
+    assert first["equity"][-1][1] == pytest.approx(first["final_value"])
+    assert first["max_drawdown_pct"] > 0
+
+
+def test_parallel_batch_matches_sequential():
+    frame = synthetic_frame(START, END)
+    configs = [BacktestConfig("StrategyA", {"fast_period": f, "slow_period": 40}) for f in (5, 10, 15)]
+    sequential = run_batch(configs, frame, maxcpus=1)
+    parallel = run_batch(configs, frame, maxcpus=2)
+    assert [r["final_value"] for r in parallel] == [r["final_value"] for r in sequential]
+
+
+def test_unknown_strategy_and_csv_feed(tmp_path):
+    with pytest.raises(ValueError):
+        run_batch([BacktestConfig("Nope")], synthetic_frame(START, END))
+
+    path = tmp_path / "bars.csv"
+    synthetic_frame(START, END).rename_axis("datetime").to_csv(path)
+    frame = load_frame(str(path), datetime(2023, 2, 1), datetime(2023, 3, 1))
+    assert list(frame.columns) == ["open", "high", "low", "close", "volume"]
+    assert frame.index[0] == datetime(2023, 2, 1) and len(frame) == 29
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from backend.app.backtest.cache import ResultCache
+from backend.app.backtest.engine import BacktestConfig, BrokerModel, run_batch, synthetic_frame
+
+START, END = datetime(2023, 1, 1), datetime(2023, 6, 1)
+
+
+def test_repeat_batch_is_served_from_cache(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    frame = synthetic_frame(START, END)
+    configs = [BacktestConfig("StrategyA", {"fast_period": f, "slow_period": 30}) for f in (5, 10)]
+
+    first = run_batch(configs, frame, maxcpus=1, cache=cache)
+    assert cache.stats()["entries"] == 2 and cache.hits == 0
+
+    again = run_batch(configs + [BacktestConfig("StrategyA", {"fast_period": 15, "slow_period": 30})],
+                      frame, maxcpus=1, cache=cache)
+    assert cache.hits == 2 and cache.stats()["entries"] == 3
+    assert again[:2] == first
+
+
+def test_any_input_change_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    frame = synthetic_frame(START, END)
+    config = [BacktestConfig("StrategyB", {"lookback": 10})]
+    run_batch(config, frame, maxcpus=1, cache=cache)
+
+    run_batch(config, frame, BrokerModel(commission=0.001), maxcpus=1, cache=cache)  # Broker model
+    run_batch(config, synthetic_frame(START, END, seed=1), maxcpus=1, cache=cache)   # Data
+    run_batch(config, frame.iloc[:-1], maxcpus=1, cache=cache)                       # Range
+    assert cache.hits == 0 and cache.stats()["entries"] == 4
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    payload = {"equity": [[i, i * 1.5] for i in range(1000)]}
+    for key in ("a", "b", "c"):
+        cache.put(key, {**payload, "key": key})
+        if key == "b":
+            assert cache.get("a")  # Refresh "a": "b" becomes least recently used
+    assert cache.size <= 10_000 and cache.evictions >= 1
+    assert cache.get("b") is None and cache.get("c")["key"] == "c"
+    assert ResultCache(str(tmp_path)).size == cache.size  # Index rebuilt from disk
+
+
+def test_size_cap_holds_across_processes(tmp_path):
+    # Two workers' caches on one directory: each rescans before evicting
+    first = ResultCache(str(tmp_path), max_bytes=15_000, rescan_interval=0)
+    second = ResultCache(str(tmp_path), max_bytes=15_000, rescan_interval=0)
+    payload = {"equity": [[i, i * 1.5] for i in range(1000)]}
+    for n in range(2):  # Each cache alone stays under the cap
+        first.put(f"first{n}", {**payload, "n": n})
+        second.put(f"second{n}", {**payload, "n": n})
+    assert ResultCache(str(tmp_path)).size <= 15_000
+    assert second.evictions >= 1
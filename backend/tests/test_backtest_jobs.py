@@ -0,0 +1,47 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.backtest.jobs import JobQueue
+
+CONFIGS = [{"strategy": "StrategyA", "params": {"fast_period": f, "slow_period": 30}} for f in (5, 10)]
+
+
+def test_jobs_run_stream_progress_and_cancel(monkeypatch, tmp_path):
+    monkeypatch.setenv("BACKTEST_CACHE_DIR", str(tmp_path))  # Inherited by the spawned workers
+
+    async def scenario():
+        jobs = JobQueue(workers=1, chunk=1, nice=0)
+        first = jobs.submit(CONFIGS, "2023-01-01", "2023-04-01", None, {"cash": 10000.0})
+        second = jobs.submit(CONFIGS, "2023-01-01", "2023-04-01", None, {"cash": 10000.0})
+        events = jobs.subscribe(first.id)
+        jobs.cancel(second.id)  # Still waiting for the single worker slot
+        try:
+            await asyncio.wait_for(asyncio.gather(*jobs.tasks.values(), return_exceptions=True), timeout=120)
+        finally:
+            jobs.shutdown()
+        received = []
+        while not events.empty():
+            received.append(events.get_nowait())
+        return first, second, received
+
+    first, second, events = asyncio.run(scenario())
+    assert first.status == "done" and [r["label"] for r in first.results] == [
+        "StrategyA(fast_period=5,slow_period=30)", "StrategyA(fast_period=10,slow_period=30)"]
+    assert second.status == "cancelled" and second.results == []
+    progress = [e for e in events if e["type"] == "progress"]
+    assert [e["progress"]["done"] for e in progress] == [1, 2]
+    assert progress[-1]["equity"] and events[-1]["status"] == "done"
+
+
+def test_submit_validation(monkeypatch):
+    monkeypatch.setattr(main.state, "backtests", JobQueue(max_queued=0))
+    client = TestClient(main.app)
+    unknown = client.post("/api/backtests", json={"configs": [{"strategy": "Nope"}]})
+    assert unknown.status_code == 400
+    traversal = client.post("/api/backtests", json={"configs": CONFIGS, "data": "../../etc/passwd"})
+    assert traversal.status_code == 400
+    assert client.post("/api/backtests", json={"configs": []}).status_code == 422
+    assert client.post("/api/backtests", json={"configs": CONFIGS}).status_code == 429
+    assert client.get("/api/backtests/missing").status_code == 404
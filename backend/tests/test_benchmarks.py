@@ -0,0 +1,30 @@
+from backend.benchmarks.suite import compare
+from backend.benchmarks.ticks import synthetic_ticks
+
+
+def test_synthetic_ticks_are_deterministic():
+    assert synthetic_ticks(100, seed=7) == synthetic_ticks(100, seed=7)
+    assert synthetic_ticks(100, seed=7) != synthetic_ticks(100, seed=8)
+    assert all(p > 0 for p in synthetic_ticks(1000))
+
+
+def test_regression_gate():
+    baseline = {"a": {"value": 100.0, "unit": "ops/s"}, "b": {"value": 100.0, "unit": "ops/s"}}
+    results = {"a": {"value": 85.0, "unit": "ops/s"}, "b": {"value": 70.0, "unit": "ops/s"},
+               "c": {"value": 1.0, "unit": "ops/s"}}
+    rows = {r["name"]: r for r in compare(results, baseline, tolerance_pct=20)}
+    assert not rows["a"]["regressed"]
+    assert rows["b"]["regressed"] and rows["b"]["change_pct"] == -30.0
+    assert rows["c"]["baseline"] is None and not rows["c"]["regressed"]
+
+
+def test_gate_uses_reference_ratio_and_noise():
+    baseline = {"a": {"value": 100.0, "unit": "ops/s", "relative": 0.5, "noise_pct": 2.0},
+                "b": {"value": 100.0, "unit": "ops/s", "relative": 0.5, "noise_pct": 2.0}}
+    # Half the raw throughput on a machine half as fast: not a regression
+    results = {"a": {"value": 50.0, "unit": "ops/s", "relative": 0.5, "noise_pct": 1.0},
+               "b": {"value": 70.0, "unit": "ops/s", "relative": 0.37, "noise_pct": 1.0}}
+    rows = {r["name"]: r for r in compare(results, baseline, tolerance_pct=20)}
+    assert not rows["a"]["regressed"] and rows["a"]["change_pct"] == 0.0
+    assert rows["b"]["allowed_pct"] == 24.0 # 20% + 2 x the noisier side
+    assert rows["b"]["regressed"] and rows["b"]["change_pct"] == -26.0
@@ -0,0 +1,29 @@
+from backend.app.foxbit_client.cadence import PollScheduler
+
+
+def _scheduler(prices, step=10.0, **kwargs):
+    scheduler = PollScheduler(base=10.0, min_interval=1.0, max_interval=15.0, headroom=lambda: 1.0, **kwargs)
+    for i, price in enumerate(prices):
+        scheduler.record_poll(1000.0 + i * step)
+        scheduler.observe(price, 1000.0 + i * step)
+    return scheduler
+
+
+def test_poll_interval_follows_volatility_and_thresholds():
+    assert _scheduler([100.0] * 3).next_interval() == 10.0  # Warming up: base interval
+    assert _scheduler([100.0] * 20).next_interval() == 15.0  # Flat market: relax
+    calm = _scheduler([100.0, 100.01] * 20)
+    wild = _scheduler([100.0, 100.1] * 50)
+    assert calm.next_interval() == 15.0 and calm.reason == "quiet"
+    assert wild.next_interval() < 5.0 and wild.reason == "volatility"
+    assert calm.next_interval(distance=0.0001) < 5.0 and calm.reason == "threshold"
+    assert calm.stats()["polls_per_min"] == 6  # Polls every 10s
+
+
+def test_poll_interval_stays_inside_the_budget():
+    scheduler = _scheduler([100.0, 101.0] * 20, budget_per_min=12)
+    assert scheduler.next_interval(distance=0.0) == 5.0 and scheduler.reason == "budget"
+    scheduler.headroom = lambda: 0.1  # Exchange budget nearly spent: stretch further
+    assert scheduler.next_interval(distance=0.0) == 15.0
+    scheduler.headroom = lambda: 0.0
+    assert scheduler.next_interval() == 15.0
@@ -0,0 +1,47 @@
+import time
+import pytest
+from backend.app.core.checkpoint import StrategyCheckpoint, encode, decode, save_checkpoint, load_checkpoint
+from backend.app.risk_engine.engine import RiskEngine, TradeRisk
+
+def make_checkpoint():
+    engine = RiskEngine(TradeRisk())
+    engine.update_equity(120.0)
+    engine.update_equity(130.0)
+    engine.register_trade_result(-1.0)
+    return StrategyCheckpoint(
+        saved_at=time.time(),
+        prices=[300000.0 + i for i in range(125)],
+        last_price_tick=time.time(),
+        last_trade_time=time.time() - 60,
+        risk=engine.snapshot(),
+    )
+
+def test_roundtrip():
+    ckpt = make_checkpoint()
+    restored = decode(encode(ckpt))
+    assert restored == ckpt
+
+    engine = RiskEngine(TradeRisk())
+    engine.restore(restored.risk)
+    assert engine.initial_balance == 120.0
+    assert engine.current_balance == 130.0
+    assert engine.consecutive_losses == 1
+
+def test_corruption_detected():
+    data = bytearray(encode(make_checkpoint()))
+    data[40] ^= 0xFF
+    with pytest.raises(ValueError):
+        decode(bytes(data))
+    with pytest.raises(ValueError):
+        decode(bytes(data[:10]))
+
+def test_atomic_save_and_load(tmp_path):
+    path = str(tmp_path / "state" / "checkpoint.bin")
+    assert load_checkpoint(path) is None
+    ckpt = make_checkpoint()
+    save_checkpoint(path, ckpt)
+    assert load_checkpoint(path) == ckpt
+    assert not (tmp_path / "state" / "checkpoint.bin.tmp").exists()
+
+    (tmp_path / "state" / "checkpoint.bin").write_bytes(b"garbage")
+    assert load_checkpoint(path) is None
@@ -0,0 +1,70 @@
+import time
+
+from backend.app.observability.equity import EquitySeries, lttb
+
+def test_lttb_keeps_endpoints_and_size():
+    points = [(float(i), float(i % 7)) for i in range(1000)]
+    sampled = lttb(points, 50)
+    assert len(sampled) == 50
+    assert sampled[0] == points[0]
+    assert sampled[-1] == points[-1]
+
+def test_lttb_preserves_spike():
+    points = [(float(i), 100.0) for i in range(1000)]
+    points[500] = (500.0, 200.0)
+    assert (500.0, 200.0) in lttb(points, 20)
+
+def test_minute_and_hour_rollups():
+    series = EquitySeries()
+    # 3 hours of ticks every 10s
+    for i in range(3 * 360):
+        series.record(i * 10.0, 100.0 + i)
+    assert len(series.columns["1m"]) == 3 * 60 - 1 # Current minute still open
+    assert len(series.columns["1h"]) == 2
+    assert series.columns["1m"].values[0] == 105.0 # Close of first minute
+
+def test_query_bounded_and_picks_coarser_resolution():
+    series = EquitySeries(raw_capacity=100, max_source_points=1000)
+    for i in range(20000):
+        series.record(i * 10.0, 100.0 + (i % 50))
+    result = series.query(0, 20000 * 10.0, points=200)
+    assert result["resolution"] == "1h" # Raw ring no longer reaches back, minutes exceed limit
+    assert len(result["points"]) <= 200
+
+    recent = series.query(19950 * 10.0, 20000 * 10.0, points=200)
+    assert recent["resolution"] == "raw"
+
+def test_wide_query_strides_instead_of_truncating():
+    series = EquitySeries(raw_capacity=10, minute_capacity=50000, hour_capacity=10, max_source_points=1000)
+    for i in range(5000):
+        series.record(i * 60.0, float(i))
+    series.columns["1h"] = type(series.columns["1h"])(10)  # Only minutes are available
+    result = series.query(0, 5000 * 60.0, points=5000)
+    assert result["resolution"] == "1m" and result["stride"] == 5
+    assert result["points"][0][0] == 0.0 and result["points"][-1][0] == 4998 * 60.0  # Whole range, latest closed minute
+
+def test_restore_puts_persisted_rows_before_live_samples(fresh_db):
+    base = (time.time() // 86400 - 1) * 86400  # Yesterday, inside the retention window
+    old = EquitySeries()
+    for i in range(3 * 60):
+        old.record(base + i * 60.0, 100.0 + i)
+    old.flush()
+
+    series = EquitySeries()
+    rows = series.read()  # Executor side
+    for i in range(600, 605):  # Recorded while the read was in flight
+        series.record(base + i * 60.0, 1.0)
+    series.restore(rows)
+    ts = list(series.columns["1m"].ts)
+    assert ts == sorted(ts) and ts[0] == base and ts[-1] == base + 603 * 60.0
+    assert len(series.columns["1h"]) == 2
+
+def test_flush_prunes_rollups_past_retention(fresh_db):
+    series = EquitySeries(minute_capacity=60)  # Retain one hour of minutes
+    now = time.time()
+    for i in range(120):
+        series.record(now - 7200 + i * 60.0, 1.0)
+    series.flush()
+    restored = EquitySeries(minute_capacity=60)
+    restored.load()
+    assert len(restored.columns["1m"]) and restored.columns["1m"].ts[0] >= now - 3600 - 60
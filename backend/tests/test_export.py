@@ -0,0 +1,67 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from backend.app import main
+from backend.app.storage import database, export, models
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Tick.__table__.insert(), [
+            {"symbol": "btcbrl" if i % 2 else "ethbrl", "ts": 1_700_000_000.0 + i, "price": 300000.0 + i, "source": "Binance"}
+            for i in range(20000)
+        ])
+        conn.execute(models.Trade.__table__.insert(), [
+            {"symbol": "BTCBRL", "side": "buy", "entry_price": 100.0, "quantity": 0.1, "status": "filled",
+             "entered_at": datetime(2024, 1, day), "strategy_name": "SMA_Crossover"}
+            for day in (1, 2, 3)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def test_csv_streams_in_chunks_with_filters(engine):
+    dataset = export.DATASETS["ticks"]
+    stream = export.csv_stream(dataset, export.stream_rows(dataset, start=1_700_000_000.0, end=1_700_010_000.0,
+                                                            symbol="BTCBRL", chunk_size=1000, engine=engine))
+    assert next(stream) == b"id,symbol,ts,price,source\r\n" # Before any row is fetched
+    pieces = list(stream)
+    assert len(pieces) == 5 # 5000 btcbrl ticks in range, 1000 per chunk
+    rows = list(csv.reader(io.StringIO(b"".join(pieces).decode())))
+    assert len(rows) == 5000 and {r[1] for r in rows} == {"btcbrl"}
+    assert float(rows[0][2]) == 1_700_000_001.0 and float(rows[-1][2]) == 1_700_009_999.0
+
+
+def test_trades_filter_on_datetime_column(engine):
+    dataset = export.DATASETS["trades"]
+    start = datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp() # Stored as naive UTC
+    chunks = list(export.stream_rows(dataset, start=start, symbol="btcbrl", engine=engine))
+    entered_at = list(dataset.table.columns.keys()).index("entered_at")
+    assert [row[entered_at] for chunk in chunks for row in chunk] == [datetime(2024, 1, 2), datetime(2024, 1, 3)]
+
+
+def test_parquet_row_groups(engine):
+    pq = pytest.importorskip("pyarrow.parquet")
+    dataset = export.DATASETS["ticks"]
+    data = b"".join(export.parquet_stream(dataset, export.stream_rows(dataset, chunk_size=4000, engine=engine)))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 20000 and pq.ParquetFile(io.BytesIO(data)).num_row_groups == 5
+    assert table.column("price")[0].as_py() == 300000.0
+
+
+def test_export_endpoint_validation():
+    models.Base.metadata.create_all(bind=database.engine)
+    client = TestClient(main.app)
+    assert client.get("/api/export/orders").status_code == 404
+    assert client.get("/api/export/ticks", params={"format": "xlsx"}).status_code == 400
+    response = client.get("/api/export/ticks", params={"from": 0, "to": 1})
+    assert response.status_code == 200 and response.text.startswith("id,symbol,ts,price,source")
+    assert response.headers["content-disposition"] == 'attachment; filename="ticks.csv"'
@@ -0,0 +1,49 @@
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+import numpy as np
+
+from backend.app.paper_broker import fixedpoint as fx
+from backend.app.paper_broker.broker import PaperBroker, Order
+
+
+def test_rounding_favors_the_account():
+    price = fx.to_cents(312345.67)
+    assert fx.to_sats(0.00004995) == 4995 and fx.to_cents(0.1 + 0.2) == 30
+    assert fx.notional(price, 7000) == 2187 and fx.notional(price, 7000, round_up=False) == 2186  # 2186.4 centavos
+    assert fx.fee(2187, fx.to_ppm(0.005)) == 11  # 10.935 centavos, rounded up
+    assert fx.floor_to_step(fx.to_sats(0.00007), fx.to_sats(0.00001)) == 7000  # int(0.00007 / 0.00001) == 6
+    assert fx.format_btc(4995, fx.step_decimals(1000)) == "0.00004" and fx.format_btc(123456789012) == "1234.56789012"
+    assert fx.step_decimals(1) == 8 and fx.step_decimals(100_000_000) == 0
+
+
+def test_vectorized_matches_scalar():
+    rng = np.random.default_rng(3)
+    prices = rng.integers(1, 10**9, 5000)  # Up to R$ 10 million per BTC
+    sats = rng.integers(1, 10**12, 5000)   # Up to 10k BTC
+    for round_up in (True, False):
+        expected = [fx.notional(int(p), int(q), round_up) for p, q in zip(prices, sats)]
+        assert fx.notional_array(prices, sats, round_up).tolist() == expected
+    values = fx.notional_array(prices, sats)
+    assert fx.fee_array(values, 5000).tolist() == [fx.fee(int(v), 5000) for v in values]
+    assert fx.floor_to_step_array(sats, 1000).tolist() == [fx.floor_to_step(int(q), 1000) for q in sats]
+    assert fx.to_sats_array([0.00004995, 1.5]).tolist() == [4995, 150_000_000]
+
+
+def test_paper_round_trips_do_not_leak_balance():
+    broker = PaperBroker(initial_balance=10000.0, fee_pct=0.005, slippage_pct=0.0)
+    broker._save_state = lambda: None
+    broker._persist_trade = lambda order, fee=0.0: None
+    broker.balance, broker.holdings = 10000.0, 0.0
+    balance, fee = Decimal("10000.00"), Decimal("0.005")
+    rng = np.random.default_rng(7)
+    for i in range(500):
+        price = round(float(rng.uniform(250000, 350000)), 2)
+        quantity = round(float(rng.uniform(0.00001, 0.0015)), 8)
+        for side in ("buy", "sell"):
+            broker.place_order(Order(id=f"{side}{i}", symbol="btcbrl", side=side, type="market", quantity=quantity, price=0.0))
+            broker.process_data_tick(price)
+            value = (Decimal(repr(price)) * Decimal(repr(quantity))).quantize(Decimal("0.01"), ROUND_CEILING if side == "buy" else ROUND_FLOOR)
+            cost = (value * fee).quantize(Decimal("0.01"), ROUND_CEILING)
+            balance += -(value + cost) if side == "buy" else value - cost
+    assert broker.holdings_sats == 0 and broker.holdings == 0.0  # No dust left behind
+    assert broker.balance_cents == int(balance * 100)  # Exact to the centavo after 1000 fills
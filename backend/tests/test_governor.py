@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from backend.app.foxbit_client.governor import (
+    RateLimitGovernor, RateLimitExceeded, PRIORITY_ORDER, PRIORITY_HISTORY,
+)
+
+
+def test_low_priority_keeps_reserve_for_orders():
+    gov = RateLimitGovernor(limit=100, window=6000.0)  # Refill is negligible during the test
+    gov.acquire(55, PRIORITY_HISTORY, timeout=0.1)
+
+    # History must leave 40% of the bucket untouched...
+    with pytest.raises(RateLimitExceeded):
+        gov.acquire(10, PRIORITY_HISTORY, timeout=0.05)
+    # ...which orders may still use
+    gov.acquire(40, PRIORITY_ORDER, timeout=0.05)
+
+
+def test_used_weight_header_syncs_bucket():
+    gov = RateLimitGovernor(limit=6000)
+    gov.observe(200, {"X-MBX-USED-WEIGHT-1M": "5990"})
+    assert gov.stats()["used_weight_1m"] == 5990
+    assert gov.headroom() < 0.01
+
+
+def test_retry_after_blocks_all_callers():
+    gov = RateLimitGovernor(limit=6000)
+    assert gov.observe(429, {"Retry-After": "1"}) == 1.0
+    assert gov.headroom() == 0.0
+    with pytest.raises(RateLimitExceeded):
+        gov.acquire(1, PRIORITY_ORDER, timeout=0.1)
+
+
+def test_identical_inflight_requests_are_coalesced():
+    gov = RateLimitGovernor()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {"price": "100.0"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gov.coalesce("ticker", fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"price": "100.0"}] * 5
+    assert gov.stats()["coalesced"] == 4
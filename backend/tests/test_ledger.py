@@ -0,0 +1,80 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.paper_broker import ledger as position_ledger
+from backend.app.paper_broker.ledger import PositionLedger
+from backend.app.storage import models
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield db
+    db.close()
+
+
+def add_trade(session, side, price, qty, day):
+    trade = models.Trade(symbol="btcbrl", side=side, entry_price=price, quantity=qty, status="filled",
+                         entered_at=datetime(2024, 1, day, 12), strategy_name="SMA_Crossover")
+    session.add(trade)
+    session.flush()
+    return trade
+
+
+def test_fifo_lots_average_cost_and_pnl():
+    ledger = PositionLedger()
+    ledger.apply("buy", 1.0, 100.0, fee=1.0)
+    ledger.apply("buy", 1.0, 200.0, fee=2.0)
+    assert ledger.avg_price == pytest.approx(150.0)
+    assert ledger.break_even == pytest.approx(151.5)
+    assert ledger.unrealized_pnl(160.0) == pytest.approx(320.0 - 300.0 - 3.0)
+
+    # Same matching as storage.analytics: 1.0 @ 100 -> 150 and 0.5 @ 200 -> 150
+    pnl = ledger.apply("sell", 1.5, 150.0, fee=1.5)
+    assert pnl == pytest.approx((50 - 1.0 - 1.0) + (-25 - 1.0 - 0.5))
+    assert ledger.quantity == pytest.approx(0.5) and ledger.avg_price == pytest.approx(200.0)
+    assert ledger.open_fees == pytest.approx(1.0) and ledger.fees == pytest.approx(4.5)
+
+    ledger.apply("sell", 0.5, 210.0)
+    assert ledger.quantity == 0.0 and ledger.avg_price == 0.0 and not ledger.lots
+    assert ledger.realized_pnl == pytest.approx(pnl + 5.0 - 1.0)
+
+
+def test_restart_replays_fills_after_snapshot(session):
+    live = PositionLedger()
+    for side, price, qty, day in (("buy", 100.0, 1.0, 1), ("buy", 120.0, 1.0, 2)):
+        trade = add_trade(session, side, price, qty, day)
+        live.apply(side, qty, price, price * qty * 0.01, trade.id, trade.entered_at)
+    position_ledger.save_snapshot(session, live)
+    session.commit()
+
+    # Fills written without touching the snapshot, e.g. imported by reconcile
+    for side, price, qty, day in (("sell", 130.0, 1.5, 3), ("buy", 90.0, 1.0, 4)):
+        trade = add_trade(session, side, price, qty, day)
+        live.apply(side, qty, price, price * qty * 0.01, trade.id, trade.entered_at)
+    session.commit()
+
+    restored = position_ledger.load(session, fee_pct=0.01)
+    session.commit()
+    assert [lot[:2] for lot in restored.lots] == [[pytest.approx(0.5), 120.0], [1.0, 90.0]]
+    assert restored.summary(100.0) == pytest.approx(live.summary(100.0))
+    assert position_ledger.load(session, fee_pct=0.01).fills == 4 # Re-snapshotted: nothing left to replay
+
+
+def test_fill_updates_are_constant_time():
+    ledger = PositionLedger()
+    started = time.perf_counter()
+    for i in range(20000):
+        ledger.apply("buy", 0.001, 100.0 + i % 7)
+    ledger.apply("sell", 10.0, 105.0) # Consumes half the lots
+    for i in range(20000):
+        ledger.apply("buy", 0.001, 100.0)
+        ledger.apply("sell", 0.001, 101.0)
+    assert len(ledger.lots) == 10000
+    assert time.perf_counter() - started < 1.0
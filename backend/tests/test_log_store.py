@@ -0,0 +1,71 @@
+from backend.app.observability.logs import LogStore
+
+def test_ring_keeps_last_capacity_records():
+    store = LogStore(capacity=10)
+    for i in range(25):
+        store.append("INFO", f"msg {i}")
+    assert store.first_seq == 15
+    result = store.query(limit=100)
+    assert [r["message"] for r in result["records"]] == [f"msg {i}" for i in range(15, 25)]
+
+def test_level_filter_and_cursor():
+    store = LogStore(capacity=100)
+    for i in range(10):
+        store.append("ERROR" if i % 3 == 0 else "INFO", f"msg {i}", component="strategy", fields={"i": i})
+
+    errors = store.query(level="warning")
+    assert [r["fields"]["i"] for r in errors["records"]] == [0, 3, 6, 9]
+
+    page = store.query(since_seq=-1, limit=4)
+    assert [r["seq"] for r in page["records"]] == [0, 1, 2, 3]
+    page = store.query(since_seq=page["cursor"], limit=4)
+    assert [r["seq"] for r in page["records"]] == [4, 5, 6, 7]
+    page = store.query(since_seq=page["cursor"], limit=4)
+    assert [r["seq"] for r in page["records"]] == [8, 9]
+    assert store.query(since_seq=page["cursor"])["records"] == []
+
+def test_tail_is_newest_first():
+    store = LogStore(capacity=10)
+    store.append("INFO", "first")
+    store.append("ERROR", "second")
+    lines = store.tail(5)
+    assert len(lines) == 2
+    assert lines[0].endswith("[ERROR] second")
+
+def test_levels_are_normalized_on_append():
+    store = LogStore(capacity=10)
+    store.append("error", "lower")
+    store.append("warn", "alias")
+    store.append("info", "quiet")
+    assert [r["level"] for r in store.query(level="Warning")["records"]] == ["ERROR", "WARNING"]
+
+def test_filtered_queries_visit_only_candidates():
+    store = LogStore(capacity=100_000)
+    for i in range(100_000):
+        store.append("INFO", f"msg {i}", component="loop")
+    store.append("ERROR", "boom", component="broker")
+    visited = []
+    ring = store._ring
+    class Counting(list):
+        def __getitem__(self, i):
+            visited.append(i)
+            return ring[i]
+    store._ring = Counting()
+    assert [r["message"] for r in store.query(level="error")["records"]] == ["boom"]
+    assert [r["message"] for r in store.query(component="broker", since_seq=0)["records"]] == ["boom"]
+    assert len(visited) == 2
+
+def test_module_loggers_reach_the_store():
+    import logging
+    from backend.app.observability.logs import StoreHandler
+    store = LogStore(capacity=10)
+    handler = StoreHandler(store)
+    log = logging.getLogger("backend.app.paper_broker.broker")
+    log.addHandler(handler)
+    try:
+        log.warning("Insufficient funds for paper trade.")
+        log.warning("already stored", extra={"in_store": True})
+    finally:
+        log.removeHandler(handler)
+    records = store.query()["records"]
+    assert [(r["level"], r["component"], r["message"]) for r in records] == [("WARNING", "broker", "Insufficient funds for paper trade.")]
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+from urllib.parse import urlencode
+
+import pytest
+
+from backend.app.foxbit_client.binance_client import BinanceClient
+from backend.app.paper_broker import real_broker, reconcile
+from backend.app.paper_broker.broker import Order
+from backend.app.storage import database, models
+
+
+def test_signature_uses_cached_key_and_server_offset():
+    client = BinanceClient("key", "secret")
+    client.time_offset_ms = -2500
+    params = client._sign_request({"symbol": "BTCBRL"})
+    signature = params.pop("signature")
+    expected = hmac.new(b"secret", urlencode(params).encode(), hashlib.sha256).hexdigest()
+    assert signature == expected
+    assert params["recvWindow"] == client.recv_window
+
+
+def test_balance_deltas_from_full_ack():
+    ack = {"executedQty": "0.001", "cummulativeQuoteQty": "300.0",
+           "fills": [{"price": "300000", "qty": "0.001", "commission": "0.000001", "commissionAsset": "BTC"}]}
+    brl, btc = reconcile.balance_deltas("BUY", ack)
+    assert brl == pytest.approx(-300.0)
+    assert btc == pytest.approx(0.000999)
+
+
+class FakeBinance:
+    """Records calls; answers like Binance with newOrderRespType=FULL."""
+    def __init__(self, api_key, api_secret):
+        self.calls = []
+
+    def sync_time(self):
+        return 0
+
+    def get_symbol_info(self, symbol):
+        return {"filters": [{"filterType": "LOT_SIZE", "stepSize": "0.00001"}]}
+
+    def get_balances(self, *assets):
+        self.calls.append("account")
+        return {"BRL": 1000.0, "BTC": 0.0}
+
+    def get_my_trades(self, symbol, limit=50, from_id=None):
+        return []
+
+    def create_order(self, symbol, side, quantity, type="MARKET"):
+        self.calls.append("order")
+        return {"orderId": 987654, "status": "FILLED", "executedQty": str(quantity),
+                "cummulativeQuoteQty": str(quantity * 300000),
+                "fills": [{"price": "300000", "qty": str(quantity), "commission": "0.3", "commissionAsset": "BRL"}]}
+
+
+def test_order_is_single_round_trip(monkeypatch):
+    models.Base.metadata.create_all(bind=database.engine)
+    monkeypatch.setenv("BINANCE_API_KEY", "k")
+    monkeypatch.setenv("BINANCE_SECRET_KEY", "s")
+    monkeypatch.setattr(real_broker, "BinanceClient", FakeBinance)
+    broker = real_broker.RealBroker()
+    broker.client.calls.clear()
+
+    order = broker.place_order(Order(id="1", symbol="btcbrl", side="buy", type="market", quantity=0.001, price=0.0))
+    assert broker.client.calls == ["order"]  # No exchangeInfo / account round trips
+    assert order.status == "filled"
+    assert broker.balance == pytest.approx(1000.0 - 300.0 - 0.3)
+    assert broker.holdings == pytest.approx(0.001)
+    assert broker.exchange_rtt.count == 1
+
+    broker._persist_pool.shutdown(wait=True)
+    db = database.SessionLocal()
+    try:
+        trade = db.get(models.Trade, 987654)
+        assert trade is not None and trade.quantity == pytest.approx(0.001)
+        db.delete(trade)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_step_flooring_is_exact(monkeypatch):
+    sent = []
+
+    class RecordingBinance(FakeBinance):
+        def create_order(self, symbol, side, quantity, type="MARKET"):
+            sent.append("{:.8f}".format(quantity).rstrip('0').rstrip('.'))
+            return super().create_order(symbol, side, quantity, type)
+
+    models.Base.metadata.create_all(bind=database.engine)
+    monkeypatch.setenv("BINANCE_API_KEY", "k")
+    monkeypatch.setenv("BINANCE_SECRET_KEY", "s")
+    monkeypatch.setattr(real_broker, "BinanceClient", RecordingBinance)
+    monkeypatch.setattr(real_broker.RealBroker, "_persist_trade", lambda *args: None)
+    broker = real_broker.RealBroker()
+    broker.holdings = 0.01
+
+    # 0.00007 / 0.00001 is 6.999999999999999 in floats: int() used to send one step less
+    broker.place_order(Order(id="1", symbol="btcbrl", side="sell", type="market", quantity=0.00007, price=0.0))
+    broker.holdings = 0.00004995  # Sell-all after a fee-reduced buy floors to the step, leaving no float residue
+    broker.place_order(Order(id="2", symbol="btcbrl", side="sell", type="market", quantity=0.00005, price=0.0))
+    assert sent == ["0.00007", "0.00004"]
+    assert broker.holdings_sats == 995
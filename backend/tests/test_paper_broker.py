@@ -1,5 +1,9 @@
+import time
+
 import pytest
-from backend.app.paper_broker.broker import PaperBroker, Order
+from backend.app.paper_broker.broker import PaperBroker, Order, ORDER_HISTORY_WINDOW, COMPACT_AFTER
+
+pytestmark = pytest.mark.usefixtures("fresh_db") # Brokers persist balance, fills and the ledger snapshot
 
 def test_broker_order_placement():
     broker = PaperBroker(initial_balance=10000)
@@ -34,3 +38,110 @@ def test_broker_limit_fill():
     broker.process_data_tick(39000)
     assert order.status == "filled"
     assert order.filled_price == 40000 # Naive assumption: fills at limit price if gapped
+
+def test_broker_stop_sell_fills_at_market():
+    broker = PaperBroker(initial_balance=10000)
+    broker.holdings = 0.1
+    order = Order(id="3", symbol="BTCBRL", side="sell", type="stop", quantity=0.1, price=0, stop_price=45000)
+    broker.place_order(order)
+
+    broker.process_data_tick(46000)
+    assert order.status == "open"
+
+    broker.process_data_tick(44000) # Gapped through the stop: market fill, not the stop price
+    assert order.status == "filled"
+    assert order.filled_price == pytest.approx(44000 * (1 - broker.slippage_pct))
+
+def test_broker_trailing_stop_follows_peak():
+    broker = PaperBroker(initial_balance=10000)
+    broker.holdings = 0.2
+    early = Order(id="4", symbol="BTCBRL", side="sell", type="trailing_stop", quantity=0.1, price=0, trail_pct=0.05)
+    broker.place_order(early)
+    broker.process_data_tick(100)
+    late = Order(id="5", symbol="BTCBRL", side="sell", type="trailing_stop", quantity=0.1, price=0, trail_pct=0.05)
+    broker.place_order(late)
+
+    broker.process_data_tick(90) # Early one anchored at 100 -> stop 95; late one anchors at 90
+    assert early.status == "filled" and late.status == "open"
+    assert broker.stop_level(late) == pytest.approx(85.5)
+
+    for price in (95, 110, 106):
+        broker.process_data_tick(price)
+    assert late.status == "open" and broker.stop_level(late) == pytest.approx(104.5)
+    broker.process_data_tick(104)
+    assert late.status == "filled"
+
+def test_broker_oco_cancels_sibling():
+    broker = PaperBroker(initial_balance=10000)
+    broker.holdings = 0.1
+    take_profit = Order(id="6", symbol="BTCBRL", side="sell", type="limit", quantity=0.1, price=110)
+    stop = Order(id="7", symbol="BTCBRL", side="sell", type="stop", quantity=0.1, price=0, stop_price=90)
+    group = broker.place_oco([take_profit, stop])
+
+    broker.process_data_tick(111)
+    assert take_profit.status == "filled" and take_profit.filled_price == 110
+    assert stop.status == "canceled" and group not in broker.oco_groups
+    broker.process_data_tick(80)
+    assert broker.holdings == pytest.approx(0)
+
+def test_broker_triggers_nearest_first_and_skip_idle_orders():
+    broker = PaperBroker(initial_balance=1e9)
+    limits = [Order(id=str(i), symbol="BTCBRL", side="buy", type="limit", quantity=0.001, price=float(100 - i)) for i in range(5000)]
+    for order in limits:
+        broker.place_order(order)
+    broker.cancel_order("1")
+
+    broker.process_data_tick(98.5) # Only the 100 and 99 limits are reachable; 99 was canceled
+    assert [o.id for o in list(broker.trade_history)] == ["0"]
+    assert len(broker.triggers.buy_limits) == 4998 # One fill and one lazily dropped cancel, rest untouched
+    broker.process_data_tick(96)
+    assert [o.id for o in list(broker.trade_history)] == ["0", "2", "3", "4"]
+
+def test_broker_rejects_unknown_order_type():
+    broker = PaperBroker(initial_balance=10000)
+    with pytest.raises(ValueError):
+        broker.place_order(Order(id="8", symbol="BTCBRL", side="buy", type="iceberg", quantity=0.1, price=1))
+
+def test_orders_are_slotted_with_own_timestamps():
+    first = Order(id="9", symbol="BTCBRL", side="buy", type="market", quantity=0.1, price=0)
+    time.sleep(0.001)
+    second = Order(id="10", symbol="BTCBRL", side="buy", type="market", quantity=0.1, price=0)
+    assert second.created_at > first.created_at # Not a default shared since import
+    assert not hasattr(first, "__dict__")
+    assert first.to_dict()["id"] == "9" and first.to_dict()["status"] == "open"
+
+def test_broker_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(PaperBroker, "_persist_trade", lambda self, order, fee=0.0: None)
+    monkeypatch.setattr(PaperBroker, "_save_state", lambda self: None)
+    broker = PaperBroker(initial_balance=1e9)
+    for i in range(3000):
+        broker.place_order(Order(id=f"m{i}", symbol="BTCBRL", side="buy", type="market", quantity=0.001, price=0))
+        broker.place_order(Order(id=f"l{i}", symbol="BTCBRL", side="buy", type="limit", quantity=0.001, price=1.0))
+        broker.process_data_tick(100.0)
+        broker.cancel_order(f"l{i}")
+    assert len(broker.orders) == len(broker.trade_history) == ORDER_HISTORY_WINDOW
+    assert not broker.open_orders
+    assert len(broker.triggers.buy_limits) <= COMPACT_AFTER + 1 # Canceled limits are compacted away
+
+def test_fill_reaches_ledger_when_db_write_fails(monkeypatch):
+    from backend.app.paper_broker import broker as broker_module
+    monkeypatch.setattr(broker_module, "PERSIST_RETRY_DELAY", 0.0)
+    broker = PaperBroker(initial_balance=10000)
+    calls = []
+    record_fill = broker.analytics.record_fill
+    def flaky(session, trade, fee=0.0):
+        calls.append(trade.side)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return record_fill(session, trade, fee)
+    monkeypatch.setattr(broker.analytics, "record_fill", flaky)
+
+    broker.place_order(Order(id="1", symbol="BTCBRL", side="buy", type="market", quantity=0.1, price=0))
+    broker.process_data_tick(50000)
+    assert calls == ["buy", "buy"] # First write failed, retry landed
+    assert broker.ledger.quantity == pytest.approx(0.1) and broker.ledger.last_fill is not None
+
+    monkeypatch.setattr(broker.analytics, "record_fill", lambda *args, **kwargs: 1 / 0)
+    broker.place_order(Order(id="2", symbol="BTCBRL", side="sell", type="market", quantity=0.05, price=0))
+    broker.process_data_tick(51000)
+    assert broker.ledger.quantity == pytest.approx(0.05) # Booked even though every write failed
@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app.storage import models, analytics
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield db
+    db.close()
+
+def fill(session, side, price, qty, fee=0.0, day=1):
+    trade = models.Trade(symbol="btcbrl", side=side, entry_price=price, quantity=qty, status="filled",
+                         entered_at=datetime(2024, 1, day, 12), strategy_name="SMA_Crossover")
+    session.add(trade)
+    session.flush()
+    analytics.record_fill(session, trade, fee)
+    session.commit()
+    return trade
+
+def test_fifo_round_trips_and_summary(session):
+    buy1 = fill(session, "buy", 100.0, 1.0, fee=1.0)
+    buy2 = fill(session, "buy", 200.0, 1.0, fee=2.0)
+    sell = fill(session, "sell", 150.0, 1.5, fee=1.5, day=2)
+
+    # 1.0 @ 100 -> 150 and 0.5 @ 200 -> 150
+    assert sell.pnl == pytest.approx((50 - 1.0 - 1.0) + (-25 - 1.0 - 0.5))
+    assert buy1.exit_price == 150.0 and buy1.pnl == pytest.approx(48.0)
+    assert buy2.exit_price is None # Still partially open
+    assert session.query(models.RoundTrip).count() == 2
+
+    summary = analytics.summary(session)
+    assert summary["total"]["fills"] == 3
+    assert summary["total"]["round_trips"] == 2
+    assert summary["total"]["win_rate"] == 0.5
+    assert summary["total"]["fees"] == pytest.approx(4.5)
+    assert summary["by_day"]["2024-01-02"]["realized_pnl"] == pytest.approx(sell.pnl)
+    assert summary["by_strategy"]["SMA_Crossover"]["round_trips"] == 2
+
+def test_rebuild_matches_incremental(session):
+    fill(session, "buy", 100.0, 1.0)
+    fill(session, "sell", 110.0, 1.0)
+    fill(session, "buy", 120.0, 2.0)
+    fill(session, "sell", 100.0, 2.0, day=3)
+    incremental = analytics.summary(session)
+    analytics.rebuild(session)
+    assert analytics.summary(session) == incremental
+    assert session.query(models.OpenLot).count() == 0
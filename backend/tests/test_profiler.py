@@ -0,0 +1,68 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.observability.profiler import SamplingProfiler, PhaseTimer, collapse
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampler_returns_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks = SamplingProfiler().run(0.2, 0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    text = collapse(stacks)
+    busy = [line for line in text.splitlines() if line.startswith("busy;")]
+    assert busy and any("busy_worker" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in text.splitlines())
+
+
+def test_phase_timer_excludes_nested_phase():
+    timer = PhaseTimer()
+    assert timer.begin().mark("noop") is None and timer.phases == {}  # Disabled: nothing recorded
+
+    timer.enable()
+    it = timer.begin()
+    time.sleep(0.01)
+    it.nested("order", 8.0)
+    it.mark("signal_eval")
+    it.end()
+    phases = timer.summary()["phases"]
+    assert phases["order"]["p50_ms"] == 8.0
+    assert phases["signal_eval"]["p50_ms"] < phases["total"]["p50_ms"] - 7.0
+
+
+def test_admin_endpoints_require_token(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.get("/api/admin/loop-timing").status_code == 403
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/loop-timing", headers={"X-Admin-Token": "nope"}).status_code == 401
+    response = client.post("/api/admin/profile?seconds=0.1", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_api_worker_forwards_profile(monkeypatch):
+    calls = []
+    async def fake_send(path, cmd, args, timeout):
+        calls.append((cmd, args, timeout))
+        return "main;loop 3\n"
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "APP_ROLE", "api")
+    monkeypatch.setattr(main, "send_command", fake_send)
+    response = TestClient(main.app).post("/api/admin/profile?seconds=2", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and response.text == "main;loop 3\n"
+    assert calls == [("profile", {"seconds": 2.0, "interval_ms": 5.0}, 12.0)]
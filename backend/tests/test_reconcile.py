@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app.storage import models
+from backend.app.paper_broker import reconcile
+from backend.app.paper_broker import ledger as position_ledger
+from backend.app.paper_broker.real_broker import RealBroker
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield db
+    db.close()
+
+def fill(trade_id, order_id, price, qty, buyer=True, ts=1700000000000):
+    return {"id": trade_id, "orderId": order_id, "price": str(price), "qty": str(qty),
+            "quoteQty": str(price * qty), "commission": "0.1", "commissionAsset": "BRL",
+            "time": ts + trade_id, "isBuyer": buyer}
+
+def test_partial_fills_aggregated_per_order(session):
+    fills = [fill(1, 10, 100.0, 1.0), fill(2, 10, 110.0, 1.0), fill(3, 11, 120.0, 2.0, buyer=False)]
+    result = reconcile.reconcile_fills(session, fills)
+    session.commit()
+    assert result["inserted"] == 2
+
+    buy = session.get(models.Trade, 10)
+    assert buy.quantity == 2.0
+    assert buy.entry_price == pytest.approx(105.0)
+    sell = session.get(models.Trade, 11)
+    assert sell.pnl == pytest.approx((120 - 105) * 2 - 0.2 - 0.1)
+
+def test_existing_rows_found_with_one_query_and_merged(session):
+    reconcile.reconcile_fills(session, [fill(1, 10, 100.0, 1.0)])
+    session.add(models.Trade(id=20, symbol="BTCBRL", side="buy", quantity=1.0, entry_price=50.0,
+                             status="filled", strategy_name="SMA_Crossover"))
+    session.commit()
+
+    result = reconcile.reconcile_fills(session, [fill(2, 10, 200.0, 1.0), fill(3, 20, 50.0, 1.0)])
+    session.commit()
+    assert result == {"inserted": 0, "merged": 1, "skipped": 1}
+    assert session.get(models.Trade, 10).entry_price == pytest.approx(150.0)
+    assert session.get(models.Trade, 20).quantity == 1.0 # Live order path row untouched
+
+def test_cursor_roundtrip(session):
+    assert reconcile.load_cursor(session) == 0
+    reconcile.save_cursor(session, 42)
+    session.commit()
+    assert reconcile.load_cursor(session) == 42
+
+def test_late_partial_fill_rebuilds_ledger(session):
+    reconcile.reconcile_fills(session, [fill(1, 10, 100.0, 1.0)])
+    session.commit()
+    ledger = position_ledger.load(session) # Snapshot now counts order 10 as 1.0 BTC
+    session.commit()
+    assert ledger.quantity == 1.0
+
+    reconcile.reconcile_fills(session, [fill(2, 10, 200.0, 1.0)])
+    session.commit()
+    assert position_ledger.load(session).quantity == 2.0
+
+def test_sync_history_commits_each_page(fresh_db):
+    class Client:
+        def __init__(self):
+            self.pages = [[fill(1, 10, 100.0, 1.0), fill(2, 10, 100.0, 1.0)], [fill(3, 11, 110.0, 1.0), fill(4, 11, 110.0, 1.0)]]
+        def get_my_trades(self, symbol, limit, from_id):
+            if not self.pages:
+                raise ConnectionError("exchange went away")
+            return self.pages.pop(0)
+
+    broker = RealBroker.__new__(RealBroker)
+    broker.client = Client()
+    broker.sync_history(page_size=2) # Third page request fails
+    db = fresh_db.SessionLocal()
+    try:
+        assert reconcile.load_cursor(db) == 5
+        assert {t.id for t in db.query(models.Trade).all()} == {10, 11}
+    finally:
+        db.close()
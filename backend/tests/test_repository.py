@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.engine import make_url
+
+from backend.app.storage import database, models, repository
+
+
+def test_async_url_mapping():
+    url, args = database.async_database_url("sqlite:///./storage.db")
+    assert url.startswith("sqlite+aiosqlite:///")
+
+    url, args = database.async_database_url("postgresql://u:p@db.example.com:5432/postgres?sslmode=require")
+    parsed = make_url(url)
+    assert parsed.drivername == "postgresql+asyncpg"
+    assert "sslmode" not in parsed.query and args["ssl"] == "require"
+    assert parsed.query["prepared_statement_cache_size"] == str(database.DB_STATEMENT_CACHE_SIZE)
+
+    # Supabase transaction pooler: statement caches off
+    url, args = database.async_database_url("postgresql://u:p@pooler.example.com:6543/postgres")
+    assert make_url(url).query["prepared_statement_cache_size"] == "0"
+    assert args["statement_cache_size"] == 0
+
+
+def test_repository_roundtrip(fresh_db):
+    async def scenario():
+        try:
+            await repository.set_configs({"repo_test_a": "1", "repo_test_b": "2"})
+            await repository.set_configs({"repo_test_a": "3"})
+            assert await repository.get_configs("repo_test_a", "repo_test_b", "missing") == {
+                "repo_test_a": "3", "repo_test_b": "2", "missing": None,
+            }
+            assert await repository.get_config("repo_test_b") == "2"
+
+            trade = await repository.add_trade(models.Trade(
+                symbol="btcbrl", side="buy", quantity=0.01, status="filled",
+                entered_at=datetime.utcnow(), entry_price=100000.0, strategy_name="repo_test",
+            ), fee=5.0)
+            latest = await repository.last_trade()
+            assert latest["entry_price"] == 100000.0
+            assert repository.trade_to_order((await repository.recent_trades(1))[0])["id"] == str(trade.id)
+
+            summary = await repository.pnl_summary(days=7)
+            assert summary["by_strategy"]["repo_test"]["fills"] == 1
+            assert "async" in database.pool_status()
+        finally:
+            await database.dispose_async_engine()
+
+    asyncio.run(scenario())
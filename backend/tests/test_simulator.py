@@ -0,0 +1,66 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.simulator.market import MarketConfig, MarketSimulator, Regime
+from backend.simulator.exchange import MockExchange, create_app
+
+
+def test_simulator_is_deterministic_and_positive():
+    a = MarketSimulator(MarketConfig(seed=7)).step(5000)
+    b = MarketSimulator(MarketConfig(seed=7)).step(5000)
+    assert (a == b).all()
+    assert (a > 0).all()
+
+
+def test_regimes_switch_and_since_returns_tail():
+    config = MarketConfig(tick_rate=10, regimes=[Regime("calm", 0.4, 1.0), Regime("volatile", 1.5, 1.0)])
+    sim = MarketSimulator(config, history=50)
+    seen = set()
+    for _ in range(20):
+        sim.step(10)
+        seen.add(sim.regime_name)
+    assert seen == {"calm", "volatile"}
+
+    ticks = sim.since(sim.seq - 3)
+    assert [t[0] for t in ticks] == [sim.seq - 2, sim.seq - 1, sim.seq]
+    assert ticks[-1][2] == sim.price
+    assert len(sim.since(0)) == 50  # Bounded by the ring
+
+
+def signed(params):
+    return {**params, "timestamp": int(time.time() * 1000), "signature": "x"}
+
+
+def test_mock_exchange_order_updates_account_and_trades():
+    exchange = MockExchange(MarketSimulator(MarketConfig(seed=1)), balances={"BRL": 10000.0, "BTC": 0.0})
+    client = TestClient(create_app(exchange))
+
+    ticker = client.get("/api/v3/ticker/price", params={"symbol": "BTCBRL"})
+    assert float(ticker.json()["price"]) > 0
+    assert int(ticker.headers["X-MBX-USED-WEIGHT-1M"]) >= 1
+
+    fill = client.post("/api/v3/order", params=signed({"side": "BUY", "type": "MARKET", "quantity": "0.01"})).json()
+    assert fill["status"] == "FILLED" and fill["fills"][0]["commissionAsset"] == "BTC"
+    client.post("/api/v3/order", params=signed({"side": "SELL", "type": "MARKET", "quantity": "0.005"}))
+
+    balances = {b["asset"]: float(b["free"]) for b in client.get("/api/v3/account", params=signed({})).json()["balances"]}
+    assert abs(balances["BTC"] - (0.01 * 0.999 - 0.005)) < 1e-9
+    assert balances["BRL"] < 10000.0
+
+    trades = client.get("/api/v3/myTrades", params=signed({"fromId": 2})).json()
+    assert [t["id"] for t in trades] == [2] and trades[0]["isBuyer"] is False
+
+    rejected = client.post("/api/v3/order", params=signed({"side": "SELL", "type": "MARKET", "quantity": "5"}))
+    assert rejected.status_code == 400 and rejected.json()["code"] == -2010
+
+
+def test_mock_exchange_rejects_stale_timestamp_and_throttles():
+    exchange = MockExchange(MarketSimulator(), weight_limit=25)
+    client = TestClient(create_app(exchange))
+
+    stale = client.get("/api/v3/account", params={"timestamp": int(time.time() * 1000) - 60000, "signature": "x"})
+    assert stale.status_code == 400 and stale.json()["code"] == -1021
+
+    throttled = client.get("/api/v3/account", params=signed({}))  # 20 + 20 > 25
+    assert throttled.status_code == 429 and int(throttled.headers["Retry-After"]) >= 1
@@ -0,0 +1,28 @@
+import asyncio
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from backend.app import main
+
+def test_import_defers_heavy_modules():
+    code = "import sys, backend.app.main; print('backtrader' in sys.modules or 'pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+def test_status_served_before_warmup():
+    assert main.state.broker is None or main.state.ready
+    client = TestClient(main.app) # No context manager: startup (warmup) not triggered
+    assert client.get("/").status_code == 200
+    status = client.get("/api/status").json()
+    assert "ready" in status
+    assert status["balance"] >= 0
+
+def test_warmup_marks_ready(monkeypatch):
+    monkeypatch.setenv("TRADING_MODE", "PAPER")
+    asyncio.run(main.warmup())
+    assert main.state.ready
+    assert main.state.broker is not None
+    startup = main.state.health_metrics["startup"]
+    assert startup["phase"] == "ready"
+    assert startup["warmup_ms"] >= 0
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from backend.app.core.state_bus import (
+    StateBusWriter, StateBusReader, CommandError, serve_commands, send_command, _HEADER, _SEQ,
+)
+
+
+@pytest.fixture
+def bus_name():
+    return f"test_bus_{uuid.uuid4().hex[:8]}"
+
+
+def test_reader_sees_latest_snapshot(bus_name):
+    writer = StateBusWriter(bus_name, size=64 * 1024)
+    reader = StateBusReader(bus_name)
+    try:
+        assert reader.read() is None  # Nothing published yet
+        writer.publish({"status": {"current_price": 100.0}, "history": []})
+        first = reader.read()
+        assert first["status"]["current_price"] == 100.0
+        assert reader.read() is first  # Cached until the next publish
+
+        writer.publish({"status": {"current_price": 101.5}, "history": [{"id": "1"}]})
+        assert reader.read()["status"]["current_price"] == 101.5
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_never_returns_torn_write(bus_name):
+    writer = StateBusWriter(bus_name, size=64 * 1024)
+    reader = StateBusReader(bus_name, retries=10)
+    try:
+        writer.publish({"v": 1})
+        assert reader.read() == {"v": 1}
+        # Writer died mid-update: odd sequence and garbage payload
+        _SEQ.pack_into(writer.shm.buf, 0, writer.seq + 1)
+        writer.shm.buf[_HEADER.size:_HEADER.size + 4] = b"xxxx"
+        assert reader.read() == {"v": 1}
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_reattaches_after_trader_restart(bus_name):
+    writer = StateBusWriter(bus_name, size=64 * 1024)
+    reader = StateBusReader(bus_name, recheck_interval=0)
+    try:
+        writer.publish({"v": "old"})
+        assert reader.read() == {"v": "old"}
+        writer.close()  # Trader exits and unlinks its segment
+        assert reader.read() is None
+
+        writer = StateBusWriter(bus_name, size=128 * 1024)
+        writer.publish({"v": "new"})
+        assert reader.read() == {"v": "new"}
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_missing_segment_reads_none(bus_name):
+    assert StateBusReader(bus_name).read() is None
+
+
+def test_command_roundtrip(tmp_path):
+    path = os.path.join(str(tmp_path), "cmd.sock")
+
+    async def echo(args):
+        return {"echo": args["value"]}
+
+    async def big(args):
+        return "x" * args["size"]
+
+    async def fail(args):
+        raise CommandError(400, "Kill switch active")
+
+    async def scenario():
+        server = await serve_commands(path, {"echo": echo, "big": big, "fail": fail})
+        try:
+            assert await send_command(path, "echo", {"value": 42}) == {"echo": 42}
+            text = await send_command(path, "big", {"size": 200000}) # Well past asyncio's default 64 KiB line limit
+            assert text == "x" * 200000
+            with pytest.raises(CommandError) as bad:
+                await send_command(path, "fail")
+            assert bad.value.status_code == 400
+            with pytest.raises(CommandError) as unknown:
+                await send_command(path, "nope")
+            assert unknown.value.status_code == 404
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_unavailable_trader(tmp_path):
+    with pytest.raises(CommandError) as err:
+        asyncio.run(send_command(os.path.join(str(tmp_path), "missing.sock"), "start"))
+    assert err.value.status_code == 503
@@ -0,0 +1,123 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.storage import models
+from backend.app.strategies import live
+from backend.app.strategies.indicators import IndicatorGraph
+from backend.benchmarks.ticks import synthetic_ticks
+
+
+def test_indicators_match_naive_computation():
+    prices = synthetic_ticks(500, seed=3)
+    graph = IndicatorGraph()
+    sma, high, low = graph.sma(30), graph.highest(20), graph.lowest(20)
+    for i, price in enumerate(prices):
+        graph.update(price)
+        if i + 1 >= 30:
+            assert sma.value == pytest.approx(sum(prices[i - 29:i + 1]) / 30)
+        if i >= 20:
+            assert high.value == max(prices[i - 20:i])
+            assert low.value == min(prices[i - 20:i])
+    assert graph.sma(5).value == pytest.approx(sum(prices[-5:]) / 5)  # Late registration replays the ring
+
+
+def test_shadows_share_indicator_nodes():
+    book = live.StrategyBook(live.create("StrategyA"), live.default_shadow_grid())
+    assert len(book.shadows) == 50
+    periods = {10, 20, 30, 45, 60, 120, 180, 240, 360}
+    assert set(book.graph.nodes) == {("sma", p) for p in periods}
+
+    position = live.Position()
+    for i, price in enumerate(synthetic_ticks(2000)):
+        book.on_tick(price, position, now=i * 10.0)
+    report = book.report()
+    assert report["ticks"] == 2000 and len(report["shadows"]) == 50
+    returns = [s["return_pct"] for s in report["shadows"]]
+    assert returns == sorted(returns, reverse=True)
+
+
+def test_crossover_signals_and_warm_restore():
+    strategy = live.create("StrategyA", short=3, long=6, cooldown=0)
+    book = live.StrategyBook(strategy)
+    flat = live.Position()
+    for price in [100.0] * 6:
+        assert book.on_tick(price, flat, now=0) is None
+    signal = None
+    for price in [101.0, 103.0, 106.0]:
+        signal = book.on_tick(price, flat, now=0)
+    assert signal.side == "buy" and signal.reason == "signal"
+
+    holding = live.Position(holdings=0.01, entry_price=100.0)
+    assert book.on_tick(104.5, holding, now=0).reason == "take_profit"
+
+    restored = live.StrategyBook(live.create("StrategyA", short=3, long=6))
+    restored.warm(list(book.graph.ring.tail(book.graph.capacity)))
+    assert restored.primary.indicators() == pytest.approx(book.primary.indicators())
+
+
+def test_registry_rejects_unknown_names_and_params():
+    with pytest.raises(ValueError):
+        live.create("StrategyZ")
+    with pytest.raises(ValueError):
+        live.create("StrategyA", periodo=3)
+    assert [s.name for s in live.parse_shadows('[{"strategy": "StrategyB", "params": {"lookback": 50}}]')] == ["StrategyB"]
+    assert live.parse_shadows("none") == []
+
+
+def test_config_switches_active_strategy(monkeypatch, fresh_db):
+    monkeypatch.setattr(main.state, "active_strategy", "StrategyA")
+    client = TestClient(main.app)
+    body = {"max_position_size_pct": 0.5, "stop_loss_pct": 0.05, "max_drawdown_limit": 0.2}
+    assert client.post("/api/config", json={**body, "active_strategy": "Nope"}).status_code == 400
+    assert client.post("/api/config", json={**body, "active_strategy": "StrategyB"}).status_code == 200
+    assert client.get("/api/config").json() == {**body, "active_strategy": "StrategyB"}
+    session = fresh_db.SessionLocal()
+    try:
+        assert session.get(models.Configuration, "active_strategy").value == "StrategyB"
+    finally:
+        session.close()
+    report = client.get("/api/strategies").json()
+    assert report["active"] == "StrategyB" and set(report["available"]) >= {"StrategyA", "StrategyB"}
+
+
+def test_buy_rests_protective_oco_in_paper_broker(monkeypatch, fresh_db):
+    import asyncio
+    from backend.app.paper_broker.broker import PaperBroker
+    from backend.app.risk_engine.engine import RiskEngine, TradeRisk
+    broker = PaperBroker(initial_balance=10000)
+    monkeypatch.setattr(main.state, "broker", broker)
+    monkeypatch.setattr(main.state, "strategy_book", live.StrategyBook(live.create("StrategyA")))
+    monkeypatch.setattr(main.state, "protective_orders", [])
+    monkeypatch.setattr(main.state, "risk_engine", RiskEngine(TradeRisk(max_position_size_pct=1.0, stop_loss_pct=0.05)))
+
+    asyncio.run(main.execute_signal("btcbrl", live.Signal("buy", "signal", 0.01), 100.0, 10000.0))
+    stop, take_profit = main.state.protective_orders
+    assert (stop.type, stop.stop_price) == ("stop", pytest.approx(95.0))
+    assert (take_profit.type, take_profit.price) == ("limit", pytest.approx(104.0))
+
+    broker.process_data_tick(100.0) # Buy fills, exits rest
+    main.check_protection()
+    assert main.state.entry_price == pytest.approx(100.1) and broker.holdings == pytest.approx(98.0) # Slipped fill
+    broker.process_data_tick(94.0)
+    main.check_protection()
+    assert stop.status == "filled" and take_profit.status == "canceled"
+    assert main.state.entry_price == 0.0 and main.state.protective_orders == []
+
+
+def test_distance_to_decision_levels():
+    strategy = live.create("StrategyA", short=3, long=6, threshold=0.01, take_profit=0.04)
+    book = live.StrategyBook(strategy)
+    assert strategy.distance(100.0, live.Position()) is None  # Indicators not warm
+    for price in [100.0] * 6:
+        book.on_tick(price, live.Position(), now=0)
+    assert strategy.distance(100.0, live.Position()) == pytest.approx(0.01)  # SMA gap 0 vs 1% entry threshold
+    holding = live.Position(holdings=0.01, entry_price=100.0)
+    assert strategy.distance(101.0, holding) == pytest.approx(0.01)  # Exit threshold closer than take profit
+    assert strategy.distance(103.9, holding) == pytest.approx(1 - 103.9 / 104.0)
+
+    breakout = live.create("StrategyB", lookback=3, exit_lookback=3)
+    book = live.StrategyBook(breakout)
+    for price in [100.0, 100.0, 102.0, 98.0, 99.0]:
+        book.on_tick(price, live.Position(), now=0)
+    assert breakout.distance(101.0, live.Position()) == pytest.approx(1 - 101.0 / 102.0)
@@ -0,0 +1,106 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app.storage import models
+from backend.app.storage import transfer as transfer_module
+from backend.app.storage.transfer import transfer, read_copy_checksums
+
+def seed(url, start, count):
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.bulk_insert_mappings(models.Trade, [
+        {"id": i, "symbol": "btcbrl", "side": "buy" if i % 2 else "sell", "entry_price": 300000.0 + i,
+         "quantity": 0.001, "pnl": 0.0, "status": "filled", "entered_at": datetime(2024, 1, 1, 12, 0, i % 60),
+         "strategy_name": "SMA\tCrossover"}
+        for i in range(start, start + count)
+    ])
+    db.merge(models.Configuration(key="balance", value=str(100.0 + count)))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+def count_trades(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT COUNT(*), MAX(id) FROM trades").one()
+
+def test_sqlite_to_sqlite_incremental(tmp_path):
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    dest = f"sqlite:///{tmp_path / 'dest.db'}"
+    seed(source, 1, 2500)
+
+    report = transfer(source, dest_url=dest, chunk_size=1000)
+    assert report["trades"]["rows"] == 2500
+    assert report["trades"]["verified"]
+    assert report["configurations"]["verified"]
+
+    seed(source, 2501, 100)
+    report = transfer(source, dest_url=dest, chunk_size=1000)
+    assert report["trades"]["rows"] == 100 # Only rows above the high-water mark
+    assert count_trades(dest) == (2600, 2600)
+
+def test_paper_accounts_follow_in_place_updates(tmp_path):
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    dest = f"sqlite:///{tmp_path / 'dest.db'}"
+    seed(source, 1, 10)
+    engine = create_engine(source)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO paper_accounts (id, name, balance, holdings) VALUES (1, 'a', 1000.0, 0.0)")
+    transfer(source, dest_url=dest)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE paper_accounts SET balance = 400.0, holdings = 0.002 WHERE id = 1")
+
+    report = transfer(source, dest_url=dest)
+    assert report["paper_accounts"]["verified"]
+    with create_engine(dest).connect() as conn:
+        assert conn.exec_driver_sql("SELECT balance, holdings FROM paper_accounts").one() == (400.0, 0.002)
+
+def test_updated_rows_are_repaired(tmp_path):
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    dest = f"sqlite:///{tmp_path / 'dest.db'}"
+    seed(source, 1, 50)
+    transfer(source, dest_url=dest, chunk_size=20)
+
+    engine = create_engine(source)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE trades SET pnl = 5.0, exit_price = 1.0 WHERE id = 7")
+    report = transfer(source, dest_url=dest, chunk_size=20)
+    assert report["trades"]["rows"] == 0 # Incremental runs only verify what they copied
+    assert report["trades"]["repaired_ranges"] == 0
+
+    report = transfer(source, dest_url=dest, chunk_size=20, audit=True)
+    assert report["trades"]["rows"] == 0
+    assert report["trades"]["repaired_ranges"] == 1
+    assert report["trades"]["verified"]
+
+def test_sqlite_to_copy_file(tmp_path):
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    out = str(tmp_path / "dump.sql")
+    state = str(tmp_path / "state.json")
+    seed(source, 1, 300)
+
+    report = transfer(source, copy_file=out, state_path=state, chunk_size=128)
+    assert report["trades"]["rows"] == 300
+    assert report["trades"]["verified"]
+    text = open(out).read()
+    assert "COPY trades (" in text and "SMA\\tCrossover" in text
+    assert text.rstrip().endswith("COMMIT;")
+
+    seed(source, 301, 10)
+    report = transfer(source, copy_file=out, state_path=state)
+    assert report["trades"]["rows"] == 10
+    assert "trades" in read_copy_checksums(out)
+
+def test_copy_file_checked_against_source(tmp_path, monkeypatch):
+    source = f"sqlite:///{tmp_path / 'source.db'}"
+    seed(source, 1, 40)
+    write = transfer_module.CopyFileSink.write
+    monkeypatch.setattr(transfer_module.CopyFileSink, "write", lambda self, table, rows, conn=None: write(self, table, rows[:-1]))
+    report = transfer(source, copy_file=str(tmp_path / "dump.sql"))
+    assert report["trades"]["verified"] is False
+
+def test_requires_single_target():
+    with pytest.raises(ValueError):
+        transfer("sqlite://")
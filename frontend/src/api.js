@@ -6,6 +6,7 @@ const API_BASE = (import.meta.env.PROD) ? '/cryptotrader/api' : 'http://localhos
 export const api = {
     getStatus: () => axios.get(`${API_BASE}/status`),
     getHistory: () => axios.get(`${API_BASE}/history`),
+    getEquity: (params) => axios.get(`${API_BASE}/equity`, { params }),
     startTrading: () => axios.post(`${API_BASE}/start`),
     stopTrading: () => axios.post(`${API_BASE}/stop`),
     updateConfig: (config) => axios.post(`${API_BASE}/config`, config),
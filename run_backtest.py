@@ -1,18 +1,70 @@
+import argparse
+import itertools
+import json
+import time
 from datetime import datetime
-from backend.app.core.bot import BotEngine
+
+from backend.app.backtest.cache import ResultCache
+from backend.app.backtest.engine import BacktestConfig, BrokerModel, load_frame, run_batch
+
+# Default sweep: both strategies over a grid around their defaults
+DEFAULT_GRIDS = {
+    "StrategyA": {"fast_period": [5, 10, 15, 20], "slow_period": [30, 50, 80, 120]},
+    "StrategyB": {"lookback": [10, 20, 40, 60], "atr_multiplier": [1.5, 2.0, 3.0]},
+}
+
+
+def parse_grid(spec: str) -> dict:
+    """'fast_period=5,10 slow_period=30,60' -> {'fast_period': [5, 10], 'slow_period': [30, 60]}"""
+    grid = {}
+    for part in spec.split():
+        key, values = part.split("=", 1)
+        grid[key] = [json.loads(v) for v in values.split(",")]
+    return grid
+
+
+def expand(strategy: str, grid: dict):
+    keys = list(grid)
+    return [BacktestConfig(strategy, dict(zip(keys, combo))) for combo in itertools.product(*grid.values())]
+
 
 if __name__ == "__main__":
-    print("Running Backtest...")
-    engine = BotEngine()
-    
-    # Example Parameters
-    start = datetime(2023, 1, 1)
-    end = datetime(2023, 12, 1)
-    
-    # Run Strategy A
-    print("\n--- Strategy A (Trend) ---")
-    engine.run_backtest("StrategyA", "BTC-USD", start, end, 10000.0)
-    
-    # Run Strategy B
-    print("\n--- Strategy B (Breakout) ---")
-    engine.run_backtest("StrategyB", "BTC-USD", start, end, 10000.0)
+    parser = argparse.ArgumentParser(description="Backtest and compare strategy configurations in one pass")
+    parser.add_argument("--strategy", action="append", help="Strategy to sweep (repeatable). Default: all")
+    parser.add_argument("--grid", help="Parameter grid for --strategy, e.g. 'fast_period=5,10 slow_period=30,60'")
+    parser.add_argument("--data", help="OHLCV CSV (datetime,open,high,low,close,volume). Default: synthetic bars")
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default="2023-12-01")
+    parser.add_argument("--cash", type=float, default=10000.0)
+    parser.add_argument("--maxcpus", type=int, default=0, help="Worker processes (0 = all cores)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached results (BACKTEST_CACHE_DIR)")
+    parser.add_argument("--output", help="Write full results (trades, equity curves) as JSON")
+    args = parser.parse_args()
+
+    strategies = args.strategy or list(DEFAULT_GRIDS)
+    configs = []
+    for name in strategies:
+        grid = parse_grid(args.grid) if args.grid else DEFAULT_GRIDS.get(name, {})
+        configs.extend(expand(name, grid))
+
+    frame = load_frame(args.data, datetime.fromisoformat(args.start), datetime.fromisoformat(args.end))
+    print(f"Running {len(configs)} configurations over {len(frame)} bars...")
+    started = time.perf_counter()
+    cache = None if args.no_cache else ResultCache()
+    results = run_batch(configs, frame, BrokerModel(cash=args.cash), maxcpus=args.maxcpus or None, cache=cache)
+    elapsed = time.perf_counter() - started
+
+    ranked = sorted(results, key=lambda r: r["return_pct"], reverse=True)
+    print(f"\n{'configuration':<52}{'return %':>10}{'max DD %':>10}{'trades':>8}{'win %':>8}")
+    for r in ranked[:args.top]:
+        stats = r["trade_stats"]
+        print(f"{r['label']:<52}{r['return_pct']:>10.2f}{r['max_drawdown_pct']:>10.2f}"
+              f"{stats['closed']:>8}{stats['win_rate'] * 100:>8.1f}")
+    cached = f" ({cache.hits} from cache)" if cache else ""
+    print(f"\n{len(configs)} configurations in {elapsed:.2f}s{cached}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
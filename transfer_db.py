@@ -0,0 +1,37 @@
+import argparse
+import json
+import logging
+import os
+
+from backend.app.storage.transfer import transfer
+
+# Examples:
+#   python3 transfer_db.py --source sqlite:///backend/storage.db --dest "$DATABASE_URL"
+#   python3 transfer_db.py --source sqlite:///backend/storage.db --copy-file migration.sql --state migration.state.json
+#   psql "$DATABASE_URL" -f migration.sql
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Stream trades/config between databases or into a COPY file.",
+        epilog="Incremental runs only copy new rows of keyed tables; rows updated in place at the source "
+               "need --audit (database targets) or --full.",
+    )
+    parser.add_argument("--source", default=os.getenv("SOURCE_DATABASE_URL", "sqlite:///./storage.db"))
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--dest", help="Target SQLAlchemy URL (postgresql://..., sqlite:///...)")
+    target.add_argument("--copy-file", help="Write a psql-replayable COPY script instead")
+    parser.add_argument("--state", help="High-water mark file for incremental COPY dumps")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--full", action="store_true", help="Ignore high-water marks and copy everything, including rows updated in place")
+    parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification")
+    parser.add_argument("--audit", action="store_true", help="Verify every row, not just the ones copied in this run, and re-copy rows updated in place (database targets)")
+    args = parser.parse_args()
+
+    report = transfer(
+        args.source, dest_url=args.dest, copy_file=args.copy_file, state_path=args.state,
+        chunk_size=args.chunk_size, full=args.full, verify=not args.no_verify, audit=args.audit,
+    )
+    print(json.dumps(report, indent=2))
+    if any(entry.get("verified") is False for entry in report.values()):
+        raise SystemExit("Checksum verification failed")